@@ -2,7 +2,8 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import matplotlib.ticker as mticker
 
-df = pd.read_csv('https://raw.githubusercontent.com/Juan-Domingues/DtAnalyticsExp-Fase1/main/Arquivos%20Bases/ExpSuco.csv', sep='\t')
+df = pd.read_csv('https://raw.githubusercontent.com/Juan-Domingues/DtAnalyticsExp-Fase1/main/Arquivos%20Bases/ExpSuco.csv', sep='\t',
+                 usecols=lambda col: not col[:4].isdigit() or int(col[:4]) >= 2015)
 
 def rename_columns(col):
     if col.endswith('.1'):
@@ -14,9 +15,6 @@ def rename_columns(col):
 
 df = df.rename(columns=rename_columns)
 
-cols_to_keep = [col for col in df.columns if not col[:4].isdigit() or int(col[:4]) >= 2015]
-df = df[cols_to_keep]
-
 pais_col = [col for col in df.columns if 'país' in col.lower() or 'pais' in col.lower()][0]
 
 df[pais_col] = df[pais_col].replace('Alemanha, República Democrática', 'Alemanha')
@@ -1,10 +1,8 @@
-import geopandas as gpd
 import matplotlib.pyplot as plt
 import matplotlib.colors as mcolors
 from matplotlib.patches import Patch
 import matplotlib.patheffects as path_effects_module
 import os
-import requests
 import pandas as pd
 
 def download_geojson():
@@ -13,6 +11,7 @@ def download_geojson():
     """
     filename = 'brazil_states.geojson'
     if not os.path.exists(filename):
+        import requests
         print(f"Baixando arquivo GeoJSON do Brasil para: {os.path.abspath(filename)}")
         url = "https://raw.githubusercontent.com/codeforamerica/click_that_hood/master/public/data/brazil-states.geojson"
         try:
@@ -235,6 +234,7 @@ def create_grape_production_map_by_region(brazil_gdf):
         print(f"Erro ao salvar ou mostrar o mapa por REGIÃO: {e}")
 
 if __name__ == "__main__":
+    import geopandas as gpd
     geojson_file_path = download_geojson()
     if geojson_file_path:
         try:
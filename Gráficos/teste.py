@@ -1,9 +1,7 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import pandas as pd
 import matplotlib.pyplot as plt
-import numpy as np
 import os
 import matplotlib
 
@@ -32,10 +30,9 @@ data_consumo_mundial = {
     ]
 }
 
-df_consumo_mundial = pd.DataFrame(data_consumo_mundial)
-
 # Sort data for better visualization (optional, but often good for bar charts)
-df_consumo_mundial = df_consumo_mundial.sort_values(by='consumo_milhoes_hectolitros', ascending=True)
+paises, consumos = zip(*sorted(zip(data_consumo_mundial['pais'], data_consumo_mundial['consumo_milhoes_hectolitros']),
+                              key=lambda item: item[1]))
 
 # Generate the world consumption chart
 plt.style.use('seaborn-v0_8-darkgrid')
@@ -45,18 +42,17 @@ fig, ax = plt.subplots(figsize=(12, 8)) # Adjusted figsize for potentially bette
 
 # Define the custom color palette
 custom_colors = ['#78143E', '#C30D61']
-num_bars = len(df_consumo_mundial)
+num_bars = len(paises)
 bar_colors = [custom_colors[i % len(custom_colors)] for i in range(num_bars)]
 
-bars = ax.barh(df_consumo_mundial['pais'], df_consumo_mundial['consumo_milhoes_hectolitros'],
-              color=bar_colors)
+bars = ax.barh(paises, consumos, color=bar_colors)
 
 ax.set_xlabel('Consumo (Milhões de Hectolitros)', fontsize=12)
 ax.set_ylabel('País', fontsize=12)
 ax.set_title('Consumo Mundial de Vinho por País (2023)', fontsize=16, fontweight='bold')
 
 # Add values at the end of the bars
-for i, v in enumerate(df_consumo_mundial['consumo_milhoes_hectolitros']):
+for i, v in enumerate(consumos):
     ax.text(v + 0.2, i, f'{v}', va='center', fontsize=10) # Adjusted offset and fontsize
 
 plt.xticks(fontsize=10)
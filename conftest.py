@@ -0,0 +1,2 @@
+# -*- coding: utf-8 -*-
+"""Configuração do pytest: a raiz do repositório entra no sys.path (import de `vitibrasil`)."""
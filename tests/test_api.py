@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from vitibrasil import api
+
+
+@pytest.fixture(scope='module')
+def servico():
+    return api.ServicoAnalise()
+
+
+@pytest.mark.parametrize('caminho, parametros', [
+    ('/top', {'produto': 'cachaca'}),
+    ('/top', {'metrica': 'peso'}),
+    ('/totais', {'metrica': 'peso'}),
+    ('/correlacao', {'inicio': '2020', 'fim': '2010'}),
+    ('/preco', {'n': 'dez'}),
+])
+def test_parametro_invalido_responde_400(servico, caminho, parametros):
+    status, _, _ = servico.responder(caminho, parametros)
+    assert status == 400
+
+
+def test_erro_interno_nao_vira_400(servico, monkeypatch):
+    def quebrado(p):
+        raise KeyError('coluna')
+
+    monkeypatch.setitem(servico.rotas, '/totais', quebrado)
+    with pytest.raises(KeyError):
+        servico.responder('/totais', {'interno': '1'})
+
+
+def test_if_none_match(servico):
+    _, _, cabecalhos = servico.responder('/top', {})
+    etag = cabecalhos['ETag']
+    for cabecalho in (etag, f'W/{etag}', f'"outra", {etag}', '*'):
+        assert servico.responder('/top', {}, cabecalho)[0] == 304
+    for cabecalho in (None, '"outra"', 'W/"outra", "mais uma"'):
+        assert servico.responder('/top', {}, cabecalho)[0] == 200
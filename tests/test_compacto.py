@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pandas as pd
+
+from vitibrasil import compacto
+
+
+def test_compactar_sem_perda():
+    casos = [
+        np.array([1.0, 2.0, 3.0]),
+        np.array([0.0, 2.0 ** 40]),
+        np.array([0.5, 1.25]),
+        np.array([123456789.5, 1.0]),
+        np.array([0.1, 2.0]),
+    ]
+    for numeros in casos:
+        compactos = compacto.compactar(numeros)
+        assert np.array_equal(compactos.astype('float64'), numeros), numeros
+
+
+def test_compactar_escolhe_o_menor_tipo():
+    assert compacto.compactar(np.array([1.0, -5.0])).dtype == np.int32
+    assert compacto.compactar(np.array([2.0 ** 40])).dtype == np.int64
+    assert compacto.compactar(np.array([0.5, 1.25])).dtype == np.float32
+    assert compacto.compactar(np.array([123456789.5])).dtype == np.float64
+
+
+def test_codificar_sentinelas():
+    valores, codigos = compacto.codificar([['10', '0', 'nd'], ['*', '+', ''], [' ND ', 'x', '3.5']])
+    assert codigos.tolist() == [
+        [compacto.PRESENTE, compacto.ZERO, compacto.ND],
+        [compacto.ASTERISCO, compacto.MAIS, compacto.AUSENTE],
+        [compacto.ND, compacto.AUSENTE, compacto.PRESENTE],
+    ]
+    assert valores.tolist() == [[10, 0, 0], [0, 0, 0], [0, 0, 3.5]]
+
+
+def test_agregar_exclui_sentinelas():
+    linhas = pd.DataFrame({'País': ['A', 'A', 'B']})
+    matriz = compacto.MatrizCompacta.de_texto([['1', 'nd'], ['2', 'nd'], ['4', '0']], linhas, [2000, 2001])
+    total = matriz.agregar(tratamento=compacto.TRATAMENTO_EXCLUIR)
+    assert total[2000] == 7 and total[2001] == 0
+    por_pais = matriz.agregar('País', tratamento=compacto.TRATAMENTO_EXCLUIR)
+    assert np.isnan(por_pais.loc['A', 2001]) and por_pais.loc['B', 2001] == 0
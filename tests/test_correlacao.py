@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pandas as pd
+import pandas.testing as pdt
+import pytest
+
+from vitibrasil.correlacao import CorrelacaoIncremental
+
+
+@pytest.fixture
+def series():
+    """Séries anuais com escalas muito diferentes e anos ausentes."""
+    rng = np.random.default_rng(42)
+    anos = np.arange(1990, 2024)
+    df = pd.DataFrame({
+        'producao': 1e9 + rng.normal(0, 1e7, len(anos)).cumsum(),
+        'vinho': rng.lognormal(15, 1, len(anos)),
+        'suco': rng.normal(1e6, 1e5, len(anos)),
+        'uva': rng.normal(0, 1, len(anos)),
+    }, index=anos)
+    df.loc[1990:1995, 'suco'] = np.nan
+    df.loc[2010, 'vinho'] = np.nan
+    return df
+
+
+def test_adicionar_ano_igual_ao_recalculo(series):
+    motor = CorrelacaoIncremental.de_dataframe(series.iloc[:10])
+    for ano, linha in series.iloc[10:].iterrows():
+        motor.adicionar_ano(ano, linha)
+    pdt.assert_frame_equal(motor.matriz(), series.corr(), rtol=1e-9)
+
+
+def test_correcao_de_ano_igual_ao_recalculo(series):
+    motor = CorrelacaoIncremental.de_dataframe(series)
+    corrigida = series.copy()
+    corrigida.loc[2000] = corrigida.loc[2000] * 1.5
+    motor.adicionar_ano(2000, corrigida.loc[2000])
+    pdt.assert_frame_equal(motor.matriz(), corrigida.corr(), rtol=1e-9)
+
+
+def test_adicionar_serie_igual_ao_recalculo(series):
+    motor = CorrelacaoIncremental.de_dataframe(series.drop(columns='uva'))
+    motor.adicionar_serie('uva', series['uva'])
+    pdt.assert_frame_equal(motor.matriz(), series.corr(), rtol=1e-9)
+
+
+def test_janelas_e_periodo_iguais_ao_recalculo(series):
+    motor = CorrelacaoIncremental.de_dataframe(series)
+    anos_finais, matrizes = motor.janelas(8)
+    assert list(anos_finais) == list(series.index[7:])
+    for ano_final, matriz in zip(anos_finais, matrizes):
+        esperado = series.loc[ano_final - 7:ano_final].corr().to_numpy()
+        np.testing.assert_allclose(matriz, esperado, rtol=1e-9, atol=1e-12)
+
+    pdt.assert_frame_equal(motor.matriz_periodo(2000, 2015), series.loc[2000:2015].corr(), rtol=1e-9)
@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pandas as pd
+
+from vitibrasil import defasagem
+
+
+def test_lag_medido_em_anos_com_lacunas():
+    # Série bienal: o alvo repete o direcionador 2 anos (uma posição) depois
+    rng = np.random.default_rng(0)
+    anos = np.arange(1990, 2030, 2)
+    driver = pd.Series(rng.normal(size=len(anos)), index=anos)
+    alvo = driver.shift(1).rename(None)
+    alvos = pd.DataFrame([alvo.to_numpy()], index=['pais'], columns=anos)
+
+    resultado = defasagem.melhor_defasagem(driver, alvos, lag_max=3)
+
+    assert resultado.loc['pais', 'melhor_lag'] == 2
+    assert np.isclose(resultado.loc['pais', 'correlacao'], 1.0)
+    # Em anos ímpares não há dado: lags ímpares não têm sobreposição
+    assert np.isnan(resultado.loc['pais', 'lag_1'])
+
+
+def test_lag_em_serie_continua():
+    rng = np.random.default_rng(1)
+    anos = np.arange(1970, 2020)
+    driver = pd.Series(rng.normal(size=len(anos)), index=anos)
+    alvos = pd.DataFrame({'a': driver.shift(3), 'b': -driver.shift(1)}).T
+
+    resultado = defasagem.melhor_defasagem(driver, alvos, lag_max=4)
+
+    assert resultado.loc['a', 'melhor_lag'] == 3
+    assert resultado.loc['b', 'melhor_lag'] == 1
+    assert np.isclose(resultado.loc['b', 'correlacao'], -1.0)
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+import shutil
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pandas.testing as pdt
+
+from vitibrasil import consulta, dados, delta, visoes
+from vitibrasil.correlacao import CorrelacaoIncremental
+
+TABELAS = {
+    'exportacao': ['produto', 'pais', 'ano'],
+    'producao': ['categoria', 'produto', 'ano'],
+    'mv_tendencia': ['produto', 'pais', 'ano'],
+    'mv_ranking': ['produto', 'janela', 'ano_fim', 'metrica', 'posicao'],
+    'mv_correlacao': ['serie_a', 'serie_b'],
+}
+
+
+def _copiar_sem_ultimo_ano(nome, destino):
+    """Copia o arquivo de `nome` para `destino` sem as colunas do último ano."""
+    config = dados.file_configs[nome]
+    with open(dados.caminho_arquivo(nome), encoding='utf-8') as f:
+        linhas = [linha.rstrip('\n').split(config['sep']) for linha in f]
+    ultimo = linhas[0][-1]
+    manter = [i for i, coluna in enumerate(linhas[0]) if coluna != ultimo]
+    with open(dados.caminho_arquivo(nome, destino), 'w', encoding='utf-8') as f:
+        for linha in linhas:
+            f.write(config['sep'].join(linha[i] for i in manter if i < len(linha)) + '\n')
+
+
+def _construir_completo(conn, base_path):
+    consulta.construir_banco(conn, base_path)
+    visoes.atualizar_visoes(conn)
+    with conn:
+        delta.atualizar_correlacao(conn, None)
+
+
+def _tabela(conn, tabela):
+    df = pd.read_sql_query(f'SELECT * FROM {tabela}', conn)
+    return df.sort_values(TABELAS[tabela]).reset_index(drop=True)
+
+
+def test_delta_igual_a_carga_completa(tmp_path):
+    truncada, completa = tmp_path / 'truncada', tmp_path / 'completa'
+    truncada.mkdir()
+    completa.mkdir()
+    for nome in dados.file_configs:
+        _copiar_sem_ultimo_ano(nome, truncada)
+        shutil.copy(dados.caminho_arquivo(nome), completa)
+
+    incremental = sqlite3.connect(tmp_path / 'incremental.db')
+    _construir_completo(incremental, str(truncada))
+    for nome in dados.file_configs:
+        shutil.copy(dados.caminho_arquivo(nome), truncada)
+    ingeridos = delta.ingerir(incremental, str(truncada))
+    assert ingeridos['producao'] == [dados.plano_leitura('producao').anos[-1]]
+    assert all(ingeridos[produto] == [2024] for produto in dados.produtos_exportacao())
+
+    referencia = sqlite3.connect(tmp_path / 'referencia.db')
+    _construir_completo(referencia, str(completa))
+    for tabela in TABELAS:
+        pdt.assert_frame_equal(_tabela(incremental, tabela), _tabela(referencia, tabela),
+                               check_dtype=False, rtol=1e-9)
+
+    motor, esperado = delta.carregar_correlacao(incremental), delta.carregar_correlacao(referencia)
+    pdt.assert_frame_equal(motor.matriz_periodo(2000, 2010), esperado.matriz_periodo(2000, 2010), rtol=1e-9)
+
+
+def test_delta_sem_arquivo_registra_e_continua(tmp_path, caplog):
+    for nome in dados.file_configs:
+        _copiar_sem_ultimo_ano(nome, tmp_path)
+    conn = sqlite3.connect(':memory:')
+    _construir_completo(conn, str(tmp_path))
+    for nome in dados.file_configs:
+        shutil.copy(dados.caminho_arquivo(nome), tmp_path)
+    (tmp_path / dados.file_configs['producao']['filename']).unlink()
+    (tmp_path / dados.file_configs['uva']['filename']).unlink()
+
+    ingeridos = delta.ingerir(conn, str(tmp_path))
+
+    assert 'producao' not in ingeridos and 'uva' not in ingeridos
+    assert ingeridos['vinho'] == [2024]
+    assert 'Producao.csv' in caplog.text and 'ExpUva.csv' in caplog.text
+
+
+def test_estado_da_correlacao_em_tabelas_numericas():
+    rng = np.random.default_rng(0)
+    series = pd.DataFrame(rng.normal(size=(12, 3)) * 1e6, index=range(2010, 2022), columns=['a', 'b', 'c'])
+    series.iloc[2, 1] = np.nan
+    motor = CorrelacaoIncremental.de_dataframe(series.iloc[:-1])
+
+    conn = sqlite3.connect(':memory:')
+    delta.gravar_correlacao(conn, motor)
+    tipos = {tipo for (tipo,) in conn.execute(
+        f"SELECT DISTINCT typeof(soma_xy) FROM {delta.TABELAS_CORRELACAO[1]}")}
+    assert tipos == {'real'}
+
+    lido = delta.carregar_correlacao(conn)
+    for m in (motor, lido):
+        m.adicionar_ano(2021, series.iloc[-1])
+    pdt.assert_frame_equal(lido.matriz(), motor.matriz())
+    pdt.assert_frame_equal(lido.matriz(), series.corr(), rtol=1e-9)
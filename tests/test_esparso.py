@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pytest
+
+from vitibrasil import dados, esparso
+
+
+@pytest.mark.parametrize('produto', ['vinho', 'espumante'])
+@pytest.mark.parametrize('linhas_por_bloco', [esparso.LINHAS_POR_BLOCO, 7])
+def test_leitura_em_blocos_igual_ao_carregador_denso(produto, linhas_por_bloco):
+    matriz = esparso.carregar_exportacao(produto, linhas_por_bloco=linhas_por_bloco)
+    referencia = esparso.MatrizEsparsa.de_longo(dados.carregar_exportacao(produto), produto)
+
+    assert list(matriz.paises) == list(referencia.paises)
+    for metrica in esparso.METRICAS:
+        denso = referencia.para_denso(metrica).reindex(columns=matriz.anos, fill_value=0.0)
+        assert np.array_equal(matriz.para_denso(metrica).to_numpy(), denso.to_numpy())
+
+
+def test_top_n_so_com_mercados_ativos():
+    matriz = esparso.carregar_exportacao('espumante')
+    top = matriz.top_n(n=500, metrica='valor', inicio=2024, fim=2024)
+    assert (top['valor'] > 0).all()
+    assert top['valor'].is_monotonic_decreasing
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+import shutil
+
+import pytest
+
+from vitibrasil import dados, pipeline
+
+
+def ler_paridade(entradas, fonte):
+    with open(fonte, encoding='utf-8') as f:
+        return {'paridade.pkl': len(f.read()) % 2}
+
+
+def descrever(entradas):
+    return {'descricao.pkl': f"paridade {entradas['paridade.pkl']}"}
+
+
+def _situacoes(relatorio):
+    return {nome: situacao for nome, (situacao, _) in relatorio.items()}
+
+
+def test_saida_igual_nao_roda_dependentes(tmp_path):
+    fonte = tmp_path / 'fonte.txt'
+    fonte.write_text('abcd', encoding='utf-8')
+    etapas = [
+        pipeline.Etapa('paridade', ler_paridade, [str(fonte)], ['paridade.pkl'], fonte=str(fonte)),
+        pipeline.Etapa('descricao', descrever, ['paridade.pkl'], ['descricao.pkl']),
+    ]
+    diretorio = str(tmp_path / 'pipeline')
+
+    assert set(_situacoes(pipeline.Pipeline(etapas, diretorio).executar()).values()) == {'executada'}
+    assert set(_situacoes(pipeline.Pipeline(etapas, diretorio).executar()).values()) == {'atual'}
+
+    # Conteúdo novo com a mesma paridade: a etapa roda, mas a seguinte continua atual
+    fonte.write_text('uvwxyz', encoding='utf-8')
+    assert _situacoes(pipeline.Pipeline(etapas, diretorio).executar()) == {
+        'paridade': 'sem mudança', 'descricao': 'atual'}
+
+    fonte.write_text('abc', encoding='utf-8')
+    assert _situacoes(pipeline.Pipeline(etapas, diretorio).executar()) == {
+        'paridade': 'executada', 'descricao': 'executada'}
+
+
+def _corrigir_ano(caminho, ano, valor):
+    """Troca o volume do primeiro país no `ano` informado."""
+    with open(caminho, encoding='utf-8') as f:
+        linhas = [linha.rstrip('\n').split('\t') for linha in f]
+    coluna = linhas[0].index(str(ano))
+    assert linhas[1][coluna] != valor
+    linhas[1][coluna] = valor
+    with open(caminho, 'w', encoding='utf-8') as f:
+        f.writelines('\t'.join(linha) + '\n' for linha in linhas)
+
+
+def test_correcao_antiga_nao_refaz_graficos(tmp_path):
+    pytest.importorskip('matplotlib')
+    base = tmp_path / 'base'
+    base.mkdir()
+    shutil.copy(dados.caminho_arquivo('suco'), base)
+    diretorio = str(tmp_path / 'pipeline')
+    alvos = ['agregados:suco', 'grafico:*:suco']
+
+    primeira = _situacoes(pipeline.Pipeline(pipeline.etapas_padrao(str(base)), diretorio).executar(alvos))
+    assert primeira['grafico:top_exportacao:suco'] == 'executada'
+
+    _corrigir_ano(dados.caminho_arquivo('suco', str(base)), 1995, '987654')
+    segunda = _situacoes(pipeline.Pipeline(pipeline.etapas_padrao(str(base)), diretorio).executar(alvos))
+
+    for etapa in ('parse:suco', 'normaliza:suco', 'cubo:suco', 'agregados:suco'):
+        assert segunda[etapa] == 'executada'
+    for grafico in pipeline.GRAFICOS_EXPORTACAO:
+        assert segunda[f'recorte:{grafico}:suco'] == 'sem mudança'
+        assert segunda[f'grafico:{grafico}:suco'] == 'atual'
@@ -7,12 +7,14 @@ Original file is located at
     https://colab.research.google.com/drive/1ff-QsAijvaZlGA-kdphm6E8t1iw6vLWb
 """
 
-pip install requests pandas lxml html5lib openpyxl
+# Dependências: pip install requests pandas lxml html5lib openpyxl
 
 import requests  # Para fazer as requisições HTTP
 import pandas as pd # Para trabalhar com tabelas (DataFrames) e extrair tabelas HTML
 import time      # Para adicionar pausas e ser gentil com o servidor
 
+from vitibrasil import metricas, rastreio  # Métricas do job (python -m vitibrasil.metricas vinicolas2.py)
+
 # Lista para armazenar os DataFrames de cada ano
 todos_os_dados = []
 
@@ -37,14 +39,19 @@ for ano in range(ano_inicio, ano_fim + 1):
         # 1. Fazer a requisição para obter o conteúdo HTML da página
         #    É importante incluir headers para simular um navegador, se necessário.
         headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3'}
-        response = requests.get(url_ano, headers=headers, timeout=30) # Timeout de 30 segundos
+        with rastreio.etapa('http_fetch', ano=ano) as etapa:
+            response = requests.get(url_ano, headers=headers, timeout=30) # Timeout de 30 segundos
+            etapa.registrar(response)
+        metricas.registrar_pagina(response)
         response.raise_for_status() # Verifica se a requisição foi bem sucedida (código 200)
 
         # 2. Usar Pandas para tentar extrair as tabelas diretamente do HTML
         #    pd.read_html é poderoso para isso. Ele retorna uma LISTA de DataFrames.
         #    Você precisará inspecionar a página para saber qual tabela na lista é a correta.
         #    Pode ser a primeira (índice 0), a segunda (índice 1), etc.
-        lista_de_tabelas = pd.read_html(response.content, encoding='utf-8') # Tente utf-8 ou latin-1 se der erro
+        with rastreio.etapa('html_parse', ano=ano) as etapa:
+            lista_de_tabelas = pd.read_html(response.content, encoding='utf-8') # Tente utf-8 ou latin-1 se der erro
+            etapa.registrar(lista_de_tabelas)
 
         # Exemplo: Supondo que a tabela de exportação seja a primeira encontrada
         if lista_de_tabelas:
@@ -119,12 +126,13 @@ else:
 
 import requests
 from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
 import pandas as pd
 import time
 import logging
 import re # Import regular expressions for cleaning
 
+from vitibrasil import metricas, rastreio
+
 # Configuração básica de logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
@@ -137,11 +145,12 @@ def create_session_with_retries():
     # status_forcelist=[500, 502, 503, 504]: Tentar novamente para erros de servidor
     # allowed_methods=None: Tenta para todos os métodos (incluindo GET)
     # Adicionado connect=5 para retentar em erros de conexão como 'Connection refused'
-    retries = Retry(total=5,
-                    backoff_factor=1,
-                    status_forcelist=[500, 502, 503, 504],
-                    connect=5, # Retenta em erros de conexão
-                    allowed_methods=None) # Use False se quiser retentar apenas em métodos idempotentes
+    # Retry que também conta cada retentativa em vitibrasil_http_retentativas_total
+    retries = metricas.retry_contado(total=5,
+                                     backoff_factor=1,
+                                     status_forcelist=[500, 502, 503, 504],
+                                     connect=5, # Retenta em erros de conexão
+                                     allowed_methods=None) # Use False se quiser retentar apenas em métodos idempotentes
     # Monta o adaptador com a estratégia de retentativas para HTTP e HTTPS
     session.mount('http://', HTTPAdapter(max_retries=retries))
     session.mount('https://', HTTPAdapter(max_retries=retries))
@@ -172,20 +181,25 @@ for ano in range(ano_inicio, ano_fim + 1):
     try:
         # 1. Fazer a requisição usando a sessão com retentativas
         headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'}
-        response = session.get(url_ano, headers=headers, timeout=30) # Usar a sessão
+        with rastreio.etapa('http_fetch', ano=ano) as etapa:
+            response = session.get(url_ano, headers=headers, timeout=30) # Usar a sessão
+            etapa.registrar(response)
+        metricas.registrar_pagina(response)
         response.raise_for_status() # Verifica erros HTTP (4xx, 5xx) após as retentativas
         response.encoding = response.apparent_encoding if response.apparent_encoding else 'latin-1'
 
         # 2. Usar Pandas para extrair a tabela de Produção
         # Tenta encontrar a tabela que contenha "Produto" no cabeçalho ou no corpo
-        try:
-             # Usar 'Produto' como critério para encontrar a tabela correta
-            lista_de_tabelas = pd.read_html(response.text, flavor='lxml', match='Produto')
-            logging.info(f"Encontrada(s) {len(lista_de_tabelas)} tabela(s) com 'Produto' para o ano {ano}.")
-        except ValueError:
-            logging.warning(f"Não foi possível encontrar tabela com 'match=Produto' para o ano {ano}. Verificando todas as tabelas.")
-            # Se match falhar, ler todas e procurar manualmente (menos eficiente)
-            lista_de_tabelas = pd.read_html(response.text, flavor='lxml')
+        with rastreio.etapa('html_parse', ano=ano) as etapa:
+            try:
+                 # Usar 'Produto' como critério para encontrar a tabela correta
+                lista_de_tabelas = pd.read_html(response.text, flavor='lxml', match='Produto')
+                logging.info(f"Encontrada(s) {len(lista_de_tabelas)} tabela(s) com 'Produto' para o ano {ano}.")
+            except ValueError:
+                logging.warning(f"Não foi possível encontrar tabela com 'match=Produto' para o ano {ano}. Verificando todas as tabelas.")
+                # Se match falhar, ler todas e procurar manualmente (menos eficiente)
+                lista_de_tabelas = pd.read_html(response.text, flavor='lxml')
+            etapa.registrar(lista_de_tabelas)
 
 
         if lista_de_tabelas:
@@ -283,7 +297,3 @@ else:
     logging.warning("Nenhum dado de produção de vinho foi coletado com sucesso.")
 
 logging.info("Processo de coleta de dados finalizado.")
-
-!python coletar_producao.py
-
-python coletar_producao.py
\ No newline at end of file
@@ -0,0 +1,7 @@
+# -*- coding: utf-8 -*-
+"""Camada de análise dos dados da Vitibrasil (Embrapa Uva e Vinho).
+
+Os módulos deste pacote carregam os arquivos de `Arquivos Bases` em tabelas
+no formato longo e expõem consultas e agregações reutilizáveis pelos
+scripts de gráficos e pelo `juan.py`.
+"""
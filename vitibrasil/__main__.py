@@ -0,0 +1,8 @@
+# -*- coding: utf-8 -*-
+"""Permite `python -m vitibrasil <subcomando>`."""
+
+import sys
+
+from vitibrasil.cli import main
+
+sys.exit(main())
@@ -0,0 +1,399 @@
+# -*- coding: utf-8 -*-
+"""API HTTP local (JSON) com as análises do juan.py, sobre dados em memória.
+
+Os arquivos são lidos uma única vez na inicialização; cada requisição só
+consulta estruturas já prontas:
+
+- somas acumuladas por ano de cada (produto, país), para que a soma de
+  qualquer janela [inicio, fim] saia da diferença de duas colunas;
+- a camada de preço (`preco.CuboPreco`);
+- o motor de correlação incremental sobre os totais anuais.
+
+As respostas ficam em um cache LRU (chave: caminho + parâmetros ordenados)
+com ETag; um `If-None-Match` que cite a ETag (em lista, fraca `W/...` ou
+`*`) devolve 304 sem corpo. Parâmetros inválidos respondem 400; qualquer
+outro erro é interno e responde 500. O cache é
+descartado quando os arquivos de origem mudam (verificado no máximo uma vez
+por `INTERVALO_VERIFICACAO` segundos, só com `stat`).
+
+Endpoints (GET):
+    /totais?metrica=volume                       totais anuais por série
+    /top?produto=vinho&inicio=2009&fim=2023&n=10&metrica=valor
+    /preco?produto=vinho&inicio=2009&fim=2023&n=10
+    /crescimento?produto=vinho&inicio=2009&fim=2023&n=10
+    /correlacao?inicio=1970&fim=2023
+    /saude                                       estado do cache (não cacheado)
+    /metrics                                     métricas no formato do Prometheus
+
+Uso:
+    python -m vitibrasil api --porta 8050
+"""
+
+import argparse
+import asyncio
+import collections
+import hashlib
+import json
+import logging
+import math
+import sys
+import time
+import urllib.parse
+
+import numpy as np
+import pandas as pd
+
+from vitibrasil import consulta, crescimento, dados, metricas
+from vitibrasil.correlacao import CorrelacaoIncremental
+from vitibrasil.preco import CuboPreco, divisao_segura
+
+HOST_PADRAO = '127.0.0.1'
+PORTA_PADRAO = 8050
+TAMANHO_CACHE = 1024
+INTERVALO_VERIFICACAO = 1.0
+MOTIVOS = {200: 'OK', 304: 'Not Modified', 400: 'Bad Request', 404: 'Not Found',
+           405: 'Method Not Allowed', 500: 'Internal Server Error'}
+
+
+class ErroParametro(ValueError):
+    """Parâmetro ausente ou inválido na requisição (resposta 400)."""
+
+
+def sem_nan(valor):
+    """Converte NaN/inf em None e escalares numpy em tipos nativos, recursivamente."""
+    if isinstance(valor, dict):
+        return {str(k): sem_nan(v) for k, v in valor.items()}
+    if isinstance(valor, (list, tuple)):
+        return [sem_nan(v) for v in valor]
+    if isinstance(valor, np.generic):
+        valor = valor.item()
+    if isinstance(valor, float) and not math.isfinite(valor):
+        return None
+    return valor
+
+
+class CacheLRU:
+    """Cache LRU de respostas prontas (corpo em bytes e ETag)."""
+
+    def __init__(self, tamanho=TAMANHO_CACHE):
+        self.tamanho = tamanho
+        self._itens = collections.OrderedDict()
+        self.acertos = 0
+        self.faltas = 0
+
+    def obter(self, chave):
+        item = self._itens.get(chave)
+        if item is None:
+            self.faltas += 1
+            return None
+        self._itens.move_to_end(chave)
+        self.acertos += 1
+        return item
+
+    def guardar(self, chave, item):
+        self._itens[chave] = item
+        self._itens.move_to_end(chave)
+        while len(self._itens) > self.tamanho:
+            self._itens.popitem(last=False)
+
+    def limpar(self):
+        self._itens.clear()
+
+    def estatisticas(self):
+        total = self.acertos + self.faltas
+        return {'itens': len(self._itens), 'tamanho': self.tamanho, 'acertos': self.acertos,
+                'faltas': self.faltas, 'taxa_acerto': self.acertos / total if total else None}
+
+
+class DadosAnalise:
+    """Estruturas em memória consultadas pelos endpoints."""
+
+    def __init__(self, base_path=None):
+        self.base_path = base_path
+        self.carregar()
+
+    def carregar(self):
+        inicio = time.perf_counter()
+        self.assinatura = consulta.assinatura_fontes(self.base_path)
+        self.cubo = dados.cubo_exportacao(dados.carregar_exportacoes(self.base_path))
+        self.producao = dados.carregar_producao(self.base_path)
+        self.anos = np.asarray(self.cubo['valor'].columns, dtype='int64')
+        self.index = self.cubo['valor'].index
+
+        # Somas acumuladas com uma coluna de zeros à esquerda: soma(a..b) = P[:, b+1] - P[:, a]
+        self.acumulados = {}
+        for metrica, matriz in self.cubo.items():
+            valores = np.nan_to_num(matriz.to_numpy(dtype='float64'))
+            self.acumulados[metrica] = np.hstack([np.zeros((len(valores), 1)), np.cumsum(valores, axis=1)])
+        produtos = self.index.get_level_values('produto')
+        self.linhas_produto = {produto: np.flatnonzero(produtos == produto) for produto in produtos.unique()}
+        self.paises = self.index.get_level_values('pais').to_numpy()
+
+        self.preco = CuboPreco.de_cubo(self.cubo)
+        self.series_anuais = self._totais_anuais()
+        self.correlacao = CorrelacaoIncremental.de_dataframe(self.series_anuais)
+        self.versao = hashlib.sha1(repr(self.assinatura).encode('utf-8')).hexdigest()[:12]
+        logging.info(f"Dados da API carregados em {(time.perf_counter() - inicio) * 1000:.0f} ms")
+
+    def _totais_anuais(self):
+        """Totais anuais (ano x série): exportação por produto e métrica e produção por categoria."""
+        series = {}
+        for metrica, matriz in self.cubo.items():
+            somas = matriz.groupby(level='produto').sum(min_count=1)
+            for produto, serie in somas.iterrows():
+                series[f'exportacao_{produto}_{metrica}'] = serie
+        producao = self.producao.groupby(['categoria', 'ano'])['volume'].sum(min_count=1).unstack('categoria')
+        for categoria in producao.columns:
+            series[f'producao_{categoria.lower()}_volume'] = producao[categoria]
+        return pd.DataFrame(series).sort_index()
+
+    def _colunas(self, inicio, fim):
+        """Posições (a, b) das somas acumuladas para a janela [inicio, fim]."""
+        a = int(np.searchsorted(self.anos, inicio, side='left'))
+        b = int(np.searchsorted(self.anos, fim, side='right'))
+        if a >= b:
+            raise ErroParametro(f"Período sem dados: {inicio}-{fim}")
+        return a, b
+
+    def _linhas(self, produto):
+        if produto not in self.linhas_produto:
+            raise ErroParametro(f"Produto desconhecido: {produto}. Disponíveis: {', '.join(self.linhas_produto)}")
+        return self.linhas_produto[produto]
+
+    def soma_janela(self, produto, inicio, fim):
+        """Volume e valor somados no período para cada país do produto (arrays)."""
+        linhas = self._linhas(produto)
+        a, b = self._colunas(inicio, fim)
+        return linhas, {metrica: acumulado[linhas, b] - acumulado[linhas, a]
+                        for metrica, acumulado in self.acumulados.items()}
+
+    def totais(self, metrica=None):
+        if metrica is not None and metrica not in self.acumulados:
+            raise ErroParametro(f"Métrica desconhecida: {metrica}")
+        series = self.series_anuais
+        colunas = [c for c in series.columns if metrica is None or c.endswith(f'_{metrica}')]
+        return {'anos': series.index.tolist(), 'series': {c: series[c].tolist() for c in colunas}}
+
+    def top(self, produto, inicio, fim, n=10, metrica='valor'):
+        if metrica not in self.acumulados:
+            raise ErroParametro(f"Métrica desconhecida: {metrica}")
+        if n < 1:
+            raise ErroParametro(f"Parâmetro 'n' deve ser positivo: {n}")
+        linhas, somas = self.soma_janela(produto, inicio, fim)
+        chave = somas[metrica]
+        # Só mercados ativos na janela, como em `visoes.rankings_janela`
+        ativos = np.flatnonzero(chave > 0)
+        if len(ativos) > n:
+            ativos = ativos[np.argpartition(-chave[ativos], n - 1)[:n]]
+        escolhidos = ativos[np.argsort(-chave[ativos], kind='stable')]
+        preco = divisao_segura(somas['valor'][escolhidos], somas['volume'][escolhidos])
+        return [{'pais': self.paises[linhas[i]], 'volume': somas['volume'][i], 'valor': somas['valor'][i],
+                 'preco_medio': p} for i, p in zip(escolhidos, preco)]
+
+    def preco_medio(self, produto, inicio, fim, n=10):
+        """Preço médio do produto no período (total e anual) e dos N maiores mercados por volume."""
+        linhas, somas = self.soma_janela(produto, inicio, fim)
+        anual = self.preco.agregar_por_ano('produto').loc[produto]
+        anual = anual[(anual.index >= inicio) & (anual.index <= fim)]
+        return {
+            'produto': produto,
+            'preco_medio': divisao_segura(somas['valor'].sum(), somas['volume'].sum()).item(),
+            'por_ano': {int(ano): valor for ano, valor in anual.items()},
+            'mercados': self.top(produto, inicio, fim, n, metrica='volume'),
+        }
+
+    def crescimento(self, produto, inicio, fim, n=10):
+        """Crescimento de volume, valor e preço entre `inicio` e `fim` dos N maiores mercados em `fim`."""
+        linhas = self._linhas(produto)
+        volume = self.cubo['volume'].iloc[linhas].droplevel('produto')
+        valor = self.cubo['valor'].iloc[linhas].droplevel('produto')
+        tabela = crescimento.metricas_crescimento(volume, valor, inicio, fim)
+        if fim in valor.columns:
+            tabela = tabela.loc[valor[fim].nlargest(n).index]
+        else:
+            tabela = tabela.head(0)
+        return [{'pais': pais, **linha} for pais, linha in tabela.to_dict('index').items()]
+
+    def correlacao_periodo(self, inicio, fim):
+        self._colunas(inicio, fim)
+        matriz = self.correlacao.matriz_periodo(inicio, fim)
+        return {'series': matriz.columns.tolist(), 'matriz': matriz.to_numpy().tolist()}
+
+
+def etag_confere(if_none_match, etag):
+    """Se o cabeçalho `If-None-Match` cita `etag` (lista separada por vírgulas, `W/` fraca ou `*`)."""
+    if not if_none_match:
+        return False
+    for candidata in if_none_match.split(','):
+        candidata = candidata.strip()
+        if candidata == '*' or candidata.removeprefix('W/') == etag:
+            return True
+    return False
+
+
+def _inteiro(parametros, nome, padrao):
+    valor = parametros.get(nome, padrao)
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        raise ErroParametro(f"Parâmetro '{nome}' deve ser inteiro: {valor!r}")
+
+
+class ServicoAnalise:
+    """Roteamento, cache de respostas e recarga dos dados."""
+
+    def __init__(self, base_path=None, tamanho_cache=TAMANHO_CACHE):
+        self.dados = DadosAnalise(base_path)
+        self.cache = CacheLRU(tamanho_cache)
+        self.requisicoes = 0
+        self._verificado_em = time.monotonic()
+        self.rotas = {
+            '/totais': self._totais,
+            '/top': self._top,
+            '/preco': self._preco,
+            '/crescimento': self._crescimento,
+            '/correlacao': self._correlacao,
+        }
+
+    def _periodo(self, parametros):
+        ultimo = int(self.dados.anos[-1])
+        fim = _inteiro(parametros, 'fim', ultimo)
+        return _inteiro(parametros, 'inicio', fim - 14), fim
+
+    def _totais(self, p):
+        return self.dados.totais(p.get('metrica'))
+
+    def _top(self, p):
+        inicio, fim = self._periodo(p)
+        return self.dados.top(p.get('produto', 'vinho'), inicio, fim, _inteiro(p, 'n', 10), p.get('metrica', 'valor'))
+
+    def _preco(self, p):
+        inicio, fim = self._periodo(p)
+        return self.dados.preco_medio(p.get('produto', 'vinho'), inicio, fim, _inteiro(p, 'n', 10))
+
+    def _crescimento(self, p):
+        inicio, fim = self._periodo(p)
+        return self.dados.crescimento(p.get('produto', 'vinho'), inicio, fim, _inteiro(p, 'n', 10))
+
+    def _correlacao(self, p):
+        return self.dados.correlacao_periodo(_inteiro(p, 'inicio', int(self.dados.anos[0])),
+                                             _inteiro(p, 'fim', int(self.dados.anos[-1])))
+
+    def verificar_fontes(self):
+        """Recarrega os dados e limpa o cache se os arquivos de origem mudaram."""
+        agora = time.monotonic()
+        if agora - self._verificado_em < INTERVALO_VERIFICACAO:
+            return
+        self._verificado_em = agora
+        if consulta.assinatura_fontes(self.dados.base_path) != self.dados.assinatura:
+            logging.info("Arquivos de origem alterados; recarregando os dados da API")
+            self.dados.carregar()
+            self.cache.limpar()
+
+    def responder(self, caminho, parametros, etag_cliente=None):
+        """Retorna (status, corpo, cabeçalhos) de uma requisição GET."""
+        self.requisicoes += 1
+        if caminho == '/saude':
+            corpo = {'versao': self.dados.versao, 'requisicoes': self.requisicoes, 'cache': self.cache.estatisticas()}
+            return 200, json.dumps(corpo).encode('utf-8'), {'Cache-Control': 'no-store'}
+        if caminho == '/metrics':
+            return 200, metricas.texto().encode('utf-8'), {'Content-Type': metricas.TIPO_CONTEUDO,
+                                                           'Cache-Control': 'no-store'}
+        if caminho not in self.rotas:
+            return 404, json.dumps({'erro': f"Endpoint desconhecido: {caminho}"}).encode('utf-8'), {}
+
+        self.verificar_fontes()
+        chave = caminho + '?' + urllib.parse.urlencode(sorted(parametros.items()))
+        item = self.cache.obter(chave)
+        origem = 'hit'
+        if item is None:
+            origem = 'miss'
+            try:
+                resultado = self.rotas[caminho](parametros)
+            except ErroParametro as e:
+                return 400, json.dumps({'erro': str(e)}, ensure_ascii=False).encode('utf-8'), {'X-Cache': origem}
+            corpo = json.dumps(sem_nan(resultado), ensure_ascii=False).encode('utf-8')
+            etag = '"' + hashlib.sha1(self.dados.versao.encode('ascii') + corpo).hexdigest()[:20] + '"'
+            item = (corpo, etag)
+            self.cache.guardar(chave, item)
+        corpo, etag = item
+        cabecalhos = {'ETag': etag, 'Cache-Control': 'no-cache', 'X-Cache': origem}
+        if etag_confere(etag_cliente, etag):
+            return 304, b'', cabecalhos
+        return 200, corpo, cabecalhos
+
+
+async def _atender(servico, leitor, escritor):
+    """Atende uma conexão HTTP/1.1 (keep-alive), uma requisição por vez."""
+    try:
+        while True:
+            linha = await leitor.readline()
+            if not linha:
+                break
+            try:
+                metodo, alvo, versao = linha.decode('latin-1').split()
+            except ValueError:
+                break
+            cabecalhos = {}
+            while True:
+                cabecalho = await leitor.readline()
+                if cabecalho in (b'\r\n', b'\n', b''):
+                    break
+                nome, _, valor = cabecalho.decode('latin-1').partition(':')
+                cabecalhos[nome.strip().lower()] = valor.strip()
+
+            url = urllib.parse.urlsplit(alvo)
+            if metodo != 'GET':
+                status, corpo, extras = 405, b'{"erro": "Use GET"}', {}
+            else:
+                parametros = dict(urllib.parse.parse_qsl(url.query))
+                try:
+                    status, corpo, extras = servico.responder(url.path, parametros, cabecalhos.get('if-none-match'))
+                except Exception as e:
+                    logging.exception("Erro ao atender %s", alvo)
+                    status, corpo, extras = 500, json.dumps({'erro': f"{type(e).__name__}: {e}"}).encode('utf-8'), {}
+
+            manter = versao == 'HTTP/1.1' and cabecalhos.get('connection', '').lower() != 'close'
+            tipo = extras.pop('Content-Type', 'application/json; charset=utf-8')
+            resposta = [f'HTTP/1.1 {status} {MOTIVOS[status]}',
+                        f'Content-Type: {tipo}',
+                        f'Content-Length: {len(corpo)}',
+                        f"Connection: {'keep-alive' if manter else 'close'}"]
+            resposta += [f'{nome}: {valor}' for nome, valor in extras.items()]
+            escritor.write(('\r\n'.join(resposta) + '\r\n\r\n').encode('latin-1') + corpo)
+            await escritor.drain()
+            if not manter:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        escritor.close()
+
+
+async def servir(servico, host=HOST_PADRAO, porta=PORTA_PADRAO):
+    servidor = await asyncio.start_server(lambda l, e: _atender(servico, l, e), host, porta, backlog=1024)
+    logging.info(f"API pronta em http://{host}:{porta}")
+    async with servidor:
+        await servidor.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='API HTTP local com as análises da Vitibrasil.')
+    parser.add_argument('--host', default=HOST_PADRAO)
+    parser.add_argument('--porta', type=int, default=PORTA_PADRAO)
+    parser.add_argument('--base', help='Pasta dos CSVs (padrão: Arquivos Bases)')
+    parser.add_argument('--cache', type=int, default=TAMANHO_CACHE, help='Respostas mantidas no cache LRU')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    metricas.ativar()
+    servico = ServicoAnalise(args.base, args.cache)
+    try:
+        asyncio.run(servir(servico, args.host, args.porta))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
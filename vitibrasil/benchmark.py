@@ -0,0 +1,404 @@
+# -*- coding: utf-8 -*-
+"""Benchmarks de carga, reformatação, agregação, ranking e renderização em bases sintéticas.
+
+O gerador escreve arquivos no mesmo layout dos de `Arquivos Bases`:
+
+- exportação (ExpVinho.csv etc.): separador tab, `Id`, `País` e cada ano
+  duas vezes no cabeçalho (volume e valor);
+- produção (Producao.csv): separador ';', `id;control;produto`, linhas de
+  categoria (sem '_' no `control`, com o total dos filhos) seguidas dos
+  produtos (`vm_Tinto`, ...);
+- sentinelas 'nd', '*' e '+' e zeros espalhados nos valores.
+
+As escalas vão do tamanho atual (~140 países, 55 anos) a 100 mil linhas e
+200+ anos. As bases geradas ficam em `cache/benchmarks/dados/` e são
+reaproveitadas entre execuções (mesma escala e semente, mesmos arquivos).
+
+Cada caso roda `--repeticoes` vezes e guarda o menor tempo e a mediana. O
+resultado vai para `cache/benchmarks/<data>-<commit>.json` e é comparado
+com o anterior, como no teste de carga:
+
+    python -m vitibrasil benchmark --escalas atual,media
+    python -m vitibrasil benchmark --escalas grande --casos load,rank --repeticoes 1
+"""
+
+import argparse
+import datetime
+import glob
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from vitibrasil import carga, compacto, crescimento, dados, visoes
+from vitibrasil.preco import CuboPreco
+
+DIRETORIO = os.path.join(dados.CACHE_PATH, 'benchmarks')
+DIRETORIO_DADOS = os.path.join(DIRETORIO, 'dados')
+ANO_INICIAL = 1970
+# (linhas por arquivo de exportação, anos)
+ESCALAS = {
+    'atual': (140, 55),
+    'media': (10_000, 100),
+    'grande': (100_000, 210),
+}
+FRACAO_SENTINELAS = 0.01
+FRACAO_ZEROS = 0.6
+CATEGORIAS_PRODUCAO = [('VINHO DE MESA', 'vm'), ('VINHO FINO DE MESA (VINIFERA)', 'vv'), ('SUCO', 'su'),
+                       ('DERIVADOS', 'de')]
+PRODUTOS_POR_CATEGORIA = 8
+LIMITE_REGRESSAO = 0.2
+
+
+# --- Gerador ---
+
+def _valores(rng, linhas, anos, escala):
+    """Matriz inteira (linhas, anos) com zeros e séries de tamanhos bem diferentes."""
+    tamanho = np.exp(rng.normal(np.log(escala), 2.0, size=(linhas, 1)))
+    tendencia = np.linspace(0.5, 1.5, anos)[None, :]
+    valores = np.rint(tamanho * tendencia * rng.lognormal(0, 0.5, size=(linhas, anos))).astype('int64')
+    valores[rng.random((linhas, anos)) < FRACAO_ZEROS] = 0
+    return valores
+
+
+def _texto_com_sentinelas(rng, valores):
+    """Converte para texto e troca uma fração das células por 'nd', '*' ou '+'."""
+    texto = valores.astype(str).astype(object)
+    marcadas = rng.random(valores.shape) < FRACAO_SENTINELAS
+    texto[marcadas] = rng.choice(list(compacto.SENTINELAS), size=int(marcadas.sum()))
+    return texto
+
+
+def _escrever(caminho, cabecalho, linhas, sep):
+    with open(caminho, 'w', encoding='utf-8', newline='\n') as f:
+        f.write(sep.join(cabecalho) + '\n')
+        f.writelines(sep.join(linha) + '\n' for linha in linhas)
+
+
+def gerar_exportacao(caminho, linhas, anos, rng):
+    """Arquivo de exportação: Id, País e pares Volume/Valor por ano, separados por tab."""
+    lista_anos = [str(ANO_INICIAL + i) for i in range(anos)]
+    volume = _valores(rng, linhas, anos, 50_000)
+    valor = np.rint(volume * rng.uniform(0.5, 6.0, size=(linhas, 1))).astype('int64')
+    intercalado = np.empty((linhas, 2 * anos), dtype=object)
+    intercalado[:, 0::2] = _texto_com_sentinelas(rng, volume)
+    intercalado[:, 1::2] = _texto_com_sentinelas(rng, valor)
+    cabecalho = ['Id', 'País'] + [ano for ano in lista_anos for _ in range(2)]
+    _escrever(caminho, cabecalho, ([str(i + 1), f'País {i + 1:06d}', *linha] for i, linha in enumerate(intercalado)),
+              '\t')
+
+
+def gerar_producao(caminho, anos, rng, produtos_por_categoria=PRODUTOS_POR_CATEGORIA):
+    """Producao.csv: categorias (total dos filhos) seguidas dos produtos `prefixo_Nome`."""
+    lista_anos = [str(ANO_INICIAL + i) for i in range(anos)]
+    linhas = []
+    for categoria, prefixo in CATEGORIAS_PRODUCAO:
+        filhos = _valores(rng, produtos_por_categoria, anos, 10_000_000)
+        linhas.append([categoria, categoria, *filhos.sum(axis=0).astype(str)])
+        texto = _texto_com_sentinelas(rng, filhos)
+        for i in range(produtos_por_categoria):
+            nome = f'Produto {i + 1}'
+            linhas.append([f'{prefixo}_{nome}', nome, *texto[i]])
+    _escrever(caminho, ['id', 'control', 'produto'] + lista_anos,
+              ([str(i + 1), *linha] for i, linha in enumerate(linhas)), ';')
+
+
+def gerar_base(linhas, anos, semente=0, diretorio=None):
+    """Gera (ou reaproveita) uma base sintética completa; retorna a pasta."""
+    diretorio = diretorio or os.path.join(DIRETORIO_DADOS, f'{linhas}x{anos}-s{semente}')
+    marcador = os.path.join(diretorio, '.completo')
+    if os.path.exists(marcador):
+        return diretorio
+    os.makedirs(diretorio, exist_ok=True)
+    rng = np.random.default_rng(semente)
+    for produto in dados.produtos_exportacao():
+        gerar_exportacao(os.path.join(diretorio, dados.file_configs[produto]['filename']), linhas, anos, rng)
+    gerar_producao(os.path.join(diretorio, dados.file_configs['producao']['filename']), anos, rng)
+    open(marcador, 'w').close()
+    return diretorio
+
+
+# --- Casos ---
+# Cada caso recebe o contexto (pasta da base e resultados de etapas anteriores)
+# e devolve uma função sem argumentos, que é a parte cronometrada.
+
+def _juan():
+    """Módulo juan.py (None se as dependências dele não estiverem instaladas)."""
+    sys.path.insert(0, dados.RAIZ)
+    try:
+        import juan
+    except ImportError:
+        return None
+    return juan
+
+
+def caso_load_exportacao(ctx):
+    return lambda: dados.carregar_exportacao('vinho', ctx['base'])
+
+
+def caso_load_compacto(ctx):
+    return lambda: compacto.carregar('vinho', ctx['base'])
+
+
+def caso_load_producao(ctx):
+    return lambda: dados.carregar_producao(ctx['base'])
+
+
+def caso_load_juan_vol_value(ctx):
+    juan = _juan()
+    if juan is None:
+        return None
+    caminho = dados.caminho_arquivo('vinho', ctx['base'])
+    return lambda: juan.load_and_agg_tab_vol_value(caminho, 'Exp Vinho Total Vol', ['Id', 'País'], '\t')
+
+
+def caso_load_ultimos_anos(ctx):
+    juan = _juan()
+    if juan is None:
+        return None
+    caminho = dados.caminho_arquivo('vinho', ctx['base'])
+    return lambda: juan.agg_last_n_years(caminho, 'Exp Vinho', ['Id', 'País'], '\t', 'vol_value', 15)
+
+
+def caso_reshape_cubo(ctx):
+    return lambda: dados.cubo_exportacao(ctx['exportacao'])
+
+
+def caso_reshape_melt(ctx):
+    """Melt + to_numeric + groupby por ano, como o agg_tab_selected_col do juan.py."""
+    texto = pd.read_csv(dados.caminho_arquivo('vinho', ctx['base']), sep='\t')
+    id_vars = ['Id', 'País']
+    colunas = list(texto.columns[len(id_vars)::2])
+
+    def executar():
+        selecionado = texto[id_vars + colunas].copy()
+        selecionado.columns = id_vars + [c.split('.')[0] for c in colunas]
+        longo = selecionado.melt(id_vars=id_vars, var_name='Year', value_name='Value')
+        longo['Year'] = pd.to_numeric(longo['Year'], errors='coerce')
+        longo['Value'] = pd.to_numeric(longo['Value'], errors='coerce').fillna(0)
+        return longo.groupby('Year')['Value'].sum()
+    return executar
+
+
+def caso_aggregate_totais(ctx):
+    return lambda: {metrica: m.groupby(level='produto').sum(min_count=1) for metrica, m in ctx['cubo'].items()}
+
+
+def caso_aggregate_preco(ctx):
+    return lambda: CuboPreco.de_cubo(ctx['cubo']).agregar(por='produto')
+
+
+def caso_aggregate_crescimento(ctx):
+    anos = ctx['cubo']['valor'].columns
+    inicio, fim = int(anos[max(len(anos) - 15, 0)]), int(anos[-1])
+    return lambda: crescimento.metricas_crescimento(ctx['cubo']['volume'], ctx['cubo']['valor'], inicio, fim)
+
+
+def caso_aggregate_expo_script(ctx):
+    """Leitura com usecols + soma das colunas + top 10, como os Grafico_Expo_*."""
+    caminho = dados.caminho_arquivo('suco', ctx['base'])
+    ultimo = ANO_INICIAL + ctx['anos'] - 1
+    inicio = ultimo - 8
+
+    def executar():
+        df = pd.read_csv(caminho, sep='\t', usecols=lambda col: not col[:4].isdigit() or int(col[:4]) >= inicio)
+        anos = [str(ano) for ano in range(inicio, ultimo + 1)]
+        volume = pd.to_numeric(df[anos].stack(), errors='coerce').unstack().sum(axis=1)
+        valor = pd.to_numeric(df[[f'{ano}.1' for ano in anos]].stack(), errors='coerce').unstack().sum(axis=1)
+        df = df.assign(Total_Kg=volume, Total_USD=valor)
+        return df.sort_values(by='Total_USD', ascending=False).head(10)
+    return executar
+
+
+def caso_rank_janelas(ctx):
+    exportacao = ctx['exportacao']
+    paises, anos, matrizes = visoes.matrizes_produto(exportacao[exportacao['produto'] == 'vinho'])
+    anos_fim = {janela: list(anos) for janela in visoes.JANELAS}
+    return lambda: visoes.calcular_rankings('vinho', paises, anos, matrizes, anos_fim)
+
+
+def caso_rank_top_periodo(ctx):
+    valor = ctx['cubo']['valor'].xs('vinho', level='produto')
+    colunas = valor.columns[-15:]
+    return lambda: valor[colunas].sum(axis=1).nlargest(10)
+
+
+def caso_render_top(ctx):
+    from vitibrasil import renderizador
+    estado = ctx.get('estado')
+    if estado is None:
+        estado = ctx['estado'] = renderizador.EstadoQuente(ctx['base'], ctx['saida'])
+    ultimo = int(estado.cubo['valor'].columns[-1])
+    return lambda: renderizador.renderizar(estado, 'top_exportacao', {'inicio': ultimo - 8, 'fim': ultimo})
+
+
+def caso_render_producao(ctx):
+    from vitibrasil import renderizador
+    estado = ctx.get('estado')
+    if estado is None:
+        estado = ctx['estado'] = renderizador.EstadoQuente(ctx['base'], ctx['saida'])
+    ultimo = int(estado.producao['ano'].max())
+    return lambda: renderizador.renderizar(estado, 'producao_top', {'inicio': ultimo - 9, 'fim': ultimo})
+
+
+# Grupo -> casos, na ordem de execução
+CASOS = {
+    'load': [('exportacao', caso_load_exportacao), ('compacto', caso_load_compacto),
+             ('producao', caso_load_producao), ('juan_vol_value', caso_load_juan_vol_value),
+             ('juan_ultimos_anos', caso_load_ultimos_anos)],
+    'reshape': [('cubo', caso_reshape_cubo), ('melt_juan', caso_reshape_melt)],
+    'aggregate': [('totais_anuais', caso_aggregate_totais), ('preco', caso_aggregate_preco),
+                  ('crescimento', caso_aggregate_crescimento), ('expo_script', caso_aggregate_expo_script)],
+    'rank': [('janelas', caso_rank_janelas), ('top_periodo', caso_rank_top_periodo)],
+    'render': [('top_exportacao', caso_render_top), ('producao_top', caso_render_producao)],
+}
+
+
+def cronometrar(funcao, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return {'min_ms': min(tempos) * 1000, 'mediana_ms': statistics.median(tempos) * 1000, 'repeticoes': repeticoes}
+
+
+def rodar_escala(nome, linhas, anos, grupos, repeticoes=3, semente=0):
+    """Gera a base da escala e roda os grupos de casos pedidos."""
+    inicio = time.perf_counter()
+    base = gerar_base(linhas, anos, semente)
+    tamanho = sum(os.path.getsize(p) for p in glob.glob(os.path.join(base, '*.csv')))
+    print(f"[{nome}] base {linhas} linhas x {anos} anos ({tamanho / 1_048_576:.1f} MB) "
+          f"pronta em {time.perf_counter() - inicio:.1f} s", file=sys.stderr)
+
+    saida = tempfile.mkdtemp(prefix='vitibrasil-bench-')
+    # Entradas dos casos que dependem de etapas anteriores (não cronometradas)
+    exportacao = dados.carregar_exportacoes(base)
+    ctx = {'base': base, 'saida': saida, 'linhas': linhas, 'anos': anos,
+           'exportacao': exportacao, 'cubo': dados.cubo_exportacao(exportacao)}
+    resultados = {}
+    try:
+        for grupo in grupos:
+            for caso, preparar in CASOS[grupo]:
+                chave = f'{grupo}.{caso}'
+                funcao = preparar(ctx)
+                if funcao is None:
+                    resultados[chave] = {'indisponivel': True}
+                    print(f"[{nome}] {chave:<28} indisponível (dependência ausente)", file=sys.stderr)
+                    continue
+                resultados[chave] = cronometrar(funcao, repeticoes)
+                print(f"[{nome}] {chave:<28} {resultados[chave]['min_ms']:>10.1f} ms", file=sys.stderr)
+    finally:
+        shutil.rmtree(saida, ignore_errors=True)
+    return {'linhas': linhas, 'anos': anos, 'bytes_entrada': tamanho, 'casos': resultados}
+
+
+def ambiente():
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'plataforma': platform.platform(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def ultimo_resultado(diretorio=DIRETORIO):
+    caminhos = sorted(glob.glob(os.path.join(diretorio, '*.json')))
+    if not caminhos:
+        return None
+    with open(caminhos[-1], encoding='utf-8') as f:
+        return json.load(f)
+
+
+def salvar(resultado, diretorio=DIRETORIO):
+    os.makedirs(diretorio, exist_ok=True)
+    carimbo = datetime.datetime.now().strftime('%Y%m%d-%H%M%S')
+    caminho = os.path.join(diretorio, f"{carimbo}-{resultado['commit'] or 'sem-commit'}.json")
+    with open(caminho, 'w', encoding='utf-8') as f:
+        json.dump(resultado, f, ensure_ascii=False, indent=2)
+    return caminho
+
+
+def comparar(atual, anterior, limite=LIMITE_REGRESSAO):
+    """Linhas (escala, caso, antes, depois, variação, regressão?) dos casos presentes nos dois."""
+    linhas = []
+    for escala, resultado in atual['escalas'].items():
+        antes = anterior.get('escalas', {}).get(escala)
+        if not antes or (antes['linhas'], antes['anos']) != (resultado['linhas'], resultado['anos']):
+            continue
+        for caso, medida in resultado['casos'].items():
+            referencia = antes['casos'].get(caso, {})
+            if 'min_ms' not in medida or 'min_ms' not in referencia:
+                continue
+            variacao = medida['min_ms'] / referencia['min_ms'] - 1
+            linhas.append((escala, caso, referencia['min_ms'], medida['min_ms'], variacao, variacao > limite))
+    return linhas
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmarks em bases sintéticas no formato da Embrapa.')
+    parser.add_argument('--escalas', default='atual,media',
+                        help=f"Escalas separadas por vírgula ({', '.join(ESCALAS)}) ou LINHASxANOS (ex.: 50000x150)")
+    parser.add_argument('--casos', default=','.join(CASOS), help=f"Grupos de casos ({', '.join(CASOS)})")
+    parser.add_argument('--repeticoes', type=int, default=3)
+    parser.add_argument('--semente', type=int, default=0)
+    parser.add_argument('--saida', default=DIRETORIO, help='Pasta dos resultados')
+    parser.add_argument('--comparar', metavar='JSON', help='Resultado de referência (padrão: o último da pasta)')
+    parser.add_argument('--limite', type=float, default=LIMITE_REGRESSAO, help='Piora relativa tolerada')
+    parser.add_argument('--estrito', action='store_true', help='Sai com código 1 se houver regressão')
+    args = parser.parse_args(argv)
+
+    grupos = [g for g in args.casos.split(',') if g]
+    desconhecidos = [g for g in grupos if g not in CASOS]
+    if desconhecidos:
+        parser.error(f"Grupos desconhecidos: {', '.join(desconhecidos)}")
+    os.environ.setdefault('MPLBACKEND', 'Agg')
+
+    escalas = {}
+    for nome in args.escalas.split(','):
+        if nome in ESCALAS:
+            linhas, anos = ESCALAS[nome]
+        else:
+            try:
+                linhas, anos = (int(parte) for parte in nome.lower().split('x'))
+            except ValueError:
+                parser.error(f"Escala inválida: {nome}")
+        escalas[nome] = rodar_escala(nome, linhas, anos, grupos, args.repeticoes, args.semente)
+
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as f:
+            anterior = json.load(f)
+    else:
+        anterior = ultimo_resultado(args.saida)
+    resultado = {
+        'gerado_em': datetime.datetime.now().isoformat(timespec='seconds'),
+        'commit': carga.commit_atual(),
+        'ambiente': ambiente(),
+        'repeticoes': args.repeticoes,
+        'escalas': escalas,
+    }
+    caminho = salvar(resultado, args.saida)
+
+    regressoes = []
+    if anterior:
+        print(f"\nComparado com {anterior.get('gerado_em')} (commit {anterior.get('commit')}):")
+        print(f"{'escala':<10}{'caso':<30}{'antes ms':>11}{'agora ms':>11}{'variação':>10}")
+        for escala, caso, antes, agora, variacao, regressao in comparar(resultado, anterior, args.limite):
+            marca = '  REGRESSÃO' if regressao else ''
+            print(f"{escala:<10}{caso:<30}{antes:>11.1f}{agora:>11.1f}{variacao:>+10.1%}{marca}")
+            if regressao:
+                regressoes.append((escala, caso))
+    print(f"\nResultado gravado em {caminho}")
+    return 1 if args.estrito and regressoes else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
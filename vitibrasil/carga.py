@@ -0,0 +1,370 @@
+# -*- coding: utf-8 -*-
+"""Teste de carga da API de análises (`api.py`) e do daemon de gráficos (`renderizador.py`).
+
+Clientes concorrentes (asyncio, conexões persistentes) repetem uma mistura
+realista de consultas durante um tempo fixo:
+
+- API: top mercados em janelas aleatórias, preço e crescimento de um
+  produto, correlação em um período e totais anuais;
+- renderizador: top de exportação em janelas aleatórias, tendência de
+  países sorteados e mapas de produção por estado de anos sorteados (com
+  números por estado gerados a partir dos de 2024). Se o daemon não tem
+  geopandas ou a geometria, os mapas saem da mistura com um aviso.
+
+O sorteio usa uma semente fixa, então duas execuções pedem a mesma
+sequência. O relatório (vazão, percentis de latência, taxa de erro e taxa
+de acerto do cache, no total e por tipo de consulta) é gravado em
+`cache/carga/` com o commit atual e a configuração da rodada, e comparado
+com o último relatório de mesma configuração (duração, aquecimento,
+concorrência, alvos e semente); uma piora acima de `--limite` aparece como
+regressão (`--estrito` sai com 1).
+
+    python -m vitibrasil carga --api 127.0.0.1:8050 --duracao 10
+    python -m vitibrasil carga --render cache/render.sock --concorrencia-render 2
+"""
+
+import argparse
+import asyncio
+import datetime
+import glob
+import json
+import logging
+import os
+import random
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from vitibrasil import dados
+
+DIRETORIO_RELATORIOS = os.path.join(dados.CACHE_PATH, 'carga')
+ANOS = (1970, 2024)
+PAISES_TENDENCIA = ['Paraguai', 'Estados Unidos', 'China', 'Rússia', 'Japão', 'Haiti', 'Uruguai', 'Reino Unido']
+PERCENTIS = (50, 90, 95, 99)
+# Piora relativa tolerada antes de apontar regressão (latência maior ou vazão menor)
+LIMITE_REGRESSAO = 0.2
+# Parâmetros que precisam coincidir para dois relatórios serem comparáveis
+CONFIGURACAO_COMPARAVEL = ('duracao', 'aquecimento', 'concorrencia_api', 'concorrencia_render', 'semente', 'mapas')
+# Anos sorteados para os mapas de produção por estado
+ANOS_MAPA = (2000, 2024)
+
+
+def _janela(rng, anos=ANOS, minimo=1, maximo=20):
+    fim = rng.randint(anos[0] + minimo - 1, anos[1])
+    inicio = max(anos[0], fim - rng.randint(minimo, maximo) + 1)
+    return inicio, fim
+
+
+def pedido_api(rng, produtos):
+    """Sorteia uma consulta da API: (rótulo, caminho com parâmetros)."""
+    produto = rng.choice(produtos)
+    inicio, fim = _janela(rng)
+    tipo = rng.choices(['top', 'preco', 'crescimento', 'correlacao', 'totais'], weights=[50, 15, 15, 10, 10])[0]
+    if tipo == 'top':
+        metrica = rng.choice(['valor', 'volume'])
+        return tipo, f'/top?produto={produto}&inicio={inicio}&fim={fim}&n={rng.choice([5, 10])}&metrica={metrica}'
+    if tipo in ('preco', 'crescimento'):
+        return tipo, f'/{tipo}?produto={produto}&inicio={inicio}&fim={fim}'
+    if tipo == 'correlacao':
+        return tipo, f'/correlacao?inicio={inicio}&fim={fim}'
+    return tipo, f"/totais?metrica={rng.choice(['volume', 'valor'])}"
+
+
+def pedido_render(rng, produtos, mapas=True):
+    """Sorteia um pedido ao renderizador: (rótulo, pedido JSON)."""
+    from vitibrasil.renderizador import PRODUCAO_ESTADOS_2024
+    produto = rng.choice(produtos)
+    inicio, fim = _janela(rng, minimo=3, maximo=15)
+    tipo = rng.choices(['top_exportacao', 'tendencia_exportacao', 'mapa_producao'],
+                       weights=[50, 30, 20 if mapas else 0])[0]
+    if tipo == 'top_exportacao':
+        return tipo, {'grafico': tipo, 'parametros': {'produto': produto, 'inicio': inicio, 'fim': fim}}
+    if tipo == 'mapa_producao':
+        ano = rng.randint(*ANOS_MAPA)
+        # Cada ano sorteado tem números próprios: o pedido não cai no arquivo já gravado
+        producao = {uf: round(toneladas * rng.uniform(0.5, 1.5)) for uf, toneladas in PRODUCAO_ESTADOS_2024.items()}
+        return tipo, {'grafico': tipo, 'parametros': {'ano': ano, 'producao_estados': producao}}
+    paises = rng.sample(PAISES_TENDENCIA, rng.randint(1, 4))
+    return 'tendencia_exportacao', {'grafico': 'tendencia_exportacao',
+                                    'parametros': {'produto': produto, 'paises': paises, 'inicio': inicio, 'fim': fim}}
+
+
+async def _ler_resposta_http(leitor):
+    """Lê uma resposta HTTP/1.1 com Content-Length; retorna (status, cabeçalhos)."""
+    cabecalho = await leitor.readuntil(b'\r\n\r\n')
+    linhas = cabecalho.decode('latin-1').split('\r\n')
+    status = int(linhas[0].split()[1])
+    cabecalhos = {}
+    for linha in linhas[1:]:
+        nome, _, valor = linha.partition(':')
+        if nome:
+            cabecalhos[nome.strip().lower()] = valor.strip()
+    await leitor.readexactly(int(cabecalhos.get('content-length', 0)))
+    return status, cabecalhos
+
+
+async def cliente_api(host, porta, rng, produtos, ate, resultados):
+    """Um cliente com conexão persistente fazendo consultas até o instante `ate`."""
+    leitor = escritor = None
+    while time.perf_counter() < ate:
+        rotulo, caminho = pedido_api(rng, produtos)
+        inicio = time.perf_counter()
+        try:
+            if escritor is None:
+                leitor, escritor = await asyncio.open_connection(host, porta)
+            escritor.write(f'GET {caminho} HTTP/1.1\r\nHost: {host}\r\n\r\n'.encode('ascii'))
+            await escritor.drain()
+            status, cabecalhos = await _ler_resposta_http(leitor)
+            acerto = cabecalhos.get('x-cache')
+            resultados.append(('api', rotulo, time.perf_counter() - inicio, status < 400,
+                               None if acerto is None else acerto == 'hit'))
+        except (OSError, asyncio.IncompleteReadError, ValueError):
+            resultados.append(('api', rotulo, time.perf_counter() - inicio, False, None))
+            escritor = None
+    if escritor is not None:
+        escritor.close()
+
+
+async def cliente_render(caminho_socket, rng, produtos, ate, resultados, mapas=True):
+    """Um cliente do renderizador (linha JSON por pedido) até o instante `ate`."""
+    leitor = escritor = None
+    while time.perf_counter() < ate:
+        rotulo, pedido = pedido_render(rng, produtos, mapas)
+        inicio = time.perf_counter()
+        try:
+            if escritor is None:
+                leitor, escritor = await asyncio.open_unix_connection(caminho_socket)
+            escritor.write((json.dumps(pedido, ensure_ascii=False) + '\n').encode('utf-8'))
+            await escritor.drain()
+            resposta = json.loads(await leitor.readline())
+            resultados.append(('render', rotulo, time.perf_counter() - inicio, bool(resposta.get('ok')), None))
+        except (OSError, ValueError):
+            resultados.append(('render', rotulo, time.perf_counter() - inicio, False, None))
+            escritor = None
+    if escritor is not None:
+        escritor.close()
+
+
+def resumir(latencias, oks, acertos, duracao):
+    """Vazão, percentis de latência (ms), taxa de erro e de acerto do cache de um grupo."""
+    latencias = np.asarray(latencias) * 1000
+    acertos = [a for a in acertos if a is not None]
+    resumo = {
+        'requisicoes': int(len(latencias)),
+        'vazao_rps': len(latencias) / duracao if duracao else None,
+        'taxa_erro': 1 - sum(oks) / len(oks) if oks else None,
+        'taxa_acerto_cache': sum(acertos) / len(acertos) if acertos else None,
+        'latencia_media_ms': float(latencias.mean()) if len(latencias) else None,
+    }
+    for p in PERCENTIS:
+        resumo[f'p{p}_ms'] = float(np.percentile(latencias, p)) if len(latencias) else None
+    return resumo
+
+
+def agrupar(resultados, duracao):
+    """Resumo por alvo ('api', 'render') e, dentro dele, por tipo de consulta."""
+    relatorio = {}
+    for alvo in sorted({r[0] for r in resultados}):
+        do_alvo = [r for r in resultados if r[0] == alvo]
+        rotulos = sorted({r[1] for r in do_alvo})
+        relatorio[alvo] = resumir([r[2] for r in do_alvo], [r[3] for r in do_alvo], [r[4] for r in do_alvo], duracao)
+        relatorio[alvo]['por_tipo'] = {}
+        for rotulo in rotulos:
+            grupo = [r for r in do_alvo if r[1] == rotulo]
+            relatorio[alvo]['por_tipo'][rotulo] = resumir(
+                [r[2] for r in grupo], [r[3] for r in grupo], [r[4] for r in grupo], duracao)
+    return relatorio
+
+
+def commit_atual():
+    """Hash curto do commit (None fora de um repositório git)."""
+    try:
+        saida = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=dados.RAIZ,
+                               capture_output=True, text=True, timeout=5)
+        return saida.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def mapas_disponiveis(caminho_socket):
+    """Pergunta ao daemon se o mapa de produção está disponível (geopandas e geometria)."""
+    from vitibrasil import renderizador
+    with renderizador.Cliente(caminho_socket) as cliente:
+        resposta = cliente.pedir({'comando': 'listar'})
+    return 'mapa_producao' in resposta.get('graficos', {}) and \
+        'mapa_producao' not in resposta.get('indisponiveis', [])
+
+
+async def executar(api=None, render=None, duracao=10.0, aquecimento=1.0,
+                   concorrencia_api=50, concorrencia_render=2, semente=42, mapas=True):
+    """Roda a carga configurada e retorna os resultados brutos (após o aquecimento)."""
+    produtos = dados.produtos_exportacao()
+
+    async def rodada(segundos, semente_rodada):
+        resultados = []
+        ate = time.perf_counter() + segundos
+        tarefas = []
+        if api:
+            host, porta = api
+            tarefas += [cliente_api(host, porta, random.Random(semente_rodada + i), produtos, ate, resultados)
+                        for i in range(concorrencia_api)]
+        if render:
+            tarefas += [cliente_render(render, random.Random(semente_rodada + 10_000 + i), produtos, ate, resultados,
+                                       mapas)
+                        for i in range(concorrencia_render)]
+        await asyncio.gather(*tarefas)
+        return resultados
+
+    if aquecimento > 0:
+        await rodada(aquecimento, semente + 1_000_000)
+    inicio = time.perf_counter()
+    resultados = await rodada(duracao, semente)
+    return resultados, time.perf_counter() - inicio
+
+
+def relatorio_carga(resultados, duracao, configuracao):
+    return {
+        'gerado_em': datetime.datetime.now().isoformat(timespec='seconds'),
+        'commit': commit_atual(),
+        'configuracao': configuracao,
+        'duracao_s': duracao,
+        'alvos': agrupar(resultados, duracao),
+    }
+
+
+def configuracao_comparavel(relatorio):
+    """Parâmetros da rodada que afetam as medidas (os endereços só contam como alvo presente)."""
+    configuracao = relatorio.get('configuracao') or {}
+    comparavel = {chave: configuracao.get(chave) for chave in CONFIGURACAO_COMPARAVEL}
+    comparavel['alvos'] = [alvo for alvo in ('api', 'render') if configuracao.get(alvo)]
+    return comparavel
+
+
+def diferencas_configuracao(atual, anterior):
+    """Parâmetros que diferem entre os dois relatórios ('chave: antes -> depois')."""
+    depois, antes = configuracao_comparavel(atual), configuracao_comparavel(anterior)
+    return [f"{chave}: {antes[chave]} -> {depois[chave]}" for chave in depois if antes[chave] != depois[chave]]
+
+
+def ultimo_relatorio(diretorio=DIRETORIO_RELATORIOS, compativel_com=None):
+    """Relatório mais recente da pasta; com `compativel_com`, o mais recente de mesma configuração."""
+    for caminho in sorted(glob.glob(os.path.join(diretorio, '*.json')), reverse=True):
+        with open(caminho, encoding='utf-8') as f:
+            relatorio = json.load(f)
+        if compativel_com is None or not diferencas_configuracao(compativel_com, relatorio):
+            return relatorio
+    return None
+
+
+def salvar(relatorio, diretorio=DIRETORIO_RELATORIOS):
+    os.makedirs(diretorio, exist_ok=True)
+    carimbo = datetime.datetime.now().strftime('%Y%m%d-%H%M%S')
+    caminho = os.path.join(diretorio, f"{carimbo}-{relatorio['commit'] or 'sem-commit'}.json")
+    with open(caminho, 'w', encoding='utf-8') as f:
+        json.dump(relatorio, f, ensure_ascii=False, indent=2)
+    return caminho
+
+
+def comparar(atual, anterior, limite=LIMITE_REGRESSAO):
+    """Regressões de `atual` em relação a `anterior` (latências p50/p99, vazão e erros).
+
+    Relatórios de configurações diferentes não são comparados: `ValueError`.
+    """
+    diferencas = diferencas_configuracao(atual, anterior)
+    if diferencas:
+        raise ValueError(f"Configuração diferente da referência ({'; '.join(diferencas)})")
+    regressoes = []
+    for alvo, resumo in atual['alvos'].items():
+        antes = anterior.get('alvos', {}).get(alvo)
+        if not antes:
+            continue
+        for chave in ('p50_ms', 'p99_ms'):
+            if antes.get(chave) and resumo.get(chave) and resumo[chave] > antes[chave] * (1 + limite):
+                regressoes.append(f"{alvo}: {chave} {antes[chave]:.2f} -> {resumo[chave]:.2f}")
+        if antes.get('vazao_rps') and resumo.get('vazao_rps') is not None \
+                and resumo['vazao_rps'] < antes['vazao_rps'] * (1 - limite):
+            regressoes.append(f"{alvo}: vazao_rps {antes['vazao_rps']:.1f} -> {resumo['vazao_rps']:.1f}")
+        if (resumo.get('taxa_erro') or 0) > (antes.get('taxa_erro') or 0):
+            regressoes.append(f"{alvo}: taxa_erro {antes.get('taxa_erro') or 0:.4f} -> {resumo['taxa_erro']:.4f}")
+    return regressoes
+
+
+def _formatar(valor, formato):
+    return '-' if valor is None else format(valor, formato)
+
+
+def imprimir(relatorio, anterior=None):
+    print(f"{'alvo/tipo':<30}{'req':>8}{'rps':>10}{'p50':>9}{'p90':>9}{'p99':>9}{'erro':>8}{'cache':>8}")
+    for alvo, resumo in relatorio['alvos'].items():
+        linhas = [(alvo, resumo)] + [(f'  {tipo}', r) for tipo, r in resumo['por_tipo'].items()]
+        for nome, r in linhas:
+            print(f"{nome:<30}{r['requisicoes']:>8}{_formatar(r['vazao_rps'], '.1f'):>10}"
+                  f"{_formatar(r['p50_ms'], '.2f'):>9}{_formatar(r['p90_ms'], '.2f'):>9}"
+                  f"{_formatar(r['p99_ms'], '.2f'):>9}{_formatar(r['taxa_erro'], '.2%'):>8}"
+                  f"{_formatar(r['taxa_acerto_cache'], '.0%'):>8}")
+    if anterior is not None:
+        print(f"\nComparado com {anterior.get('gerado_em')} (commit {anterior.get('commit')}):")
+        for alvo, resumo in relatorio['alvos'].items():
+            antes = anterior.get('alvos', {}).get(alvo)
+            if antes:
+                print(f"  {alvo}: p50 {_formatar(antes['p50_ms'], '.2f')} -> {_formatar(resumo['p50_ms'], '.2f')} ms, "
+                      f"p99 {_formatar(antes['p99_ms'], '.2f')} -> {_formatar(resumo['p99_ms'], '.2f')} ms, "
+                      f"rps {_formatar(antes['vazao_rps'], '.1f')} -> {_formatar(resumo['vazao_rps'], '.1f')}")
+
+
+def _endereco(texto):
+    host, _, porta = texto.rpartition(':')
+    return host or '127.0.0.1', int(porta)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Teste de carga da API de análises e do renderizador.')
+    parser.add_argument('--api', metavar='HOST:PORTA', help='Endereço da API (ex.: 127.0.0.1:8050)')
+    parser.add_argument('--render', metavar='SOCKET', help='Socket do renderizador (ex.: cache/render.sock)')
+    parser.add_argument('--duracao', type=float, default=10.0, help='Segundos de medição')
+    parser.add_argument('--aquecimento', type=float, default=1.0, help='Segundos descartados no início')
+    parser.add_argument('--concorrencia-api', type=int, default=50)
+    parser.add_argument('--concorrencia-render', type=int, default=2)
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--saida', default=DIRETORIO_RELATORIOS, help='Pasta dos relatórios')
+    parser.add_argument('--comparar', metavar='JSON', help='Relatório de referência (padrão: o último da pasta)')
+    parser.add_argument('--limite', type=float, default=LIMITE_REGRESSAO, help='Piora relativa tolerada')
+    parser.add_argument('--estrito', action='store_true', help='Sai com código 1 se houver regressão')
+    args = parser.parse_args(argv)
+    if not args.api and not args.render:
+        parser.error('Informe --api e/ou --render')
+
+    mapas = bool(args.render) and mapas_disponiveis(args.render)
+    if args.render and not mapas:
+        logging.warning("Renderizador sem geopandas ou sem brazil_states.geojson: "
+                        "pedidos de 'mapa_producao' ficam fora da mistura")
+    configuracao = {chave: getattr(args, chave) for chave in
+                    ('api', 'render', 'duracao', 'aquecimento', 'concorrencia_api', 'concorrencia_render', 'semente')}
+    configuracao['mapas'] = mapas
+    resultados, duracao = asyncio.run(executar(
+        _endereco(args.api) if args.api else None, args.render, args.duracao, args.aquecimento,
+        args.concorrencia_api, args.concorrencia_render, args.semente, mapas))
+
+    relatorio = relatorio_carga(resultados, duracao, configuracao)
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as f:
+            anterior = json.load(f)
+    else:
+        anterior = ultimo_relatorio(args.saida, compativel_com=relatorio)
+    caminho = salvar(relatorio, args.saida)
+    diferencas = diferencas_configuracao(relatorio, anterior) if anterior else []
+    if diferencas:
+        print(f"Referência com outra configuração; comparação recusada: {'; '.join(diferencas)}\n")
+        anterior = None
+    imprimir(relatorio, anterior)
+    regressoes = comparar(relatorio, anterior, args.limite) if anterior else []
+    for regressao in regressoes:
+        print(f"REGRESSÃO {regressao}")
+    print(f"\nRelatório gravado em {caminho}")
+    return 1 if args.estrito and regressoes else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
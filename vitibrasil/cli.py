@@ -0,0 +1,234 @@
+# -*- coding: utf-8 -*-
+"""Ponto de entrada único de linha de comando (`python -m vitibrasil ...`).
+
+Este módulo só importa a biblioteca padrão: pandas, matplotlib, geopandas,
+scipy etc. são importados pelo subcomando que de fato precisa deles. O
+backend Agg do matplotlib é escolhido antes de qualquer import (variável
+MPLBACKEND), então nenhum subcomando carrega toolkits de janela.
+
+    python -m vitibrasil graficos                 # lista os scripts de gráficos
+    python -m vitibrasil grafico ajuste_cor       # roda Gráficos/ajuste_cor.py
+    python -m vitibrasil grafico grafico_expo_suco --salvar saida/
+    python -m vitibrasil consulta --top-mercados vinho --inicio 2009 --fim 2023
+    python -m vitibrasil --profile-startup grafico teste
+    python -m vitibrasil --rastrear cache/rastreio.json relatorio
+    python -m vitibrasil --metricas cache/vitibrasil.prom grafico grafico_producao --salvar saida/
+
+Com `--profile-startup`, o tempo gasto em cada import de primeiro nível é
+medido e impresso ao final, junto com o tempo até o subcomando começar.
+Com `--rastrear`, cada etapa (leitura, melt, groupby, render, savefig...) é
+medida por `vitibrasil.rastreio` e o rastreio é gravado em JSON; com
+`--metricas`, as métricas do Prometheus são gravadas ao final (textfile).
+"""
+
+import argparse
+import builtins
+import glob
+import os
+import runpy
+import sys
+import time
+import unicodedata
+
+_INICIO = time.perf_counter()
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DIRETORIO_GRAFICOS = os.path.join(RAIZ, 'Gráficos')
+# Scripts da raiz que geram gráficos (os da pasta Gráficos entram todos)
+SCRIPTS_RAIZ = ['vinicolas_brasileiras.py']
+
+# Subcomandos delegados ao `main(argv)` de um módulo, importado só quando usado
+MODULOS = {
+    'consulta': ('vitibrasil.consulta', 'Consultas SQL sobre a base normalizada'),
+    'visoes': ('vitibrasil.visoes', 'Atualiza as visões materializadas de rankings'),
+    'qualidade': ('vitibrasil.qualidade', 'Perfil de qualidade dos arquivos de entrada'),
+    'api': ('vitibrasil.api', 'API HTTP local (JSON) com as análises'),
+    'renderizador': ('vitibrasil.renderizador', 'Daemon de renderização de gráficos (socket Unix)'),
+    'carga': ('vitibrasil.carga', 'Teste de carga da API e do renderizador'),
+    'benchmark': ('vitibrasil.benchmark', 'Benchmarks em bases sintéticas (carga, agregação, ranking, gráficos)'),
+    'pipeline': ('vitibrasil.pipeline', 'Pipeline incremental (só refaz as etapas cujas entradas mudaram)'),
+    'vigiar': ('vitibrasil.vigia', 'Modo vigia: refaz só os dados e gráficos afetados por arquivos alterados'),
+    'delta': ('vitibrasil.delta', 'Acrescenta ao banco e às visões só os anos novos dos arquivos'),
+    'parquet': ('vitibrasil.parquet', 'Conjunto canônico (formato longo) em Parquet particionado por produto e ano'),
+}
+
+
+class PerfilImports:
+    """Mede o tempo de cada import de primeiro nível (inclui os imports que ele dispara)."""
+
+    def __init__(self):
+        self.tempos = {}
+        self._profundidade = 0
+        self._original = None
+
+    def __enter__(self):
+        self._original = builtins.__import__
+        builtins.__import__ = self._importar
+        return self
+
+    def __exit__(self, *exc):
+        builtins.__import__ = self._original
+
+    def _importar(self, name, globals=None, locals=None, fromlist=(), level=0):
+        if self._profundidade or level or name.split('.')[0] in sys.modules:
+            return self._original(name, globals, locals, fromlist, level)
+        self._profundidade += 1
+        inicio = time.perf_counter()
+        try:
+            return self._original(name, globals, locals, fromlist, level)
+        finally:
+            self._profundidade -= 1
+            raiz = name.split('.')[0]
+            self.tempos[raiz] = self.tempos.get(raiz, 0.0) + time.perf_counter() - inicio
+
+    def imprimir(self, inicio_subcomando, fim):
+        print("\n--- Perfil de inicialização ---", file=sys.stderr)
+        print(f"{'módulo':<28}{'ms':>10}", file=sys.stderr)
+        for modulo, segundos in sorted(self.tempos.items(), key=lambda item: -item[1]):
+            print(f"{modulo:<28}{segundos * 1000:>10.1f}", file=sys.stderr)
+        print(f"{'imports (total)':<28}{sum(self.tempos.values()) * 1000:>10.1f}", file=sys.stderr)
+        print(f"{'até o subcomando':<28}{(inicio_subcomando - _INICIO) * 1000:>10.1f}", file=sys.stderr)
+        print(f"{'execução total':<28}{(fim - _INICIO) * 1000:>10.1f}", file=sys.stderr)
+
+
+def normalizar(nome):
+    """Nome de script sem acentos, extensão nem maiúsculas ('Gráfico_Expo_Vinhos.py' -> 'grafico_expo_vinhos')."""
+    nome = os.path.splitext(os.path.basename(nome))[0]
+    sem_acentos = unicodedata.normalize('NFKD', nome).encode('ascii', 'ignore').decode('ascii')
+    return sem_acentos.lower()
+
+
+def scripts_graficos():
+    """Scripts de gráficos disponíveis: nome normalizado -> caminho."""
+    caminhos = sorted(glob.glob(os.path.join(DIRETORIO_GRAFICOS, '*.py')))
+    caminhos += [os.path.join(RAIZ, nome) for nome in SCRIPTS_RAIZ if os.path.exists(os.path.join(RAIZ, nome))]
+    return {normalizar(caminho): caminho for caminho in caminhos}
+
+
+def salvar_figuras(diretorio, prefixo):
+    """Grava as figuras que o script deixou abertas (plt.show() não faz nada no Agg)."""
+    if 'matplotlib.pyplot' not in sys.modules:
+        return []
+    import matplotlib.pyplot as plt
+    os.makedirs(diretorio, exist_ok=True)
+    caminhos = []
+    for numero in plt.get_fignums():
+        caminho = os.path.join(diretorio, f'{prefixo}_{numero}.png')
+        plt.figure(numero).savefig(caminho, dpi=150, bbox_inches='tight')
+        caminhos.append(caminho)
+    plt.close('all')
+    return caminhos
+
+
+def _contar_grafico(nome, resultado):
+    """Conta o script de gráfico nas métricas, se elas já foram carregadas (--metricas)."""
+    if 'vitibrasil.metricas' in sys.modules:
+        sys.modules['vitibrasil.metricas'].GRAFICOS.inc(grafico=normalizar(nome), resultado=resultado)
+
+
+def rodar_grafico(nome, salvar=None):
+    """Executa um script de gráfico como `__main__`, com o backend Agg."""
+    scripts = scripts_graficos()
+    caminho = scripts.get(normalizar(nome))
+    if caminho is None:
+        print(f"Gráfico desconhecido: {nome}. Disponíveis: {', '.join(scripts)}", file=sys.stderr)
+        return 2
+    try:
+        runpy.run_path(caminho, run_name='__main__')
+    except Exception:
+        _contar_grafico(nome, 'erro')
+        raise
+    _contar_grafico(nome, 'ok')
+    if salvar:
+        for arquivo in salvar_figuras(salvar, normalizar(nome)):
+            print(f"Figura salva em {arquivo}")
+    return 0
+
+
+def rodar_relatorio(base_path=None):
+    """Relatório completo do juan.py em uma única sessão."""
+    sys.path.insert(0, RAIZ)
+    import juan
+    sessao = juan.SessaoAnalise(base_path=base_path) if base_path else juan.SessaoAnalise()
+    sessao.relatorio_completo()
+    return 0
+
+
+def criar_parser():
+    parser = argparse.ArgumentParser(prog='python -m vitibrasil', description="Análises e gráficos da Vitibrasil.")
+    parser.add_argument('--profile-startup', action='store_true',
+                        help="Mede o custo dos imports e o tempo até o subcomando começar")
+    parser.add_argument('--rastrear', metavar='JSON', help="Mede cada etapa e grava o rastreio neste arquivo")
+    parser.add_argument('--memoria', action='store_true', help="Com --rastrear, mede também o pico de memória")
+    parser.add_argument('--metricas', metavar='PROM', help="Grava as métricas (formato Prometheus) neste arquivo")
+    subparsers = parser.add_subparsers(dest='comando', required=True)
+
+    subparsers.add_parser('graficos', help="Lista os scripts de gráficos")
+    sub = subparsers.add_parser('grafico', help="Gera um gráfico (script de Gráficos/)")
+    sub.add_argument('nome', help="Nome do script, sem acentos nem extensão (ex.: grafico_expo_vinhos)")
+    sub.add_argument('--salvar', metavar='DIR', help="Grava em DIR as figuras que o script só exibe")
+    sub = subparsers.add_parser('relatorio', help="Relatório completo do juan.py")
+    sub.add_argument('--base', help="Pasta dos CSVs usados pelo juan.py")
+    for comando, (_, ajuda) in MODULOS.items():
+        # Os argumentos seguintes vão direto para o `main` do módulo
+        subparsers.add_parser(comando, help=ajuda, add_help=False)
+    return parser
+
+
+def executar(args, argumentos=()):
+    if args.comando == 'graficos':
+        for nome, caminho in scripts_graficos().items():
+            print(f"{nome:<32}{os.path.relpath(caminho, RAIZ)}")
+        return 0
+    if args.comando == 'grafico':
+        return rodar_grafico(args.nome, args.salvar)
+    if args.comando == 'relatorio':
+        return rodar_relatorio(args.base)
+    import importlib
+    modulo = importlib.import_module(MODULOS[args.comando][0])
+    return modulo.main(list(argumentos)) or 0
+
+
+def main(argv=None):
+    # Antes de qualquer import do matplotlib: sem toolkit de janela
+    os.environ.setdefault('MPLBACKEND', 'Agg')
+    parser = criar_parser()
+    args, argumentos = parser.parse_known_args(argv)
+    if argumentos and args.comando not in MODULOS:
+        parser.error(f"argumentos não reconhecidos: {' '.join(argumentos)}")
+    if args.metricas:
+        from vitibrasil import metricas
+        metricas.ativar(bibliotecas=True)
+        try:
+            return executar_rastreado(args, argumentos)
+        finally:
+            print(f"Métricas gravadas em {metricas.escrever_textfile(args.metricas)}", file=sys.stderr)
+    return executar_rastreado(args, argumentos)
+
+
+def executar_rastreado(args, argumentos=()):
+    """Executa o subcomando com `--rastrear` e `--profile-startup`, se pedidos (os dois podem vir juntos)."""
+    if not args.profile_startup:
+        return _executar_com_rastreio(args, argumentos)
+    with PerfilImports() as perfil:
+        inicio_subcomando = time.perf_counter()
+        try:
+            return _executar_com_rastreio(args, argumentos)
+        finally:
+            perfil.imprimir(inicio_subcomando, time.perf_counter())
+
+
+def _executar_com_rastreio(args, argumentos=()):
+    if not args.rastrear:
+        return executar(args, argumentos)
+    from vitibrasil import rastreio
+    rastreio.ativar(memoria=args.memoria, bibliotecas=True)
+    try:
+        with rastreio.etapa('subcomando', comando=args.comando):
+            return executar(args, argumentos)
+    finally:
+        rastreio.finalizar(args.rastrear)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+"""Armazenamento compacto de inteiros anuláveis, com códigos de sentinela por célula.
+
+Os carregadores densos trocam 'nd', '*', '+' e vazios por 0 (`fillna(0)`),
+perdendo a informação de "não disponível", e guardam tudo em float64. Aqui
+cada métrica vira dois arrays linha x ano:
+
+    valores  o menor tipo que guarda os números sem perda: int32 (ou int64
+             se não couber); com decimais, float32 se todos voltarem
+             idênticos dele, senão float64; 0 nas células sem número
+    codigos  uint8, um código por célula:
+
+        PRESENTE   número diferente de zero
+        ZERO       número igual a zero
+        ND         'nd' (não disponível)
+        ASTERISCO  '*'
+        MAIS       '+'
+        AUSENTE    vazio ou qualquer outro texto
+
+As agregações recebem um tratamento por código (0, NaN para excluir, ou
+outro valor), e a cobertura por ano sai dos códigos, sem reler os arquivos.
+"""
+
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+
+from vitibrasil import dados
+
+PRESENTE = 0
+ZERO = 1
+ND = 2
+ASTERISCO = 3
+MAIS = 4
+AUSENTE = 5
+
+NOMES_CODIGOS = {
+    PRESENTE: 'presente',
+    ZERO: 'zero',
+    ND: 'nd',
+    ASTERISCO: '*',
+    MAIS: '+',
+    AUSENTE: 'ausente',
+}
+
+# Textos de sentinela do site da Embrapa -> código
+SENTINELAS = {'nd': ND, '*': ASTERISCO, '+': MAIS}
+
+# Mesmo resultado do `fillna(0)` dos carregadores densos
+TRATAMENTO_PADRAO = {ZERO: 0.0, ND: 0.0, ASTERISCO: 0.0, MAIS: 0.0, AUSENTE: 0.0}
+# Só os números informados: sentinelas e vazios ficam fora das somas
+TRATAMENTO_EXCLUIR = {ZERO: 0.0, ND: np.nan, ASTERISCO: np.nan, MAIS: np.nan, AUSENTE: np.nan}
+
+
+def codificar(textos):
+    """Converte um array de textos em (valores compactos, códigos uint8), com a mesma forma."""
+    textos = np.asarray(textos, dtype=object)
+    serie = pd.Series(textos.ravel())
+    numeros = pd.to_numeric(serie, errors='coerce').to_numpy(dtype='float64')
+    tem_numero = ~np.isnan(numeros)
+
+    codigos = np.full(len(serie), AUSENTE, dtype='uint8')
+    sentinelas = serie.str.strip().str.lower().map(SENTINELAS).to_numpy(dtype='float64')
+    com_sentinela = ~np.isnan(sentinelas)
+    codigos[com_sentinela] = sentinelas[com_sentinela].astype('uint8')
+    codigos[tem_numero] = np.where(numeros[tem_numero] == 0, ZERO, PRESENTE)
+
+    numeros = np.where(tem_numero, numeros, 0.0)
+    return compactar(numeros).reshape(textos.shape), codigos.reshape(textos.shape)
+
+
+def compactar(numeros):
+    """Menor tipo que guarda os números sem perda: int32, int64 ou (com decimais) float32/float64."""
+    if len(numeros) and not np.array_equal(numeros, np.round(numeros)):
+        reduzidos = numeros.astype('float32')
+        return reduzidos if np.array_equal(reduzidos, numeros) else numeros.astype('float64')
+    limite = np.iinfo('int32')
+    if not len(numeros) or (numeros.min() >= limite.min and numeros.max() <= limite.max):
+        return numeros.astype('int32')
+    return numeros.astype('int64')
+
+
+class MatrizCompacta:
+    """Uma métrica (linha x ano) em valores compactos mais um código por célula."""
+
+    def __init__(self, valores, codigos, linhas, anos, metrica='volume'):
+        self.valores = valores
+        self.codigos = np.asarray(codigos, dtype='uint8')
+        # Identificação de cada linha (ex.: colunas Id e País do arquivo)
+        self.linhas = linhas.reset_index(drop=True)
+        self.anos = np.asarray(anos, dtype='int64')
+        self.metrica = metrica
+
+    @classmethod
+    def de_texto(cls, textos, linhas, anos, metrica='volume'):
+        """Monta a matriz a partir dos textos crus do arquivo (linha x ano)."""
+        valores, codigos = codificar(textos)
+        return cls(valores, codigos, linhas, anos, metrica)
+
+    @property
+    def nbytes(self):
+        """Memória dos arrays de valores e códigos."""
+        return self.valores.nbytes + self.codigos.nbytes
+
+    def para_float(self, tratamento=None):
+        """Matriz float64 com cada código substituído conforme `tratamento` (código -> valor)."""
+        tratamento = {**TRATAMENTO_PADRAO, **(tratamento or {})}
+        substitutos = np.array([tratamento.get(c, 0.0) for c in sorted(NOMES_CODIGOS)], dtype='float64')
+        return np.where(self.codigos == PRESENTE, self.valores, substitutos[self.codigos])
+
+    def agregar(self, por=None, tratamento=None):
+        """Soma por ano, agrupando as linhas pela coluna `por` de `linhas` (ou total).
+
+        Células tratadas como NaN ficam fora da soma; um grupo/ano sem nenhuma
+        célula válida resulta em NaN, e não em 0.
+        """
+        matriz = pd.DataFrame(self.para_float(tratamento), columns=self.anos)
+        if por is None:
+            return matriz.sum(axis=0, min_count=1).rename(self.metrica)
+        return matriz.groupby(self.linhas[por].to_numpy(), sort=True).sum(min_count=1)
+
+    def cobertura(self):
+        """Contagem de células por código e fração com número informado, por ano."""
+        contagens = np.stack([(self.codigos == c).sum(axis=0) for c in sorted(NOMES_CODIGOS)], axis=1)
+        tabela = pd.DataFrame(contagens, index=pd.Index(self.anos, name='ano'),
+                              columns=[NOMES_CODIGOS[c] for c in sorted(NOMES_CODIGOS)])
+        tabela['fracao_informada'] = (tabela['presente'] + tabela['zero']) / len(self.codigos)
+        return tabela
+
+
+def carregar(nome, base_path=None, inicio=None, fim=None):
+    """Lê um arquivo configurado em `dados.file_configs` direto para matrizes compactas.
+
+    Retorna um dicionário métrica -> MatrizCompacta ('volume' e, nos arquivos
+    de exportação, 'valor').
+    """
+    filepath, plano, anos, posicoes, df = dados.ler_texto(nome, base_path, inicio, fim)
+    linhas = df[plano.posicoes_id].set_axis(plano.id_vars, axis=1)
+    linhas = linhas.apply(lambda col: col.str.strip())
+    matrizes = {metrica: MatrizCompacta.de_texto(df[list(pos)].to_numpy(), linhas, anos, metrica)
+                for metrica, pos in posicoes.items()}
+    logging.info(f"Sucesso ao processar {os.path.basename(filepath)} "
+                 f"({sum(m.nbytes for m in matrizes.values())} bytes compactos)")
+    return matrizes
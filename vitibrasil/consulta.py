@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+"""Camada SQL local (SQLite) sobre as tabelas normalizadas.
+
+Tabelas registradas:
+    exportacao(produto, pais, ano, volume, valor)
+    producao(categoria, produto, ano, volume)
+    raspagem(fonte, produto, pais, ano, volume, valor)
+
+Uso pela linha de comando:
+    python -m vitibrasil.consulta "SELECT pais, SUM(valor) FROM exportacao GROUP BY pais"
+    python -m vitibrasil.consulta --top-mercados vinho --inicio 2009 --fim 2023
+"""
+
+import argparse
+import logging
+import os
+import sqlite3
+
+import pandas as pd
+
+from vitibrasil import dados
+
+BANCO_PADRAO = os.path.join(dados.CACHE_PATH, 'vitibrasil.sqlite')
+
+INDICES = [
+    'CREATE INDEX IF NOT EXISTS idx_exportacao_produto_pais_ano ON exportacao (produto, pais, ano)',
+    'CREATE INDEX IF NOT EXISTS idx_exportacao_produto_ano ON exportacao (produto, ano)',
+    'CREATE INDEX IF NOT EXISTS idx_producao_produto_ano ON producao (categoria, produto, ano)',
+    'CREATE INDEX IF NOT EXISTS idx_raspagem_produto_pais_ano ON raspagem (produto, pais, ano)',
+]
+
+_conexoes = {}
+
+
+def assinatura_fontes(base_path=None):
+    """Retorna (arquivo, mtime, tamanho) de cada arquivo de origem existente."""
+    caminhos = [dados.caminho_arquivo(nome, base_path) for nome in dados.file_configs]
+    caminhos += [filepath for _, filepath in dados.arquivos_raspagem()]
+    assinatura = []
+    for filepath in caminhos:
+        if os.path.exists(filepath):
+            info = os.stat(filepath)
+            assinatura.append((os.path.abspath(filepath), info.st_mtime_ns, info.st_size))
+    return sorted(assinatura)
+
+
+def banco_atualizado(conn, base_path=None):
+    """Verifica se o banco foi construído a partir das versões atuais dos arquivos."""
+    try:
+        registrada = conn.execute('SELECT arquivo, mtime, tamanho FROM fontes ORDER BY arquivo').fetchall()
+    except sqlite3.OperationalError:
+        return False
+    return [tuple(linha) for linha in registrada] == assinatura_fontes(base_path)
+
+
+def registrar_fontes(conn, base_path=None):
+    """Guarda a assinatura atual dos arquivos (o banco passa a ser considerado atualizado)."""
+    conn.execute('DROP TABLE IF EXISTS fontes')
+    conn.execute('CREATE TABLE fontes (arquivo TEXT, mtime INTEGER, tamanho INTEGER)')
+    conn.executemany('INSERT INTO fontes VALUES (?, ?, ?)', assinatura_fontes(base_path))
+
+
+def construir_banco(conn, base_path=None):
+    """(Re)cria as tabelas normalizadas e os índices no banco informado."""
+    logging.info("Construindo o banco SQL a partir dos arquivos de origem...")
+    tabelas = {
+        'exportacao': dados.carregar_exportacoes(base_path),
+        'producao': dados.carregar_producao(base_path),
+        'raspagem': dados.carregar_raspagem(),
+    }
+    with conn:
+        for nome, df in tabelas.items():
+            df.to_sql(nome, conn, if_exists='replace', index=False)
+        for indice in INDICES:
+            conn.execute(indice)
+        registrar_fontes(conn, base_path)
+    conn.execute('ANALYZE')
+    return conn
+
+
+def conectar(caminho=None, base_path=None, reconstruir=False):
+    """Abre (e reaproveita) a conexão com o banco, reconstruindo-o se os arquivos mudaram."""
+    caminho = caminho or BANCO_PADRAO
+    conn = _conexoes.get(caminho)
+    if conn is None:
+        if caminho != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+        conn = sqlite3.connect(caminho, check_same_thread=False)
+        _conexoes[caminho] = conn
+    if reconstruir or not banco_atualizado(conn, base_path):
+        construir_banco(conn, base_path)
+    return conn
+
+
+def query(sql, params=(), caminho=None, base_path=None):
+    """Executa uma consulta SQL e retorna o resultado como DataFrame.
+
+    `base_path` é a pasta de origem do banco: a verificação de atualização
+    compara com os arquivos dela (e reconstrói a partir dela, se mudaram).
+    """
+    return pd.read_sql_query(sql, conectar(caminho, base_path), params=params)
+
+
+def top_mercados(produto, inicio, fim, n=10, metrica='valor', caminho=None, base_path=None):
+    """Top N países por volume ou valor exportado no período [inicio, fim]."""
+    if metrica not in ('volume', 'valor'):
+        raise ValueError(f"Métrica desconhecida: {metrica}")
+    sql = f"""
+        SELECT pais, SUM(volume) AS volume, SUM(valor) AS valor
+        FROM exportacao
+        WHERE produto = ? AND ano BETWEEN ? AND ? AND pais <> 'Total'
+        GROUP BY pais
+        ORDER BY {metrica} DESC
+        LIMIT ?
+    """
+    return query(sql, (produto, inicio, fim, n), caminho, base_path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Consultas SQL sobre os dados da Vitibrasil.')
+    parser.add_argument('sql', nargs='?', help='Consulta SQL a executar')
+    parser.add_argument('--banco', default=None, help='Caminho do arquivo SQLite')
+    parser.add_argument('--base', default=None, help='Pasta com os arquivos de origem')
+    parser.add_argument('--reconstruir', action='store_true', help='Força a reconstrução do banco')
+    parser.add_argument('--top-mercados', metavar='PRODUTO', help='Top mercados de um produto')
+    parser.add_argument('--inicio', type=int, default=2009)
+    parser.add_argument('--fim', type=int, default=2023)
+    parser.add_argument('-n', type=int, default=10)
+    parser.add_argument('--metrica', choices=['volume', 'valor'], default='valor')
+    parser.add_argument('--csv', action='store_true', help='Imprime o resultado em CSV')
+    args = parser.parse_args(argv)
+
+    conectar(args.banco, args.base, reconstruir=args.reconstruir)
+    if args.top_mercados:
+        resultado = top_mercados(args.top_mercados, args.inicio, args.fim, args.n, args.metrica,
+                                 args.banco, args.base)
+    elif args.sql:
+        resultado = query(args.sql, caminho=args.banco, base_path=args.base)
+    else:
+        parser.error('Informe uma consulta SQL ou --top-mercados')
+
+    if args.csv:
+        print(resultado.to_csv(index=False, sep=';'))
+    else:
+        print(resultado.to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,243 @@
+# -*- coding: utf-8 -*-
+"""Matriz de correlação incremental entre séries anuais.
+
+Em vez de chamar `combined_df.corr()` do zero a cada novo ano, a classe
+`CorrelacaoIncremental` guarda, para cada par de séries (i, j), as somas
+sobre os anos em que as duas têm valor (observações pareadas completas):
+
+    n_ij, soma(x_i), soma(x_i^2), soma(x_i * x_j)
+
+Adicionar (ou corrigir) um ano custa O(k^2) para k séries e adicionar uma
+série nova custa O(anos * k); a matriz sai das somas sem recalcular nada.
+As séries são deslocadas pelo primeiro valor observado antes de somar, o
+que não altera a correlação e evita perda de precisão com volumes grandes.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def _estatisticas(xa, ma, xb, mb):
+    """Somas pareadas entre as colunas de A (linhas do resultado) e de B (colunas)."""
+    xa = np.where(ma, xa, 0.0)
+    xb = np.where(mb, xb, 0.0)
+    ma = ma.astype('float64')
+    mb = mb.astype('float64')
+    return {
+        'n': ma.T @ mb,
+        'sx': xa.T @ mb,
+        'sxx': (xa * xa).T @ mb,
+        'sxy': xa.T @ xb,
+    }
+
+
+def _correlacao(n, sx, sxx, sxy, min_periodos):
+    """Correlação de Pearson a partir das somas pareadas."""
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cov = n * sxy - sx * sx.T
+        var_a = n * sxx - sx * sx
+        var_b = var_a.T
+        r = cov / np.sqrt(var_a * var_b)
+    r = np.clip(r, -1.0, 1.0)
+    r[(n < min_periodos) | ~(var_a > 0) | ~(var_b > 0)] = np.nan
+    return r
+
+
+class CorrelacaoIncremental:
+    """Matriz de correlação (Pearson, pareada) atualizada ano a ano."""
+
+    def __init__(self, nomes=(), min_periodos=2):
+        self.min_periodos = min_periodos
+        self.nomes = list(nomes)
+        self.anos = []
+        k = len(self.nomes)
+        self._dados = np.empty((0, k))
+        self._ref = np.full(k, np.nan)
+        self._somas = {chave: np.zeros((k, k)) for chave in ('n', 'sx', 'sxx', 'sxy')}
+        self._acumulados = None
+
+    @classmethod
+    def de_dataframe(cls, df, min_periodos=2):
+        """Cria o motor a partir de um DataFrame ano x série (como o `combined_df`)."""
+        motor = cls(df.columns, min_periodos)
+        dados = df.to_numpy(dtype='float64')
+        motor.anos = list(df.index)
+        motor._dados = dados.copy()
+        motor._atualizar_referencias(dados)
+        x, m = motor._deslocar(dados)
+        motor._somas = _estatisticas(x, m, x, m)
+        return motor
+
+    def para_tabelas(self):
+        """Estado do motor em três tabelas só com números e nomes (para gravar em SQL).
+
+        - séries: serie, posicao, referencia (deslocamento da série)
+        - pares: serie_a, serie_b, n, soma_x, soma_y, soma_xx, soma_yy, soma_xy
+          (somas sobre os anos em que as duas séries têm valor)
+        - valores: ano, serie, valor (NaN onde a série não tem valor), usados
+          para corrigir anos já somados e para as janelas
+        """
+        nomes = np.asarray(self.nomes, dtype=object)
+        k = len(nomes)
+        series = pd.DataFrame({'serie': nomes, 'posicao': np.arange(k), 'referencia': self._ref})
+        a, b = (indice.ravel() for indice in np.indices((k, k)))
+        s = self._somas
+        pares = pd.DataFrame({
+            'serie_a': nomes[a], 'serie_b': nomes[b],
+            'n': s['n'].ravel(),
+            'soma_x': s['sx'].ravel(), 'soma_y': s['sx'].T.ravel(),
+            'soma_xx': s['sxx'].ravel(), 'soma_yy': s['sxx'].T.ravel(),
+            'soma_xy': s['sxy'].ravel(),
+        })
+        anos, colunas = (indice.ravel() for indice in np.indices(self._dados.shape))
+        valores = pd.DataFrame({'ano': np.asarray(self.anos, dtype='int64')[anos], 'serie': nomes[colunas],
+                                'valor': self._dados.ravel()})
+        return series, pares, valores
+
+    @classmethod
+    def de_tabelas(cls, series, pares, valores, min_periodos=2):
+        """Recria o motor a partir das tabelas de `para_tabelas`."""
+        series = series.sort_values('posicao')
+        motor = cls(series['serie'], min_periodos)
+        motor._ref = series['referencia'].to_numpy(dtype='float64')
+        grade = valores.pivot(index='ano', columns='serie', values='valor').reindex(columns=motor.nomes)
+        motor.anos = [int(ano) for ano in grade.index]
+        motor._dados = np.array(grade.to_numpy(dtype='float64')).reshape(len(motor.anos), len(motor.nomes))
+        posicao = {nome: i for i, nome in enumerate(motor.nomes)}
+        a = pares['serie_a'].map(posicao).to_numpy(dtype='int64')
+        b = pares['serie_b'].map(posicao).to_numpy(dtype='int64')
+        for chave, coluna in (('n', 'n'), ('sx', 'soma_x'), ('sxx', 'soma_xx'), ('sxy', 'soma_xy')):
+            motor._somas[chave][a, b] = pares[coluna].to_numpy(dtype='float64')
+        return motor
+
+    def _atualizar_referencias(self, linhas):
+        """Define o deslocamento das séries que recebem o primeiro valor agora."""
+        sem_ref = np.isnan(self._ref)
+        if not sem_ref.any():
+            return
+        presentes = ~np.isnan(linhas)
+        primeira = np.argmax(presentes, axis=0)
+        tem_valor = presentes.any(axis=0) & sem_ref
+        self._ref[tem_valor] = linhas[primeira[tem_valor], np.nonzero(tem_valor)[0]]
+
+    def _deslocar(self, linhas):
+        m = ~np.isnan(linhas)
+        return linhas - np.nan_to_num(self._ref), m
+
+    def _somar(self, linhas, sinal=1.0):
+        x, m = self._deslocar(np.atleast_2d(linhas))
+        for chave, valor in _estatisticas(x, m, x, m).items():
+            self._somas[chave] += sinal * valor
+
+    def adicionar_ano(self, ano, valores):
+        """Adiciona (ou substitui) os valores de um ano.
+
+        `valores` pode ser um dicionário/Series nome -> valor ou uma sequência
+        na ordem de `self.nomes`; séries ausentes ficam como NaN.
+        """
+        if isinstance(valores, (dict, pd.Series)):
+            valores = pd.Series(valores, dtype='float64')
+            novos = [nome for nome in valores.index if nome not in self.nomes]
+            for nome in novos:
+                self.adicionar_serie(nome, pd.Series(dtype='float64'))
+            linha = valores.reindex(self.nomes).to_numpy(dtype='float64')
+        else:
+            linha = np.asarray(valores, dtype='float64')
+
+        self._acumulados = None
+        if ano in self.anos:
+            # Correção de um ano já existente: remove a contribuição antiga
+            posicao = self.anos.index(ano)
+            self._somar(self._dados[posicao], sinal=-1.0)
+            self._dados[posicao] = linha
+        else:
+            self.anos.append(ano)
+            self._dados = np.vstack([self._dados, linha])
+        self._atualizar_referencias(linha[None, :])
+        self._somar(linha)
+
+    def adicionar_serie(self, nome, serie):
+        """Adiciona uma série nova (Series indexada por ano) sem recalcular as demais."""
+        if nome in self.nomes:
+            raise ValueError(f"Série já existe: {nome}")
+        serie = pd.Series(serie, dtype='float64')
+        for ano in serie.index:
+            if ano not in self.anos:
+                # Ano novo só para esta série: as outras ficam ausentes (sem contribuição)
+                self.anos.append(ano)
+                self._dados = np.vstack([self._dados, np.full(len(self.nomes), np.nan)])
+
+        coluna = serie.reindex(self.anos).to_numpy(dtype='float64')
+        self.nomes.append(nome)
+        self._dados = np.column_stack([self._dados, coluna])
+        self._ref = np.append(self._ref, np.nan)
+        self._atualizar_referencias(self._dados)
+        self._acumulados = None
+
+        x, m = self._deslocar(self._dados)
+        coluna_nova = _estatisticas(x, m, x[:, -1:], m[:, -1:])
+        linha_nova = _estatisticas(x[:, -1:], m[:, -1:], x, m)
+        for chave, antiga in self._somas.items():
+            k = antiga.shape[0]
+            expandida = np.zeros((k + 1, k + 1))
+            expandida[:k, :k] = antiga
+            expandida[:, -1:] = coluna_nova[chave]
+            expandida[-1:, :] = linha_nova[chave]
+            self._somas[chave] = expandida
+
+    def matriz(self):
+        """Matriz de correlação atual, no mesmo formato de `DataFrame.corr()`."""
+        s = self._somas
+        r = _correlacao(s['n'], s['sx'], s['sxx'], s['sxy'], self.min_periodos)
+        return pd.DataFrame(r, index=self.nomes, columns=self.nomes)
+
+    def _somas_acumuladas(self):
+        """Somas acumuladas no tempo (anos ordenados) das contribuições de cada ano."""
+        if self._acumulados is None:
+            ordem = np.argsort(self.anos, kind='stable')
+            x, m = self._deslocar(self._dados[ordem])
+            x = np.where(m, x, 0.0)
+            mf = m.astype('float64')
+            contribuicoes = {
+                'n': np.einsum('ti,tj->tij', mf, mf),
+                'sx': np.einsum('ti,tj->tij', x, mf),
+                'sxx': np.einsum('ti,tj->tij', x * x, mf),
+                'sxy': np.einsum('ti,tj->tij', x, x),
+            }
+            k = len(self.nomes)
+            self._acumulados = (
+                np.asarray(self.anos)[ordem],
+                {chave: np.concatenate([np.zeros((1, k, k)), np.cumsum(c, axis=0)])
+                 for chave, c in contribuicoes.items()},
+            )
+        return self._acumulados
+
+    def janelas(self, tamanho):
+        """Correlações em todas as janelas móveis de `tamanho` anos.
+
+        Retorna (anos_finais, matrizes) com matrizes de forma (janelas, k, k);
+        cada janela sai da diferença de duas somas acumuladas.
+        """
+        anos, acumulados = self._somas_acumuladas()
+        if tamanho > len(anos):
+            return anos[:0], np.empty((0, len(self.nomes), len(self.nomes)))
+        fim = np.arange(tamanho, len(anos) + 1)
+        inicio = fim - tamanho
+        s = {chave: a[fim] - a[inicio] for chave, a in acumulados.items()}
+        sx_t = np.swapaxes(s['sx'], 1, 2)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            cov = s['n'] * s['sxy'] - s['sx'] * sx_t
+            var_a = s['n'] * s['sxx'] - s['sx'] ** 2
+            var_b = np.swapaxes(var_a, 1, 2)
+            r = np.clip(cov / np.sqrt(var_a * var_b), -1.0, 1.0)
+        r[(s['n'] < self.min_periodos) | ~(var_a > 0) | ~(var_b > 0)] = np.nan
+        return anos[fim - 1], r
+
+    def matriz_periodo(self, inicio, fim):
+        """Matriz de correlação restrita aos anos entre `inicio` e `fim` (inclusive)."""
+        anos, acumulados = self._somas_acumuladas()
+        a = np.searchsorted(anos, inicio, side='left')
+        b = np.searchsorted(anos, fim, side='right')
+        s = {chave: acumulado[b] - acumulado[a] for chave, acumulado in acumulados.items()}
+        r = _correlacao(s['n'], s['sx'], s['sxx'], s['sxy'], self.min_periodos)
+        return pd.DataFrame(r, index=self.nomes, columns=self.nomes)
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""Métricas de crescimento vetorizadas para todas as séries do cubo.
+
+As funções recebem matrizes série x ano (DataFrames com um ano por coluna,
+como as de `dados.cubo_exportacao`) e calculam o resultado de todas as
+séries de uma vez, sem `.iloc[0]` nem laços por série.
+
+Anos-base com valor zero ou ausentes são tratados explicitamente: o
+crescimento fica NaN e a coluna de status informa o motivo
+('base_zero' ou 'base_ausente'), em vez do `float('inf')` usado no juan.py.
+"""
+
+import numpy as np
+import pandas as pd
+
+from vitibrasil.preco import divisao_segura
+
+BASE_OK = 'ok'
+BASE_ZERO = 'base_zero'
+BASE_AUSENTE = 'base_ausente'
+
+
+def _valores_ano(matriz, ano):
+    """Coluna de um ano como array (NaN se o ano não existe na matriz)."""
+    if ano in matriz.columns:
+        return matriz[ano].to_numpy(dtype='float64')
+    return np.full(len(matriz), np.nan)
+
+
+def status_base(base, final):
+    """Classifica cada par (base, final) como ok, base_zero ou base_ausente."""
+    base = np.asarray(base, dtype='float64')
+    final = np.asarray(final, dtype='float64')
+    ausente = np.isnan(base) | np.isnan(final)
+    return np.where(ausente, BASE_AUSENTE, np.where(base == 0, BASE_ZERO, BASE_OK))
+
+
+def variacao_pct(base, final):
+    """Variação percentual (final - base) / base * 100, NaN onde a base é zero ou ausente."""
+    base = np.asarray(base, dtype='float64')
+    final = np.asarray(final, dtype='float64')
+    valida = (status_base(base, final) == BASE_OK)
+    resultado = np.full(np.broadcast(base, final).shape, np.nan)
+    np.divide((final - base) * 100.0, base, out=resultado, where=valida)
+    return resultado
+
+
+def cagr_pct(base, final, anos):
+    """Taxa de crescimento anual composta em %, NaN para base zero/ausente ou sinais trocados."""
+    base = np.asarray(base, dtype='float64')
+    final = np.asarray(final, dtype='float64')
+    razao = np.full(np.broadcast(base, final).shape, np.nan)
+    if anos <= 0:
+        return razao
+    valida = (status_base(base, final) == BASE_OK) & (base > 0) & (final >= 0)
+    np.divide(final, base, out=razao, where=valida)
+    return (np.power(razao, 1.0 / anos) - 1.0) * 100.0
+
+
+def preco_medio(volume, valor):
+    """Preço médio (valor / volume) por célula; NaN onde o volume é zero ou ausente."""
+    valor = valor.reindex(index=volume.index, columns=volume.columns)
+    return pd.DataFrame(divisao_segura(valor, volume), index=volume.index, columns=volume.columns)
+
+
+def variacao_anual(matriz, com_status=False):
+    """Variação percentual ano contra ano (YoY) de todas as séries.
+
+    Retorna uma matriz com as colunas a partir do segundo ano; com
+    `com_status=True` retorna também a matriz de status da base.
+    """
+    valores = matriz.to_numpy(dtype='float64')
+    base, final = valores[:, :-1], valores[:, 1:]
+    colunas = matriz.columns[1:]
+    yoy = pd.DataFrame(variacao_pct(base, final), index=matriz.index, columns=colunas)
+    if com_status:
+        return yoy, pd.DataFrame(status_base(base, final), index=matriz.index, columns=colunas)
+    return yoy
+
+
+def crescimento_periodo(matriz, inicio, fim):
+    """Crescimento percentual entre os anos `inicio` e `fim` para todas as séries."""
+    base, final = _valores_ano(matriz, inicio), _valores_ano(matriz, fim)
+    return pd.DataFrame({
+        'crescimento_pct': variacao_pct(base, final),
+        'cagr_pct': cagr_pct(base, final, fim - inicio),
+        'status': status_base(base, final),
+    }, index=matriz.index)
+
+
+def metricas_crescimento(volume, valor, inicio, fim):
+    """Crescimento de volume, valor e preço médio de todas as séries no período.
+
+    Equivale aos `crescimento_volume_pct`, `crescimento_valor_pct` e
+    `crescimento_preco_medio_pct` do juan.py, calculados para cada linha.
+    """
+    preco = preco_medio(volume, valor)
+    resultado = {}
+    for nome, matriz in (('volume', volume), ('valor', valor), ('preco_medio', preco)):
+        periodo = crescimento_periodo(matriz, inicio, fim)
+        resultado[f'crescimento_{nome}_pct'] = periodo['crescimento_pct']
+        resultado[f'cagr_{nome}_pct'] = periodo['cagr_pct']
+        resultado[f'status_{nome}'] = periodo['status']
+    return pd.DataFrame(resultado, index=volume.index)
@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+"""Carregamento dos arquivos da Embrapa no formato longo (normalizado)."""
+
+import glob
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+
+from vitibrasil import esquema, metricas, rastreio
+
+# --- Configuração do Caminho ---
+# Raiz do repositório e pasta com os CSVs originais (pode ser trocada pela
+# variável de ambiente VITIBRASIL_BASE, ex.: '/content' no Colab)
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASE_PATH = os.environ.get('VITIBRASIL_BASE', os.path.join(RAIZ, 'Arquivos Bases'))
+CACHE_PATH = os.environ.get('VITIBRASIL_CACHE', os.path.join(RAIZ, 'cache'))
+
+# --- Mapeamento de Arquivos e Configurações ---
+# Mesmo formato do `file_configs` do juan.py, indexado pelo nome do produto
+file_configs = {
+    'producao': {'filename': 'Producao.csv', 'sep': ';', 'id_vars': ['id', 'control', 'produto'], 'type': 'simple'},
+    'vinho': {'filename': 'ExpVinho.csv', 'sep': '\t', 'id_vars': ['Id', 'País'], 'type': 'vol_value'},
+    'espumante': {'filename': 'ExpEspumantes.csv', 'sep': '\t', 'id_vars': ['Id', 'País'], 'type': 'vol_value'},
+    'uva': {'filename': 'ExpUva.csv', 'sep': '\t', 'id_vars': ['Id', 'País'], 'type': 'vol_value'},
+    'suco': {'filename': 'ExpSuco.csv', 'sep': '\t', 'id_vars': ['Id', 'País'], 'type': 'vol_value'},
+}
+
+# Arquivos gerados pelos scripts de raspagem (vinicolas2.py)
+PADROES_RASPAGEM = {
+    'exportacao': 'exportacao_vinhos_vitibrasil_*.csv',
+    'producao': 'producao_vinhos_vitibrasil_*.csv',
+}
+
+# Prefixos do campo `control` do Producao.csv -> categoria
+prefixos_categoria = {
+    'vm': 'VINHO DE MESA',
+    'vv': 'VINHO FINO DE MESA (VINIFERA)',
+    'su': 'SUCO',
+    'de': 'DERIVADOS',
+}
+
+COLUNAS_EXPORTACAO = ['produto', 'pais', 'ano', 'volume', 'valor']
+COLUNAS_PRODUCAO = ['categoria', 'produto', 'ano', 'volume']
+COLUNAS_RASPAGEM = ['fonte', 'produto', 'pais', 'ano', 'volume', 'valor']
+
+
+def caminho_arquivo(nome, base_path=None):
+    """Retorna o caminho completo do arquivo configurado para `nome`."""
+    return os.path.join(base_path or BASE_PATH, file_configs[nome]['filename'])
+
+
+def produtos_exportacao():
+    """Lista os produtos com arquivo de exportação (pares Volume/Valor)."""
+    return [nome for nome, config in file_configs.items() if config['type'] == 'vol_value']
+
+
+def plano_leitura(nome, base_path=None):
+    """Plano de leitura (layout inferido do cabeçalho) do arquivo configurado para `nome`."""
+    return esquema.plano_arquivo(caminho_arquivo(nome, base_path), file_configs[nome])
+
+
+def ultimos_anos(nome, n_anos, base_path=None):
+    """Período (inicio, fim) com os últimos `n_anos` do arquivo, lido só do cabeçalho."""
+    anos = plano_leitura(nome, base_path).anos
+    return int(anos[-n_anos]), int(anos[-1])
+
+
+def para_numerico(valores):
+    """Converte valores para float, trocando 'nd', '*', '+' e vazios por 0."""
+    return pd.to_numeric(pd.Series(np.ravel(valores)), errors='coerce').fillna(0).to_numpy(dtype='float64')
+
+
+def ler_texto(nome, base_path=None, inicio=None, fim=None):
+    """Lê como texto as colunas de identificação e as dos anos no período, pelas posições do plano.
+
+    Retorna o caminho, o plano, os anos lidos, as posições de cada métrica e o
+    DataFrame de texto (colunas rotuladas pela posição no arquivo).
+    """
+    filepath = caminho_arquivo(nome, base_path)
+    plano = plano_leitura(nome, base_path)
+    anos, posicoes = plano.periodo(inicio, fim)
+    with rastreio.etapa('read', arquivo=os.path.basename(filepath)) as e:
+        df = pd.read_csv(filepath, sep=plano.sep, header=None, skiprows=1, dtype=str,
+                         usecols=plano.usecols(inicio, fim))
+        e.registrar(linhas=len(df), bytes=os.path.getsize(filepath))
+    return filepath, plano, anos, posicoes, df
+
+
+def ler_periodo(nome, base_path=None, inicio=None, fim=None):
+    """Como `ler_texto`, mas com uma matriz numérica (linhas, anos) por métrica."""
+    filepath, plano, anos, posicoes, df = ler_texto(nome, base_path, inicio, fim)
+    if metricas.ATIVO:
+        colunas = [p for pos in posicoes.values() for p in pos]
+        metricas.contar_sentinelas(df[colunas].to_numpy(), os.path.basename(filepath))
+    with rastreio.etapa('coerce', arquivo=os.path.basename(filepath)) as e:
+        valores = {metrica: para_numerico(df[list(pos)].to_numpy()).reshape(len(df), len(anos))
+                   for metrica, pos in posicoes.items()}
+        e.registrar(linhas=len(df), bytes=sum(v.nbytes for v in valores.values()))
+    return filepath, plano, anos, valores, df
+
+
+def carregar_exportacao(produto, base_path=None, inicio=None, fim=None):
+    """Carrega um arquivo de exportação (pares Volume/Valor por ano) no formato longo.
+
+    Com `inicio`/`fim`, apenas as colunas dos anos no período são lidas.
+    """
+    filepath, plano, anos, valores, df = ler_periodo(produto, base_path, inicio, fim)
+    paises = df[plano.posicao('País')].str.strip().to_numpy()
+    longo = normalizar_exportacao(produto, paises, anos, valores, os.path.basename(filepath))
+    logging.info(f"Sucesso ao processar {os.path.basename(filepath)} ({len(longo)} linhas)")
+    return longo
+
+
+def normalizar_exportacao(produto, paises, anos, valores, arquivo=None):
+    """Monta a tabela longa de um produto a partir das matrizes (linhas, anos) de volume e valor."""
+    with rastreio.etapa('melt', arquivo=arquivo) as e:
+        longo = pd.DataFrame({
+            'produto': produto,
+            'pais': np.repeat(paises, len(anos)),
+            'ano': np.tile(anos, len(paises)),
+            'volume': valores['volume'].ravel(),
+            'valor': valores['valor'].ravel(),
+        })
+        e.registrar(longo)
+    # Países repetidos no arquivo são somados (como o groupby('País').sum() do juan.py)
+    with rastreio.etapa('groupby', arquivo=arquivo) as e:
+        longo = longo.groupby(['produto', 'pais', 'ano'], as_index=False, sort=False)[['volume', 'valor']].sum()
+        e.registrar(longo)
+    return longo[COLUNAS_EXPORTACAO]
+
+
+def carregar_producao(base_path=None, inicio=None, fim=None):
+    """Carrega o Producao.csv no formato longo, com a categoria de cada produto.
+
+    Com `inicio`/`fim`, apenas as colunas dos anos no período são lidas.
+    """
+    filepath, plano, anos, valores, df = ler_periodo('producao', base_path, inicio, fim)
+    control = df[plano.posicao('control')].to_numpy()
+    nomes = df[plano.posicao('produto')].str.strip().to_numpy()
+    longo = normalizar_producao(control, nomes, anos, valores['volume'], os.path.basename(filepath))
+    logging.info(f"Sucesso ao processar {os.path.basename(filepath)} ({len(longo)} linhas)")
+    return longo
+
+
+def normalizar_producao(control, nomes, anos, volumes, arquivo=None):
+    """Monta a tabela longa da produção a partir das colunas `control`/`produto` e da matriz de volumes."""
+    # Linhas de categoria (ex.: 'VINHO DE MESA') não têm prefixo no `control`
+    # e já são o total dos filhos; mantemos apenas os produtos
+    control = pd.Series(control)
+    prefixo = control.str.split('_', n=1).str[0].str.lower()
+    e_produto = control.str.contains('_', regex=False).to_numpy()
+    categorias = prefixo.map(prefixos_categoria).to_numpy()[e_produto]
+    nomes = np.asarray(nomes)[e_produto]
+    volumes = volumes[e_produto]
+
+    with rastreio.etapa('melt', arquivo=arquivo) as e:
+        longo = pd.DataFrame({
+            'categoria': np.repeat(categorias, len(anos)),
+            'produto': np.repeat(nomes, len(anos)),
+            'ano': np.tile(anos, len(nomes)),
+            'volume': volumes.ravel(),
+        })
+        e.registrar(longo)
+    return longo[COLUNAS_PRODUCAO]
+
+
+def arquivos_raspagem(diretorios=None):
+    """Procura os CSVs gerados pelos scripts de raspagem."""
+    diretorios = diretorios or [RAIZ, BASE_PATH]
+    encontrados = []
+    for fonte, padrao in PADROES_RASPAGEM.items():
+        for diretorio in diretorios:
+            for filepath in sorted(glob.glob(os.path.join(diretorio, padrao))):
+                encontrados.append((fonte, filepath))
+    return encontrados
+
+
+def carregar_raspagem(diretorios=None):
+    """Carrega os dados raspados do site da Vitibrasil no formato longo."""
+    partes = []
+    for fonte, filepath in arquivos_raspagem(diretorios):
+        try:
+            df = pd.read_csv(filepath, sep=';', encoding='utf-8-sig', dtype=str)
+        except Exception as e:
+            logging.error(f"Erro ao processar {os.path.basename(filepath)}: {e}")
+            continue
+
+        # Colunas do site: 'Países', 'Quantidade (Kg)', 'Valor (US$)' (exportação)
+        # ou 'Produto', 'Quantidade_L' (produção), sempre com a coluna 'Ano'
+        colunas = {col.lower(): col for col in df.columns}
+        pais_col = next((col for key, col in colunas.items() if key.startswith('pa')), None)
+        produto_col = colunas.get('produto')
+        volume_col = next((col for key, col in colunas.items() if key.startswith('quantidade')), None)
+        valor_col = next((col for key, col in colunas.items() if key.startswith('valor')), None)
+
+        partes.append(pd.DataFrame({
+            'fonte': fonte,
+            'produto': df[produto_col].str.strip() if produto_col else 'vinho',
+            'pais': df[pais_col].str.strip() if pais_col else 'Brasil',
+            'ano': pd.to_numeric(df['Ano'], errors='coerce').fillna(0).astype('int64'),
+            'volume': para_numerico(df[volume_col]) if volume_col else 0.0,
+            'valor': para_numerico(df[valor_col]) if valor_col else 0.0,
+        }))
+
+    if not partes:
+        return pd.DataFrame(columns=COLUNAS_RASPAGEM)
+    return pd.concat(partes, ignore_index=True)[COLUNAS_RASPAGEM]
+
+
+def cubo_exportacao(exportacao=None, colunas=('volume', 'valor')):
+    """Reorganiza a tabela longa em matrizes (produto, país) x ano, uma por métrica."""
+    if exportacao is None:
+        exportacao = carregar_exportacoes()
+    exportacao = exportacao[exportacao['pais'] != 'Total']
+    anos = np.arange(exportacao['ano'].min(), exportacao['ano'].max() + 1)
+    return {
+        metrica: (exportacao.pivot_table(index=['produto', 'pais'], columns='ano', values=metrica, aggfunc='sum')
+                  .reindex(columns=anos))
+        for metrica in colunas
+    }
+
+
+def carregar_exportacoes(base_path=None, inicio=None, fim=None):
+    """Carrega todos os arquivos de exportação em uma única tabela longa."""
+    partes = []
+    for produto in produtos_exportacao():
+        try:
+            partes.append(carregar_exportacao(produto, base_path, inicio, fim))
+        except FileNotFoundError:
+            logging.error(f"Erro: Arquivo não encontrado em {caminho_arquivo(produto, base_path)}")
+    if not partes:
+        return pd.DataFrame(columns=COLUNAS_EXPORTACAO)
+    return pd.concat(partes, ignore_index=True)
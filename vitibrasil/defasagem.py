@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""Correlação cruzada com defasagem (lag) via FFT.
+
+Pergunta típica: as premiações antecedem as exportações em 1 a 3 anos, em
+cada mercado? Para um direcionador x (ex.: premiações) e muitas séries alvo
+y_j (ex.: exportações por país), calcula a correlação de Pearson entre
+x[t] e y_j[t + lag] para todos os lags de uma vez.
+
+As somas necessárias em cada lag (soma de x, de y, de x^2, de y^2 e de x*y
+sobre a janela de sobreposição) saem de correlações cruzadas por FFT das
+séries e das máscaras de anos presentes, de modo que cada lag é normalizado
+só com os anos que de fato se sobrepõem, e não pela série inteira como em
+`np.correlate`.
+"""
+
+import numpy as np
+import pandas as pd
+from scipy import fft as sp_fft
+
+
+def _correlacao_cruzada_fft(a, b):
+    """Somas sum_t a[t] * b[t + lag] para lag = -(T-1)..(T-1), para cada linha de b."""
+    t = a.shape[-1]
+    n = sp_fft.next_fast_len(2 * t - 1)
+    fa = sp_fft.rfft(a, n, axis=-1)
+    fb = sp_fft.rfft(b, n, axis=-1)
+    cc = sp_fft.irfft(np.conj(fa) * fb, n, axis=-1)
+    # Reordena para lags negativos seguidos de zero e positivos
+    return np.concatenate([cc[..., n - (t - 1):], cc[..., :t]], axis=-1)
+
+
+def correlacao_defasada(driver, alvos, lag_max=3, min_sobreposicao=4):
+    """Correlação entre `driver[t]` e cada `alvos[j, t + lag]` para |lag| <= lag_max.
+
+    `driver` tem forma (T,) e `alvos` (séries, T), nos mesmos anos; valores
+    ausentes (NaN) são excluídos das somas de cada lag. Lags positivos
+    significam que o direcionador antecede o alvo. Retorna (lags, matriz
+    séries x lags), com NaN onde a sobreposição é menor que `min_sobreposicao`.
+    """
+    x = np.asarray(driver, dtype='float64')
+    y = np.atleast_2d(np.asarray(alvos, dtype='float64'))
+    t = x.shape[-1]
+    lag_max = min(lag_max, t - 1)
+
+    # Centraliza para estabilidade numérica (não altera a correlação)
+    mx = ~np.isnan(x)
+    my = ~np.isnan(y)
+    x0 = np.where(mx, x - np.nanmean(x), 0.0)
+    with np.errstate(invalid='ignore'):
+        medias_y = np.where(my.any(axis=1), np.nansum(np.where(my, y, 0.0), axis=1) / my.sum(axis=1), 0.0)
+    y0 = np.where(my, y - medias_y[:, None], 0.0)
+    mxf, myf = mx.astype('float64'), my.astype('float64')
+
+    # Cada termo é uma correlação cruzada entre (x ou máscara de x) e (y ou máscara de y)
+    n = _correlacao_cruzada_fft(mxf, myf)
+    sx = _correlacao_cruzada_fft(x0, myf)
+    sy = _correlacao_cruzada_fft(mxf, y0)
+    sxx = _correlacao_cruzada_fft(x0 * x0, myf)
+    syy = _correlacao_cruzada_fft(mxf, y0 * y0)
+    sxy = _correlacao_cruzada_fft(x0, y0)
+
+    centro = t - 1
+    fatia = slice(centro - lag_max, centro + lag_max + 1)
+    # A contagem de anos sobrepostos é inteira; arredonda o resíduo da FFT
+    n = np.round(n[..., fatia])
+    sx, sy, sxx, syy, sxy = (m[..., fatia] for m in (sx, sy, sxx, syy, sxy))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cov = n * sxy - sx * sy
+        var_x = n * sxx - sx * sx
+        var_y = n * syy - sy * sy
+        r = np.clip(cov / np.sqrt(var_x * var_y), -1.0, 1.0)
+    # A FFT deixa resíduos de arredondamento: variâncias ~0 viram NaN
+    escala_x = np.maximum(n * sxx, 1e-300)
+    escala_y = np.maximum(n * syy, 1e-300)
+    invalido = (n < min_sobreposicao) | (var_x <= 1e-9 * escala_x) | (var_y <= 1e-9 * escala_y)
+    r[invalido] = np.nan
+    return np.arange(-lag_max, lag_max + 1), r
+
+
+def melhor_defasagem(driver, alvos, lag_max=3, apenas_positivos=True, min_sobreposicao=4):
+    """Lag de maior |correlação| para cada série alvo.
+
+    `driver` é uma Series indexada por ano e `alvos` um DataFrame série x ano
+    (como as matrizes de `dados.cubo_exportacao`); os anos são alinhados
+    pelos rótulos num eixo contínuo de anos (anos sem dado entram como NaN),
+    então o lag é sempre medido em anos, mesmo em séries com lacunas. Com `apenas_positivos=True` só considera lags >= 1
+    (direcionador antecedendo o alvo). Retorna um DataFrame com as correlações
+    por lag, o melhor lag e a força da relação.
+    """
+    rotulos = np.concatenate([np.asarray(driver.index, dtype='int64'), np.asarray(alvos.columns, dtype='int64')])
+    anos = np.arange(rotulos.min(), rotulos.max() + 1)
+    x = driver.reindex(anos).to_numpy(dtype='float64')
+    y = alvos.reindex(columns=anos).to_numpy(dtype='float64')
+    lags, r = correlacao_defasada(x, y, lag_max, min_sobreposicao)
+
+    por_lag = pd.DataFrame(r, index=alvos.index, columns=[f'lag_{lag}' for lag in lags])
+    candidatos = r[:, lags >= 1] if apenas_positivos else r
+    lags_candidatos = lags[lags >= 1] if apenas_positivos else lags
+    sem_valor = np.isnan(candidatos).all(axis=1)
+    posicao = np.argmax(np.where(np.isnan(candidatos), -np.inf, np.abs(candidatos)), axis=1)
+    por_lag['melhor_lag'] = np.where(sem_valor, np.nan, lags_candidatos[posicao])
+    por_lag['correlacao'] = np.where(sem_valor, np.nan, candidatos[np.arange(len(candidatos)), posicao])
+    return por_lag.sort_values('correlacao', key=np.abs, ascending=False)
@@ -0,0 +1,285 @@
+# -*- coding: utf-8 -*-
+"""Ingestão incremental de anos novos no banco SQLite e nas visões materializadas.
+
+Quando a Embrapa publica um ano novo, os arquivos largos ganham as colunas
+`2025` / `2025.1` e o resto do histórico fica igual. Em vez de reconstruir o
+banco e as visões desde 1970, este módulo:
+
+1. compara os anos do cabeçalho (só o cabeçalho é lido) com o último ano de
+   cada produto já guardado;
+2. lê apenas as colunas dos anos novos e as acrescenta às tabelas
+   `exportacao` e `producao` (e as partições (fonte, ano) novas da raspagem);
+3. estende `mv_tendencia` a partir das somas acumuladas do último ano
+   guardado, calcula em `mv_ranking` só os anos finais novos (cada janela sai
+   da diferença de duas somas acumuladas) e acrescenta os hashes em
+   `mv_particoes`;
+4. soma o ano novo ao motor de correlação guardado (tabelas numéricas
+   `mv_correlacao_series`, `mv_correlacao_pares` e `mv_correlacao_valores`)
+   e regrava a matriz `mv_correlacao(serie_a, serie_b, correlacao)`.
+
+O custo é proporcional aos anos novos (e ao número de países), não ao
+histórico. O modo supõe que os anos antigos não mudaram; `--verificar` relê o
+histórico e compara com os hashes de `mv_particoes` (para correções em anos
+antigos, use `python -m vitibrasil visoes`, que refaz só as partições alteradas).
+
+    python -m vitibrasil delta
+    python -m vitibrasil delta --verificar
+"""
+
+import argparse
+import logging
+import os
+import sqlite3
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from vitibrasil import consulta, dados, visoes
+from vitibrasil.correlacao import CorrelacaoIncremental
+from vitibrasil.preco import divisao_segura
+
+
+def _tabela_existe(conn, tabela):
+    linha = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (tabela,)).fetchone()
+    return linha is not None
+
+
+def ultimos_anos_guardados(conn):
+    """Último ano guardado de cada produto de exportação e da produção."""
+    ultimos = dict(conn.execute('SELECT produto, MAX(ano) FROM exportacao GROUP BY produto').fetchall())
+    ultimos['producao'] = conn.execute('SELECT MAX(ano) FROM producao').fetchone()[0]
+    return ultimos
+
+
+def anos_novos(nome, ultimo, base_path=None):
+    """Anos do cabeçalho do arquivo posteriores a `ultimo` (todos, se `ultimo` for None).
+
+    Arquivo ausente: registra o erro e retorna lista vazia, como os outros carregadores.
+    """
+    try:
+        anos = dados.plano_leitura(nome, base_path).anos
+    except FileNotFoundError:
+        logging.error(f"Erro: Arquivo não encontrado em {dados.caminho_arquivo(nome, base_path)}")
+        return []
+    return [int(ano) for ano in anos if ultimo is None or ano > ultimo]
+
+
+# --- Séries anuais e correlação ---
+
+def totais_anuais(conn, anos=None):
+    """Totais por ano (ano x série), com os mesmos nomes de série da API."""
+    filtro, params = '', ()
+    if anos is not None:
+        filtro = f"AND ano IN ({', '.join('?' * len(anos))})"
+        params = tuple(int(ano) for ano in anos)
+    exportacao = pd.read_sql_query(f"""
+        SELECT produto, ano, SUM(volume) AS volume, SUM(valor) AS valor
+        FROM exportacao WHERE pais <> 'Total' {filtro} GROUP BY produto, ano
+    """, conn, params=params)
+    producao = pd.read_sql_query(f"""
+        SELECT categoria, ano, SUM(volume) AS volume
+        FROM producao WHERE 1 = 1 {filtro} GROUP BY categoria, ano
+    """, conn, params=params)
+    series = {}
+    for metrica in visoes.METRICAS:
+        for produto, serie in exportacao.pivot(index='ano', columns='produto', values=metrica).items():
+            series[f'exportacao_{produto}_{metrica}'] = serie
+    for categoria, serie in producao.pivot(index='ano', columns='categoria', values='volume').items():
+        series[f'producao_{categoria.lower()}_volume'] = serie
+    return pd.DataFrame(series).sort_index()
+
+
+TABELAS_CORRELACAO = ('mv_correlacao_series', 'mv_correlacao_pares', 'mv_correlacao_valores')
+
+
+def gravar_correlacao(conn, motor):
+    """Guarda o estado do motor (somas pareadas e valores anuais) e a matriz de todo o período."""
+    for tabela, df in zip(TABELAS_CORRELACAO, motor.para_tabelas()):
+        df.to_sql(tabela, conn, if_exists='replace', index=False)
+    # Estado serializado das versões anteriores (pickle): substituído pelas tabelas acima
+    conn.execute('DROP TABLE IF EXISTS mv_correlacao_estado')
+    matriz = motor.matriz().rename_axis('serie_a').reset_index()
+    matriz.melt(id_vars='serie_a', var_name='serie_b', value_name='correlacao').to_sql(
+        'mv_correlacao', conn, if_exists='replace', index=False)
+
+
+def carregar_correlacao(conn):
+    """Motor de correlação guardado (None se ainda não existe)."""
+    if not all(_tabela_existe(conn, tabela) for tabela in TABELAS_CORRELACAO):
+        return None
+    tabelas = [pd.read_sql_query(f'SELECT * FROM {tabela}', conn) for tabela in TABELAS_CORRELACAO]
+    return CorrelacaoIncremental.de_tabelas(*tabelas)
+
+
+def atualizar_correlacao(conn, anos):
+    """Soma (ou substitui) os anos informados no motor guardado; cria o motor se não existir."""
+    motor = carregar_correlacao(conn)
+    if motor is None:
+        motor = CorrelacaoIncremental.de_dataframe(totais_anuais(conn))
+    else:
+        for ano, valores in totais_anuais(conn, anos).iterrows():
+            motor.adicionar_ano(int(ano), valores.dropna())
+    gravar_correlacao(conn, motor)
+    return motor
+
+
+# --- Visões ---
+
+def anexar_visoes(conn, produto, novos, ultimo, n=visoes.N_RANKING):
+    """Estende mv_tendencia e calcula mv_ranking só para os anos finais novos de um produto.
+
+    `novos` é a tabela longa (produto, pais, ano, volume, valor) dos anos
+    posteriores a `ultimo`, o último ano já presente nas visões.
+    """
+    novos = novos[novos['pais'] != 'Total']
+    anos = np.arange(ultimo + 1, novos['ano'].max() + 1)
+    anteriores = pd.read_sql_query(
+        'SELECT pais, volume_acumulado, valor_acumulado FROM mv_tendencia WHERE produto = ? AND ano = ?',
+        conn, params=(produto, int(ultimo))).set_index('pais')
+    paises = np.array(sorted(set(novos['pais']) | set(anteriores.index)), dtype=object)
+
+    matrizes, acumulados = {}, {}
+    for metrica in visoes.METRICAS:
+        matrizes[metrica] = (novos.pivot_table(index='pais', columns='ano', values=metrica, aggfunc='sum')
+                             .reindex(index=paises, columns=anos).fillna(0).to_numpy(dtype='float64'))
+        base = anteriores[f'{metrica}_acumulado'].reindex(paises).fillna(0).to_numpy(dtype='float64')
+        acumulados[metrica] = base[:, None] + np.cumsum(matrizes[metrica], axis=1)
+
+    # Mesma regra da calcular_tendencia: linhas a partir do primeiro ano com exportação
+    linhas, colunas = np.nonzero(acumulados['volume'] + acumulados['valor'] > 0)
+    volume, valor = matrizes['volume'][linhas, colunas], matrizes['valor'][linhas, colunas]
+    pd.DataFrame({
+        'produto': produto,
+        'pais': paises[linhas],
+        'ano': anos[colunas],
+        'volume': volume,
+        'valor': valor,
+        'preco_medio': divisao_segura(valor, volume, padrao=0.0),
+        'volume_acumulado': acumulados['volume'][linhas, colunas],
+        'valor_acumulado': acumulados['valor'][linhas, colunas],
+    })[visoes.COLUNAS_TENDENCIA].to_sql('mv_tendencia', conn, if_exists='append', index=False)
+
+    # Somas acumuladas nos inícios das janelas que caem no histórico já guardado
+    inicios = sorted({int(fim - janela) for fim in anos for janela in visoes.JANELAS
+                      if janela and fim - janela <= ultimo})
+    historico = pd.read_sql_query(f"""
+        SELECT pais, ano, volume_acumulado, valor_acumulado FROM mv_tendencia
+        WHERE produto = ? AND ano IN ({', '.join('?' * len(inicios))})
+    """, conn, params=(produto, *inicios)) if inicios else pd.DataFrame(
+        columns=['pais', 'ano', 'volume_acumulado', 'valor_acumulado'])
+
+    def acumulado_em(metrica, ano):
+        if ano > ultimo:
+            return acumulados[metrica][:, ano - ultimo - 1]
+        coluna = historico[historico['ano'] == ano].set_index('pais')[f'{metrica}_acumulado']
+        return coluna.reindex(paises).fillna(0).to_numpy(dtype='float64')
+
+    conn.executemany('DELETE FROM mv_ranking WHERE produto = ? AND ano_fim = ?',
+                     [(produto, int(ano)) for ano in anos])
+    for janela in visoes.JANELAS:
+        somas = {metrica: acumulados[metrica] if janela == 0 else
+                 acumulados[metrica] - np.column_stack([acumulado_em(metrica, int(fim - janela)) for fim in anos])
+                 for metrica in visoes.METRICAS}
+        visoes.rankings_janela(produto, janela, anos, paises, somas, n)[visoes.COLUNAS_RANKING].to_sql(
+            'mv_ranking', conn, if_exists='append', index=False)
+
+
+# --- Ingestão ---
+
+def ingerir(conn, base_path=None):
+    """Acrescenta os anos novos dos arquivos ao banco e às visões; retorna {tabela/produto: [anos]}."""
+    if not all(_tabela_existe(conn, tabela) for tabela in ('exportacao', 'producao', 'mv_tendencia')):
+        logging.info("Banco ou visões ainda não construídos; fazendo a carga completa.")
+        consulta.construir_banco(conn, base_path)
+        visoes.atualizar_visoes(conn)
+        with conn:
+            atualizar_correlacao(conn, None)
+        return {'completo': []}
+
+    ultimos = ultimos_anos_guardados(conn)
+    ingeridos = {}
+    with conn:
+        for produto in dados.produtos_exportacao():
+            ultimo = ultimos.get(produto)
+            anos = anos_novos(produto, ultimo, base_path)
+            if not anos:
+                continue
+            novos = dados.carregar_exportacao(produto, base_path, anos[0], anos[-1])
+            novos.to_sql('exportacao', conn, if_exists='append', index=False)
+            visoes.hash_particoes(novos).to_sql('mv_particoes', conn, if_exists='append', index=False)
+            if ultimo is None:
+                # Produto novo: as visões dele saem do cálculo completo (só deste produto)
+                paises, anos_produto, matrizes = visoes.matrizes_produto(novos)
+                visoes.calcular_tendencia(produto, paises, anos_produto, matrizes, anos_produto[0]).to_sql(
+                    'mv_tendencia', conn, if_exists='append', index=False)
+                visoes.calcular_rankings(produto, paises, anos_produto, matrizes,
+                                         {janela: anos_produto for janela in visoes.JANELAS}).to_sql(
+                    'mv_ranking', conn, if_exists='append', index=False)
+            else:
+                anexar_visoes(conn, produto, novos, ultimo)
+            ingeridos[produto] = anos
+
+        anos = anos_novos('producao', ultimos['producao'], base_path)
+        if anos:
+            dados.carregar_producao(base_path, anos[0], anos[-1]).to_sql(
+                'producao', conn, if_exists='append', index=False)
+            ingeridos['producao'] = anos
+
+        raspagem = dados.carregar_raspagem()
+        if not raspagem.empty and _tabela_existe(conn, 'raspagem'):
+            guardadas = set(conn.execute('SELECT DISTINCT fonte, ano FROM raspagem').fetchall())
+            nova = [(fonte, int(ano)) not in guardadas for fonte, ano in zip(raspagem['fonte'], raspagem['ano'])]
+            novas = raspagem[nova]
+            if not novas.empty:
+                novas.to_sql('raspagem', conn, if_exists='append', index=False)
+                ingeridos['raspagem'] = sorted(novas['ano'].unique().tolist())
+
+        anos_alterados = sorted({ano for chave, anos in ingeridos.items() if chave != 'raspagem' for ano in anos})
+        if anos_alterados:
+            atualizar_correlacao(conn, anos_alterados)
+        consulta.registrar_fontes(conn, base_path)
+    return ingeridos
+
+
+def verificar(conn, base_path=None):
+    """Partições (produto, ano) já guardadas cujo conteúdo no arquivo mudou (relê o histórico)."""
+    hashes = visoes.hash_particoes(dados.carregar_exportacoes(base_path))
+    guardados = pd.read_sql_query('SELECT produto, ano, hash AS guardado FROM mv_particoes', conn)
+    comparacao = hashes.merge(guardados, on=['produto', 'ano'])
+    return comparacao.loc[comparacao['hash'] != comparacao['guardado'], ['produto', 'ano']]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Acrescenta ao banco e às visões só os anos novos dos arquivos.')
+    parser.add_argument('--banco', default=consulta.BANCO_PADRAO, help='Caminho do arquivo SQLite')
+    parser.add_argument('--base', default=None, help='Pasta com os arquivos de origem')
+    parser.add_argument('--verificar', action='store_true',
+                        help='Antes, confere se os anos já guardados continuam iguais nos arquivos')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    os.makedirs(os.path.dirname(os.path.abspath(args.banco)), exist_ok=True)
+    conn = sqlite3.connect(args.banco)
+    if args.verificar and _tabela_existe(conn, 'mv_particoes'):
+        alteradas = verificar(conn, args.base)
+        if not alteradas.empty:
+            print("Anos já guardados mudaram nos arquivos (use `python -m vitibrasil visoes`):")
+            print(alteradas.to_string(index=False))
+            return 1
+
+    inicio = time.perf_counter()
+    ingeridos = ingerir(conn, args.base)
+    duracao = time.perf_counter() - inicio
+    if not ingeridos:
+        print(f"Nenhum ano novo ({duracao:.2f} s).")
+    for chave, anos in ingeridos.items():
+        print(f"{chave:<12}{', '.join(map(str, anos)) or 'carga completa'}")
+    if ingeridos:
+        print(f"Concluído em {duracao:.2f} s.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
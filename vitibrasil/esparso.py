@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+"""Armazenamento esparso (CSR) das matrizes país x ano de exportação.
+
+A maior parte das células de ExpVinho/ExpUva/ExpSuco/ExpEspumantes é zero:
+quase todos os países compraram em poucos dos anos da série. O carregador
+daqui lê o arquivo em blocos de linhas, converte cada bloco de uma vez e
+guarda apenas as células não nulas, sem montar a matriz densa do arquivo
+inteiro nem o formato longo derretido.
+
+Reduções, top N e somas por janela trabalham só sobre os não zeros.
+"""
+
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from vitibrasil import dados
+
+METRICAS = ('volume', 'valor')
+# Linhas convertidas por vez: só um bloco fica denso na memória
+LINHAS_POR_BLOCO = 1024
+
+
+class MatrizEsparsa:
+    """Volume e valor de um produto como matrizes CSR país x ano."""
+
+    def __init__(self, paises, anos, volume, valor, produto=None):
+        self.produto = produto
+        self.paises = np.asarray(paises, dtype=object)
+        self.anos = np.asarray(anos, dtype='int64')
+        self.matrizes = {'volume': sparse.csr_matrix(volume), 'valor': sparse.csr_matrix(valor)}
+        for matriz in self.matrizes.values():
+            matriz.eliminate_zeros()
+
+    @classmethod
+    def de_longo(cls, longo, produto=None):
+        """Monta a matriz a partir da tabela longa (pais, ano, volume, valor)."""
+        if produto is not None:
+            longo = longo[longo['produto'] == produto]
+        paises, linhas = np.unique(longo['pais'].to_numpy(dtype=object), return_inverse=True)
+        anos = np.arange(longo['ano'].min(), longo['ano'].max() + 1)
+        colunas = longo['ano'].to_numpy(dtype='int64') - anos[0]
+        forma = (len(paises), len(anos))
+        matrizes = [sparse.coo_matrix((longo[m].to_numpy(dtype='float64'), (linhas, colunas)), shape=forma)
+                    for m in METRICAS]
+        return cls(paises, anos, *matrizes, produto=produto)
+
+    @property
+    def nnz(self):
+        """Número de células não nulas (volume ou valor)."""
+        return max(m.nnz for m in self.matrizes.values())
+
+    @property
+    def nbytes(self):
+        """Memória ocupada pelos arrays CSR."""
+        return sum(m.data.nbytes + m.indices.nbytes + m.indptr.nbytes for m in self.matrizes.values())
+
+    def _colunas(self, inicio=None, fim=None):
+        """Índices das colunas (anos) no intervalo [inicio, fim]."""
+        a = 0 if inicio is None else np.searchsorted(self.anos, inicio, side='left')
+        b = len(self.anos) if fim is None else np.searchsorted(self.anos, fim, side='right')
+        return a, b
+
+    def totais_por_pais(self, inicio=None, fim=None):
+        """Soma de volume e valor por país no período (só os não zeros são visitados)."""
+        a, b = self._colunas(inicio, fim)
+        return pd.DataFrame({m: np.asarray(matriz[:, a:b].sum(axis=1)).ravel()
+                             for m, matriz in self.matrizes.items()}, index=self.paises)
+
+    def totais_por_ano(self):
+        """Soma de volume e valor por ano (todas as linhas)."""
+        return pd.DataFrame({m: np.asarray(matriz.sum(axis=0)).ravel()
+                             for m, matriz in self.matrizes.items()}, index=self.anos)
+
+    def top_n(self, n=10, metrica='valor', inicio=None, fim=None):
+        """Top N países pela métrica no período, com preço médio."""
+        totais = self.totais_por_pais(inicio, fim)
+        valores = totais[metrica].to_numpy()
+        ativos = np.flatnonzero(valores > 0)
+        if len(ativos) > n:
+            ativos = ativos[np.argpartition(-valores[ativos], n - 1)[:n]]
+        top = totais.iloc[ativos].sort_values(metrica, ascending=False)
+        top['preco_medio'] = np.divide(top['valor'], top['volume'], out=np.full(len(top), np.nan),
+                                       where=top['volume'].to_numpy() > 0)
+        return top
+
+    def somas_janela(self, tamanho, metrica='valor'):
+        """Soma móvel de `tamanho` anos para cada país, como matriz esparsa (país x ano final).
+
+        É o produto da matriz CSR por uma matriz de banda 0/1 (anos x anos finais).
+        """
+        y = len(self.anos)
+        fins = np.arange(tamanho - 1, y)
+        linhas = (fins[None, :] - np.arange(tamanho)[:, None]).ravel()
+        colunas = np.broadcast_to(np.arange(len(fins)), (tamanho, len(fins))).ravel()
+        banda = sparse.csr_matrix((np.ones(len(linhas)), (linhas, colunas)), shape=(y, len(fins)))
+        return self.matrizes[metrica] @ banda, self.anos[fins]
+
+    def para_longo(self):
+        """Tabela longa (produto, pais, ano, volume, valor) apenas com as células não nulas."""
+        soma = (self.matrizes['volume'] != 0) + (self.matrizes['valor'] != 0)
+        linhas, colunas = soma.nonzero()
+        return pd.DataFrame({
+            'produto': self.produto,
+            'pais': self.paises[linhas],
+            'ano': self.anos[colunas],
+            'volume': np.asarray(self.matrizes['volume'][linhas, colunas]).ravel(),
+            'valor': np.asarray(self.matrizes['valor'][linhas, colunas]).ravel(),
+        })
+
+    def para_denso(self, metrica='valor'):
+        """Matriz densa país x ano (para gráficos ou comparação)."""
+        return pd.DataFrame(self.matrizes[metrica].toarray(), index=self.paises, columns=self.anos)
+
+
+def carregar_exportacao(produto, base_path=None, linhas_por_bloco=LINHAS_POR_BLOCO):
+    """Lê um arquivo de exportação direto para o formato esparso.
+
+    O arquivo é lido em blocos de `linhas_por_bloco` linhas; cada bloco é
+    convertido de uma vez (`dados.para_numerico`: 'nd', '*', '+' ou vazios
+    viram 0, como nos carregadores densos) e só as coordenadas e valores não
+    nulos são guardados. A matriz densa do arquivo inteiro nunca existe.
+    """
+    filepath = dados.caminho_arquivo(produto, base_path)
+    plano = dados.plano_leitura(produto, base_path)
+    pais_pos = plano.posicao('País')
+    anos = plano.anos
+    usecols = sorted([pais_pos] + [int(p) for pos in plano.posicoes.values() for p in pos])
+
+    paises, lidas = [], 0
+    triplas = {metrica: [] for metrica in METRICAS}
+    blocos = pd.read_csv(filepath, sep=plano.sep, header=None, skiprows=1, dtype=str, usecols=usecols,
+                         chunksize=linhas_por_bloco)
+    for bloco in blocos:
+        paises.append(bloco[pais_pos].str.strip().to_numpy(dtype=object))
+        for metrica in METRICAS:
+            textos = bloco[list(plano.posicoes[metrica])].to_numpy()
+            valores = dados.para_numerico(textos).reshape(len(bloco), len(anos))
+            linhas, colunas = np.nonzero(valores)
+            triplas[metrica].append((linhas + lidas, colunas, valores[linhas, colunas]))
+        lidas += len(bloco)
+
+    # Países repetidos viram a mesma linha (o CSR soma as duplicatas)
+    paises = np.concatenate(paises) if paises else np.empty(0, dtype=object)
+    nomes, indice = np.unique(paises, return_inverse=True)
+    forma = (len(nomes), len(anos))
+    matrizes = []
+    for metrica in METRICAS:
+        if triplas[metrica]:
+            linhas, colunas, valores = (np.concatenate(partes) for partes in zip(*triplas[metrica]))
+        else:
+            linhas, colunas, valores = np.empty(0, 'int64'), np.empty(0, 'int64'), np.empty(0)
+        matrizes.append(sparse.coo_matrix((valores, (indice[linhas], colunas)), shape=forma))
+    matriz = MatrizEsparsa(nomes, anos, *matrizes, produto=produto)
+    logging.info(f"Sucesso ao processar {os.path.basename(filepath)} "
+                 f"({matriz.nnz} células não nulas de {forma[0] * forma[1]})")
+    return matriz
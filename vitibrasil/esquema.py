@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+"""Inferência do layout dos arquivos largos da Embrapa e planos de leitura.
+
+Os arquivos têm colunas de identificação seguidas de uma coluna por ano
+('simple', como o Producao.csv) ou de um par Volume/Valor por ano com o ano
+repetido no cabeçalho ('vol_value', como o ExpVinho.csv). Em vez de cada
+carregador redescobrir isso (regex por coluna, renomeação '.1' do pandas,
+suposição de alternância), o cabeçalho é inspecionado uma única vez e vira
+um `PlanoLeitura`: separador, colunas de identificação, ano e métrica de cada
+coluna e as posições por métrica, prontas para `usecols`.
+
+Os planos ficam em cache pela impressão digital (hash) da linha de
+cabeçalho. Se o cabeçalho de um arquivo muda entre leituras, o novo layout
+é validado contra o esperado e a mudança é registrada no log, em vez de
+gerar somas erradas silenciosamente.
+"""
+
+import hashlib
+import logging
+
+import numpy as np
+
+SIMPLES = 'simple'
+VOLUME_VALOR = 'vol_value'
+SEPARADORES = ('\t', ';', ',')
+
+# Planos já inferidos, pela impressão do cabeçalho
+_planos = {}
+# Última impressão vista para cada arquivo (detecta mudanças de layout)
+_impressoes = {}
+
+
+class LayoutInvalido(ValueError):
+    """O cabeçalho não segue nenhum dos layouts conhecidos (ou não é o esperado)."""
+
+
+class PlanoLeitura:
+    """Layout de um arquivo largo: colunas de identificação, anos e métrica de cada coluna."""
+
+    def __init__(self, colunas, sep, id_vars, tipo, anos_coluna, metricas_coluna, impressao=None):
+        self.colunas = list(colunas)
+        self.sep = sep
+        self.id_vars = list(id_vars)
+        self.tipo = tipo
+        # Por coluna do arquivo: ano (-1 nas de identificação) e métrica ('' nas de identificação)
+        self.anos_coluna = np.asarray(anos_coluna, dtype='int64')
+        self.metricas_coluna = np.asarray(metricas_coluna, dtype=object)
+        self.impressao = impressao
+        self.metricas = ('volume', 'valor') if tipo == VOLUME_VALOR else ('volume',)
+        # Posições de cada métrica, ordenadas por ano
+        self.posicoes = {}
+        for metrica in self.metricas:
+            posicoes = np.flatnonzero(self.metricas_coluna == metrica)
+            self.posicoes[metrica] = posicoes[np.argsort(self.anos_coluna[posicoes], kind='stable')]
+        self.anos = self.anos_coluna[self.posicoes['volume']]
+
+    def posicao(self, coluna):
+        """Posição de uma coluna de identificação."""
+        return self.colunas.index(coluna)
+
+    @property
+    def posicoes_id(self):
+        return [self.posicao(col) for col in self.id_vars]
+
+    def periodo(self, inicio=None, fim=None):
+        """Anos no intervalo [inicio, fim] e as posições de cada métrica nesses anos."""
+        a = 0 if inicio is None else np.searchsorted(self.anos, inicio, side='left')
+        b = len(self.anos) if fim is None else np.searchsorted(self.anos, fim, side='right')
+        return self.anos[a:b], {m: p[a:b] for m, p in self.posicoes.items()}
+
+    def usecols(self, inicio=None, fim=None):
+        """Posições a ler (identificação + anos do período), para o `usecols` do pandas."""
+        _, posicoes = self.periodo(inicio, fim)
+        return sorted(self.posicoes_id + [int(p) for ps in posicoes.values() for p in ps])
+
+    def __repr__(self):
+        anos = f"{self.anos[0]}-{self.anos[-1]}" if len(self.anos) else '-'
+        return f"PlanoLeitura(tipo={self.tipo!r}, sep={self.sep!r}, id_vars={self.id_vars}, anos={anos})"
+
+
+def ler_linha_cabecalho(filepath):
+    """Primeira linha do arquivo, sem BOM nem quebra de linha."""
+    with open(filepath, encoding='utf-8-sig', newline='') as f:
+        return f.readline().rstrip('\r\n')
+
+
+def impressao_cabecalho(linha):
+    """Impressão digital (hash) da linha de cabeçalho."""
+    return hashlib.sha1(linha.encode('utf-8')).hexdigest()
+
+
+def detectar_separador(linha):
+    """Separador mais frequente no cabeçalho, entre tabulação, ';' e ','."""
+    contagens = [linha.count(sep) for sep in SEPARADORES]
+    if not max(contagens):
+        raise LayoutInvalido("Nenhum separador conhecido no cabeçalho")
+    return SEPARADORES[int(np.argmax(contagens))]
+
+
+def inferir_plano(linha, sep=None):
+    """Classifica um cabeçalho e monta o plano de leitura correspondente."""
+    sep = sep or detectar_separador(linha)
+    colunas = [col.strip().strip('"') for col in linha.split(sep)]
+    campos = np.asarray(colunas, dtype=str)
+    e_ano = np.char.isdigit(campos) & (np.char.str_len(campos) == 4)
+    if not e_ano.any():
+        raise LayoutInvalido("Nenhuma coluna de ano no cabeçalho")
+
+    # Identificação: tudo antes da primeira coluna de ano; depois dela só há anos
+    primeiro = int(np.argmax(e_ano))
+    if not e_ano[primeiro:].all():
+        estranhas = campos[primeiro:][~e_ano[primeiro:]]
+        raise LayoutInvalido(f"Colunas que não são anos entre os anos: {estranhas.tolist()}")
+    anos = campos[primeiro:].astype('int64')
+
+    # Cada ano aparece uma vez (simple) ou duas seguidas (Volume e Valor)
+    _, contagem = np.unique(anos, return_counts=True)
+    if (contagem == 1).all():
+        tipo = SIMPLES
+        metricas = np.full(len(anos), 'volume', dtype=object)
+    elif (contagem == 2).all() and (anos[0::2] == anos[1::2]).all():
+        tipo = VOLUME_VALOR
+        metricas = np.tile(np.array(['volume', 'valor'], dtype=object), len(anos) // 2)
+    else:
+        raise LayoutInvalido("Anos repetidos fora do padrão de pares Volume/Valor")
+    if (np.diff(anos[metricas == 'volume']) <= 0).any():
+        raise LayoutInvalido("Anos fora de ordem no cabeçalho")
+
+    id_vars = colunas[:primeiro]
+    anos_coluna = np.concatenate([np.full(primeiro, -1), anos])
+    metricas_coluna = np.concatenate([np.full(primeiro, '', dtype=object), metricas])
+    return PlanoLeitura(colunas, sep, id_vars, tipo, anos_coluna, metricas_coluna,
+                        impressao=impressao_cabecalho(linha))
+
+
+def validar_plano(plano, esperado):
+    """Confere o plano com a configuração esperada (chaves 'sep', 'id_vars' e 'type')."""
+    diferencas = []
+    if 'sep' in esperado and plano.sep != esperado['sep']:
+        diferencas.append(f"separador {plano.sep!r} (esperado {esperado['sep']!r})")
+    if 'id_vars' in esperado and plano.id_vars != list(esperado['id_vars']):
+        diferencas.append(f"colunas de identificação {plano.id_vars} (esperado {esperado['id_vars']})")
+    if 'type' in esperado and plano.tipo != esperado['type']:
+        diferencas.append(f"tipo {plano.tipo!r} (esperado {esperado['type']!r})")
+    if diferencas:
+        raise LayoutInvalido("Layout inesperado: " + '; '.join(diferencas))
+
+
+def plano_arquivo(filepath, esperado=None):
+    """Plano de leitura de um arquivo, do cache quando o cabeçalho não mudou."""
+    linha = ler_linha_cabecalho(filepath)
+    impressao = impressao_cabecalho(linha)
+    anterior = _impressoes.get(filepath)
+    if anterior is not None and anterior != impressao:
+        logging.warning(f"O cabeçalho de {filepath} mudou desde a última leitura; inferindo o layout novamente")
+
+    plano = _planos.get(impressao)
+    if plano is None:
+        plano = inferir_plano(linha, (esperado or {}).get('sep'))
+        _planos[impressao] = plano
+    if esperado:
+        validar_plano(plano, esperado)
+    _impressoes[filepath] = impressao
+    return plano
@@ -0,0 +1,308 @@
+# -*- coding: utf-8 -*-
+"""Métricas operacionais no formato texto do Prometheus (contadores e histogramas).
+
+O coletor, os carregadores e os renderizadores publicam:
+
+    vitibrasil_paginas_buscadas_total{status}            páginas buscadas pelo coletor
+    vitibrasil_http_retentativas_total{motivo}           retentativas do `create_session_with_retries`
+    vitibrasil_bytes_baixados_total                      bytes recebidos nas páginas
+    vitibrasil_linhas_processadas_total{etapa}           linhas lidas/convertidas/agregadas
+    vitibrasil_bytes_processados_total{etapa}            bytes lidos/gravados por etapa
+    vitibrasil_celulas_sentinela_total{arquivo,sentinela} células 'nd', '*', '+' e vazias
+    vitibrasil_graficos_renderizados_total{grafico,resultado}
+    vitibrasil_etapa_duracao_segundos{etapa}             histograma da latência por etapa
+
+A latência, as linhas e os bytes por etapa vêm das etapas de
+`vitibrasil.rastreio` (read, coerce, melt, groupby, render, savefig,
+http_fetch, html_parse): `ativar()` registra um ouvinte nelas, sem guardar
+o rastreio completo.
+
+Exposição, sem dependências além da biblioteca padrão:
+
+- `servir(porta)`: endpoint /metrics em uma thread (o `api.py` também
+  responde em /metrics);
+- `escrever_textfile(caminho)`: arquivo .prom para o textfile collector do
+  node_exporter, gravado de forma atômica (ex.: ao fim do job noturno,
+  `VITIBRASIL_METRICAS=/var/lib/node_exporter/vitibrasil.prom`).
+
+    python -m vitibrasil.metricas --textfile cache/vitibrasil.prom vinicolas2.py
+"""
+
+import argparse
+import atexit
+import http.server
+import math
+import os
+import runpy
+import sys
+import threading
+
+import numpy as np
+
+from vitibrasil import rastreio
+
+ATIVO = False
+TIPO_CONTEUDO = 'text/plain; version=0.0.4; charset=utf-8'
+BUCKETS_PADRAO = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+SENTINELAS = ('nd', '*', '+')
+
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _rotulos(nomes, valores, extra=()):
+    pares = list(zip(nomes, valores)) + list(extra)
+    if not pares:
+        return ''
+    return '{' + ','.join(f'{nome}="{_escapar(valor)}"' for nome, valor in pares) + '}'
+
+
+def _numero(valor):
+    if math.isinf(valor):
+        return '+Inf' if valor > 0 else '-Inf'
+    return repr(float(valor)) if not float(valor).is_integer() else str(int(valor))
+
+
+class Contador:
+    """Contador monotônico, com rótulos opcionais."""
+
+    tipo = 'counter'
+
+    def __init__(self, nome, ajuda, rotulos=()):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.rotulos = tuple(rotulos)
+        self._valores = {}
+        self._trava = threading.Lock()
+
+    def inc(self, quantidade=1, **rotulos):
+        if quantidade < 0:
+            raise ValueError("Contadores só aumentam")
+        chave = tuple(str(rotulos.get(nome, '')) for nome in self.rotulos)
+        with self._trava:
+            self._valores[chave] = self._valores.get(chave, 0) + quantidade
+
+    def valor(self, **rotulos):
+        return self._valores.get(tuple(str(rotulos.get(nome, '')) for nome in self.rotulos), 0)
+
+    def amostras(self):
+        with self._trava:
+            itens = sorted(self._valores.items())
+        if not itens and not self.rotulos:
+            itens = [((), 0)]
+        return [f'{self.nome}{_rotulos(self.rotulos, chave)} {_numero(valor)}' for chave, valor in itens]
+
+
+class Histograma:
+    """Histograma cumulativo (buckets `le`, soma e contagem), com rótulos opcionais."""
+
+    tipo = 'histogram'
+
+    def __init__(self, nome, ajuda, rotulos=(), buckets=BUCKETS_PADRAO):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.rotulos = tuple(rotulos)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._series = {}
+        self._trava = threading.Lock()
+
+    def observar(self, valor, **rotulos):
+        chave = tuple(str(rotulos.get(nome, '')) for nome in self.rotulos)
+        posicao = int(np.searchsorted(self.buckets, valor, side='left'))
+        with self._trava:
+            serie = self._series.setdefault(chave, [[0] * len(self.buckets), 0.0, 0])
+            serie[0][posicao] += 1
+            serie[1] += valor
+            serie[2] += 1
+
+    def amostras(self):
+        with self._trava:
+            itens = sorted((chave, (list(c), s, n)) for chave, (c, s, n) in self._series.items())
+        linhas = []
+        for chave, (contagens, soma, total) in itens:
+            acumulado = 0
+            for limite, contagem in zip(self.buckets, contagens):
+                acumulado += contagem
+                linhas.append(f"{self.nome}_bucket{_rotulos(self.rotulos, chave, [('le', _numero(limite))])} {acumulado}")
+            linhas.append(f'{self.nome}_sum{_rotulos(self.rotulos, chave)} {_numero(soma)}')
+            linhas.append(f'{self.nome}_count{_rotulos(self.rotulos, chave)} {total}')
+        return linhas
+
+
+class Registro:
+    """Conjunto de métricas exportadas juntas."""
+
+    def __init__(self):
+        self.metricas = {}
+
+    def registrar(self, metrica):
+        if metrica.nome in self.metricas:
+            raise ValueError(f"Métrica já registrada: {metrica.nome}")
+        self.metricas[metrica.nome] = metrica
+        return metrica
+
+    def contador(self, nome, ajuda, rotulos=()):
+        return self.registrar(Contador(nome, ajuda, rotulos))
+
+    def histograma(self, nome, ajuda, rotulos=(), buckets=BUCKETS_PADRAO):
+        return self.registrar(Histograma(nome, ajuda, rotulos, buckets))
+
+    def texto(self):
+        """Todas as métricas no formato de exposição de texto (0.0.4)."""
+        linhas = []
+        for metrica in self.metricas.values():
+            linhas.append(f'# HELP {metrica.nome} {metrica.ajuda}')
+            linhas.append(f'# TYPE {metrica.nome} {metrica.tipo}')
+            linhas.extend(metrica.amostras())
+        return '\n'.join(linhas) + '\n'
+
+
+REGISTRO = Registro()
+
+PAGINAS = REGISTRO.contador('vitibrasil_paginas_buscadas_total', 'Páginas buscadas pelo coletor', ['status'])
+RETENTATIVAS = REGISTRO.contador('vitibrasil_http_retentativas_total',
+                                 'Retentativas HTTP feitas pela sessão do coletor', ['motivo'])
+BYTES_BAIXADOS = REGISTRO.contador('vitibrasil_bytes_baixados_total', 'Bytes recebidos pelo coletor')
+LINHAS = REGISTRO.contador('vitibrasil_linhas_processadas_total', 'Linhas processadas por etapa', ['etapa'])
+BYTES = REGISTRO.contador('vitibrasil_bytes_processados_total', 'Bytes lidos ou gravados por etapa', ['etapa'])
+CELULAS_SENTINELA = REGISTRO.contador('vitibrasil_celulas_sentinela_total',
+                                      "Células com 'nd', '*', '+' ou vazias nos arquivos lidos",
+                                      ['arquivo', 'sentinela'])
+GRAFICOS = REGISTRO.contador('vitibrasil_graficos_renderizados_total', 'Gráficos renderizados',
+                             ['grafico', 'resultado'])
+DURACAO_ETAPA = REGISTRO.histograma('vitibrasil_etapa_duracao_segundos', 'Duração de cada etapa do pipeline',
+                                    ['etapa'])
+ERROS_ETAPA = REGISTRO.contador('vitibrasil_etapa_erros_total', 'Etapas encerradas com exceção', ['etapa'])
+
+
+def _observar_etapa(evento):
+    """Ouvinte das etapas do `rastreio`: latência, linhas, bytes e erros."""
+    etapa = evento['etapa']
+    DURACAO_ETAPA.observar(evento['parede_ms'] / 1000, etapa=etapa)
+    if evento['linhas']:
+        LINHAS.inc(evento['linhas'], etapa=etapa)
+    if evento['bytes']:
+        BYTES.inc(evento['bytes'], etapa=etapa)
+    if evento['erro']:
+        ERROS_ETAPA.inc(etapa=etapa)
+
+
+def ativar(bibliotecas=False):
+    """Liga as métricas por etapa (e a contagem de sentinelas nos carregadores).
+
+    Com `bibliotecas=True`, as chamadas de pandas/matplotlib/requests de
+    scripts fora do pacote também viram etapas (ver `rastreio.instrumentar`).
+    """
+    global ATIVO
+    ATIVO = True
+    rastreio.ouvir(_observar_etapa)
+    if bibliotecas:
+        rastreio.instrumentar()
+
+
+def contar_sentinelas(textos, arquivo):
+    """Conta as sentinelas em uma matriz de texto lida de `arquivo` (só com as métricas ligadas)."""
+    if not ATIVO:
+        return
+    import pandas as pd
+    textos = np.asarray(textos, dtype=object)
+    # O read_csv já entrega os campos vazios como NaN
+    vazias = int(pd.isna(textos).sum())
+    if vazias:
+        CELULAS_SENTINELA.inc(vazias, arquivo=arquivo, sentinela='vazia')
+    for sentinela in SENTINELAS:
+        quantidade = int((textos == sentinela).sum())
+        if quantidade:
+            CELULAS_SENTINELA.inc(quantidade, arquivo=arquivo, sentinela=sentinela)
+
+
+def retry_contado(**parametros):
+    """`urllib3.Retry` que conta cada retentativa em `vitibrasil_http_retentativas_total`."""
+    from urllib3.util.retry import Retry
+
+    class RetryContado(Retry):
+        def increment(self, method=None, url=None, response=None, error=None, _pool=None, _stacktrace=None):
+            if error is not None:
+                motivo = type(error).__name__
+            else:
+                motivo = f'status_{response.status}' if response is not None else 'desconhecido'
+            RETENTATIVAS.inc(motivo=motivo)
+            return super().increment(method, url, response, error, _pool, _stacktrace)
+
+    return RetryContado(**parametros)
+
+
+def registrar_pagina(response):
+    """Conta uma página buscada (status HTTP) e os bytes recebidos."""
+    PAGINAS.inc(status=response.status_code)
+    BYTES_BAIXADOS.inc(len(response.content))
+
+
+def texto():
+    return REGISTRO.texto()
+
+
+def escrever_textfile(caminho):
+    """Grava as métricas para o textfile collector (arquivo temporário + rename atômico)."""
+    os.makedirs(os.path.dirname(caminho) or '.', exist_ok=True)
+    temporario = f'{caminho}.{os.getpid()}.tmp'
+    with open(temporario, 'w', encoding='utf-8') as f:
+        f.write(texto())
+    os.replace(temporario, caminho)
+    return caminho
+
+
+class _Atendente(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        corpo = texto().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', TIPO_CONTEUDO)
+        self.send_header('Content-Length', str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def log_message(self, *args):
+        pass
+
+
+def servir(porta=9108, host='127.0.0.1'):
+    """Expõe /metrics em uma thread daemon; retorna o servidor (use `.shutdown()` para parar)."""
+    servidor = http.server.ThreadingHTTPServer((host, porta), _Atendente)
+    threading.Thread(target=servidor.serve_forever, daemon=True, name='metricas').start()
+    return servidor
+
+
+# VITIBRASIL_METRICAS=arquivo.prom liga as métricas e grava o textfile ao fim do processo
+if os.environ.get('VITIBRASIL_METRICAS'):
+    ativar(bibliotecas=True)
+    atexit.register(escrever_textfile, os.environ['VITIBRASIL_METRICAS'])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Roda um script com as métricas ligadas.')
+    parser.add_argument('--textfile', default=os.path.join('cache', 'vitibrasil.prom'),
+                        help='Arquivo .prom gravado ao final (textfile collector)')
+    parser.add_argument('--porta', type=int, help='Também expõe /metrics nesta porta durante a execução')
+    parser.add_argument('script', help='Script a executar (ex.: vinicolas2.py)')
+    parser.add_argument('argumentos', nargs=argparse.REMAINDER, help='Argumentos do script')
+    args = parser.parse_args(argv)
+
+    ativar(bibliotecas=True)
+    servidor = servir(args.porta) if args.porta else None
+    sys.argv = [args.script] + args.argumentos
+    sys.path.insert(0, os.path.dirname(os.path.abspath(args.script)))
+    try:
+        runpy.run_path(args.script, run_name='__main__')
+    finally:
+        print(f"Métricas gravadas em {escrever_textfile(args.textfile)}", file=sys.stderr)
+        if servidor is not None:
+            servidor.shutdown()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
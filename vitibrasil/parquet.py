@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+"""Conjunto canônico no formato longo, gravado em Parquet particionado por produto e ano.
+
+Uma linha por (produto, subproduto, país, ano, métrica):
+
+    produto           'vinho', 'espumante', 'uva', 'suco' (exportação) ou a
+                      categoria do Producao.csv (ex.: 'VINHO DE MESA')
+    subproduto        produto do Producao.csv (ex.: 'Tinto'); nulo na exportação
+    pais              país de destino; 'Brasil' na produção
+    ano
+    metrica           'volume_exportado' (kg), 'valor_exportado' (US$) ou
+                      'volume_produzido' (L)
+    valor             nulo quando o arquivo traz 'nd', '*', '+' ou vazio
+    codigo_qualidade  'presente', 'zero', 'nd', '*', '+' ou 'ausente'
+                      (os códigos de `vitibrasil.compacto`)
+
+Os arquivos ficam em partições no estilo Hive
+(`cache/parquet/produto=vinho/ano=2024/parte-0.parquet`), com estatísticas
+de coluna e codificação por dicionário nas colunas de texto. Quem lê com
+pyarrow, DuckDB, Spark ou polars abre só as partições do filtro e pula
+row groups pelas estatísticas:
+
+    from vitibrasil import parquet
+    parquet.ler(produto='vinho', anos=(2015, 2023), metrica='valor_exportado')
+
+    python -m vitibrasil parquet                 # regrava tudo
+    python -m vitibrasil parquet --inicio 2024   # só as partições de 2024 em diante
+"""
+
+import argparse
+import json
+import logging
+import os
+import shutil
+import sys
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+from vitibrasil import compacto, dados
+
+DIRETORIO = os.path.join(dados.CACHE_PATH, 'parquet')
+COMPRESSAO = 'zstd'
+COLUNAS = ['produto', 'subproduto', 'pais', 'ano', 'metrica', 'valor', 'codigo_qualidade']
+COLUNAS_DICIONARIO = ['subproduto', 'pais', 'metrica', 'codigo_qualidade']
+METRICAS_EXPORTACAO = {'volume': 'volume_exportado', 'valor': 'valor_exportado'}
+METRICA_PRODUCAO = 'volume_produzido'
+UNIDADES = {'volume_exportado': 'kg', 'valor_exportado': 'US$', 'volume_produzido': 'L'}
+PAIS_PRODUCAO = 'Brasil'
+
+PARTICOES = pa.schema([('produto', pa.string()), ('ano', pa.int16())])
+ESQUEMA = pa.schema([
+    ('produto', pa.string()),
+    ('subproduto', pa.string()),
+    ('pais', pa.string()),
+    ('ano', pa.int16()),
+    ('metrica', pa.string()),
+    ('valor', pa.float64()),
+    ('codigo_qualidade', pa.string()),
+], metadata={
+    'vitibrasil.unidades': json.dumps(UNIDADES, ensure_ascii=False),
+    'vitibrasil.codigos_qualidade': json.dumps(list(compacto.NOMES_CODIGOS.values()), ensure_ascii=False),
+})
+
+_INFORMADOS = (compacto.PRESENTE, compacto.ZERO)
+_NOMES_CODIGOS = np.array([compacto.NOMES_CODIGOS[c] for c in sorted(compacto.NOMES_CODIGOS)], dtype=object)
+
+
+def _por_linha(valor, linhas, anos):
+    """Repete um valor por linha (ou um escalar) para cada célula linha x ano."""
+    if np.ndim(valor) == 0:
+        return np.full(linhas * anos, valor, dtype=object)
+    return np.repeat(valor, anos)
+
+
+def _longo(matriz, produto, subprodutos, paises, metrica):
+    """Desempilha uma MatrizCompacta (linhas x anos) nas colunas do conjunto canônico."""
+    linhas, anos = matriz.codigos.shape
+    informado = np.isin(matriz.codigos, _INFORMADOS)
+    return pd.DataFrame({
+        'produto': _por_linha(produto, linhas, anos),
+        'subproduto': _por_linha(subprodutos, linhas, anos),
+        'pais': _por_linha(paises, linhas, anos),
+        'ano': np.tile(matriz.anos, linhas),
+        'metrica': metrica,
+        'valor': np.where(informado, matriz.valores, np.nan).ravel(),
+        'codigo_qualidade': matriz.codigos.ravel(),
+    })
+
+
+def _consolidar(longo):
+    """Soma linhas repetidas da mesma chave (países repetidos no arquivo, como em `dados`).
+
+    O valor fica nulo se nenhuma das linhas tinha número; o código é o de
+    melhor informação entre elas (o menor).
+    """
+    chave = ['produto', 'subproduto', 'pais', 'ano', 'metrica']
+    if not longo.duplicated(chave).any():
+        return longo
+    return longo.groupby(chave, as_index=False, sort=False, dropna=False).agg(
+        valor=('valor', lambda v: v.sum(min_count=1)), codigo_qualidade=('codigo_qualidade', 'min'))
+
+
+def tabela_exportacao(produto, base_path=None, inicio=None, fim=None):
+    """Exportação de um produto no formato canônico."""
+    matrizes = compacto.carregar(produto, base_path, inicio, fim)
+    paises = matrizes['volume'].linhas['País'].to_numpy()
+    partes = [_longo(matriz, produto, None, paises, METRICAS_EXPORTACAO[metrica])
+              for metrica, matriz in matrizes.items()]
+    return _consolidar(pd.concat(partes, ignore_index=True))
+
+
+def tabela_producao(base_path=None, inicio=None, fim=None):
+    """Produção (só as linhas de produto, sem os totais de categoria) no formato canônico."""
+    matriz = compacto.carregar('producao', base_path, inicio, fim)['volume']
+    control = matriz.linhas['control']
+    # Linhas de categoria não têm prefixo no `control` e são a soma dos filhos
+    e_produto = control.str.contains('_', regex=False).to_numpy()
+    categorias = control.str.split('_', n=1).str[0].str.lower().map(dados.prefixos_categoria).to_numpy()
+    filhos = compacto.MatrizCompacta(matriz.valores[e_produto], matriz.codigos[e_produto],
+                                     matriz.linhas[e_produto], matriz.anos, matriz.metrica)
+    longo = _longo(filhos, categorias[e_produto], filhos.linhas['produto'].to_numpy(),
+                   PAIS_PRODUCAO, METRICA_PRODUCAO)
+    return _consolidar(longo)
+
+
+def tabela_longa(base_path=None, inicio=None, fim=None):
+    """Exportação de todos os produtos e produção em uma única tabela canônica."""
+    partes = []
+    for produto in dados.produtos_exportacao():
+        try:
+            partes.append(tabela_exportacao(produto, base_path, inicio, fim))
+        except FileNotFoundError:
+            logging.error(f"Erro: Arquivo não encontrado em {dados.caminho_arquivo(produto, base_path)}")
+    try:
+        partes.append(tabela_producao(base_path, inicio, fim))
+    except FileNotFoundError:
+        logging.error(f"Erro: Arquivo não encontrado em {dados.caminho_arquivo('producao', base_path)}")
+    longo = pd.concat(partes, ignore_index=True)
+    longo['codigo_qualidade'] = _NOMES_CODIGOS[longo['codigo_qualidade'].to_numpy(dtype='int64')]
+    # Ordenadas dentro de cada partição: estatísticas de min/max mais seletivas por métrica e país
+    return longo.sort_values(['produto', 'ano', 'metrica', 'pais', 'subproduto'], ignore_index=True)[COLUNAS]
+
+
+def opcoes_escrita(compressao=COMPRESSAO):
+    return ds.ParquetFileFormat().make_write_options(
+        compression=compressao, use_dictionary=COLUNAS_DICIONARIO, write_statistics=True)
+
+
+def gravar(longo, destino=DIRETORIO, compressao=COMPRESSAO, substituir_tudo=True):
+    """Grava a tabela canônica particionada por produto e ano.
+
+    Com `substituir_tudo`, o conjunto é escrito ao lado e trocado no fim (quem
+    está lendo nunca vê metade de uma gravação); sem, só as partições
+    presentes em `longo` são substituídas.
+    """
+    tabela = pa.Table.from_pandas(longo, schema=ESQUEMA, preserve_index=False)
+    alvo = f'{destino}.tmp' if substituir_tudo else destino
+    if substituir_tudo:
+        shutil.rmtree(alvo, ignore_errors=True)
+    ds.write_dataset(
+        tabela, alvo, format='parquet', file_options=opcoes_escrita(compressao),
+        partitioning=ds.partitioning(PARTICOES, flavor='hive'),
+        basename_template='parte-{i}.parquet', existing_data_behavior='delete_matching')
+    if substituir_tudo:
+        antigo = f'{destino}.antigo'
+        shutil.rmtree(antigo, ignore_errors=True)
+        if os.path.exists(destino):
+            os.replace(destino, antigo)
+        os.replace(alvo, destino)
+        shutil.rmtree(antigo, ignore_errors=True)
+    return destino
+
+
+def conjunto(destino=DIRETORIO):
+    """Dataset pyarrow do conjunto gravado (partições produto/ano reconhecidas)."""
+    return ds.dataset(destino, format='parquet', schema=ESQUEMA,
+                      partitioning=ds.partitioning(PARTICOES, flavor='hive'))
+
+
+def filtro(produto=None, anos=None, metrica=None, pais=None):
+    """Expressão de filtro; produto e ano podam partições, as demais usam as estatísticas."""
+    condicoes = []
+    for coluna, valor in (('produto', produto), ('metrica', metrica), ('pais', pais)):
+        if valor is None:
+            continue
+        valores = [valor] if isinstance(valor, str) else list(valor)
+        condicoes.append(ds.field(coluna).isin(valores))
+    if anos is not None:
+        inicio, fim = anos
+        condicoes.append((ds.field('ano') >= inicio) & (ds.field('ano') <= fim))
+    expressao = None
+    for condicao in condicoes:
+        expressao = condicao if expressao is None else expressao & condicao
+    return expressao
+
+
+def ler(destino=DIRETORIO, colunas=None, produto=None, anos=None, metrica=None, pais=None):
+    """Lê só as partições e colunas pedidas do conjunto canônico (DataFrame)."""
+    tabela = conjunto(destino).to_table(columns=colunas, filter=filtro(produto, anos, metrica, pais))
+    return tabela.to_pandas()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Grava o conjunto canônico (formato longo) em Parquet particionado.')
+    parser.add_argument('--base', default=None, help='Pasta com os arquivos de origem')
+    parser.add_argument('--saida', default=DIRETORIO, help='Pasta do conjunto Parquet')
+    parser.add_argument('--inicio', type=int, default=None,
+                        help='Primeiro ano a regravar (só essas partições são substituídas)')
+    parser.add_argument('--fim', type=int, default=None, help='Último ano a regravar')
+    parser.add_argument('--compressao', default=COMPRESSAO, help='Codec do Parquet (zstd, snappy, gzip, none)')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    longo = tabela_longa(args.base, args.inicio, args.fim)
+    parcial = args.inicio is not None or args.fim is not None
+    destino = gravar(longo, args.saida, args.compressao, substituir_tudo=not parcial)
+
+    arquivos = [os.path.join(raiz, nome) for raiz, _, nomes in os.walk(destino) for nome in nomes]
+    tamanho = sum(os.path.getsize(caminho) for caminho in arquivos)
+    print(f"{len(longo)} linhas em {len(arquivos)} arquivo(s) ({tamanho / 1024:.0f} KiB) em {destino}")
+    resumo = longo.groupby(['produto', 'metrica'])['ano'].agg(['min', 'max', 'size'])
+    print(resumo.rename(columns={'min': 'de', 'max': 'até', 'size': 'linhas'}).to_string())
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
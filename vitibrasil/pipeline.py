@@ -0,0 +1,521 @@
+# -*- coding: utf-8 -*-
+"""Pipeline incremental: leitura -> normalização -> cubo -> agregados -> gráficos.
+
+Cada etapa declara as entradas (arquivos de origem ou artefatos de outras
+etapas) e as saídas (artefatos em `cache/pipeline/`). Todo arquivo é
+identificado pelo hash (sha256) do conteúdo; a chave de uma etapa combina o
+código da função, os parâmetros e os hashes das entradas. Na execução:
+
+- etapas cuja chave não mudou (e com as saídas no disco) não rodam;
+- uma etapa que roda e produz saídas idênticas às anteriores não invalida
+  as seguintes (ex.: corrigir um valor de 1995 refaz o cubo e os agregados do
+  produto, mas os gráficos dos últimos anos ficam como estão);
+- etapas independentes rodam em paralelo (`--processos`).
+
+O grafo padrão, por produto de exportação (vinho, espumante, uva, suco):
+
+    Exp*.csv -> parse:P -> normaliza:P -> cubo:P -> agregados:P -> agregados:correlacao
+                                                -> recorte:G:P -> grafico:G:P
+
+e, para a produção, Producao.csv -> parse -> normaliza -> agregados / recorte
+-> grafico:producao_top, além do mapa (brazil_states.geojson). A raspagem
+(vinicolas2.py) só roda com `--buscar`, antes do grafo: os CSVs que ela grava
+entram como arquivos de origem (o site não tem como ser "hasheado").
+
+    python -m vitibrasil pipeline
+    python -m vitibrasil pipeline --alvos 'grafico:*:suco' --processos 4
+    python -m vitibrasil pipeline --listar
+"""
+
+import argparse
+import concurrent.futures
+import fnmatch
+import hashlib
+import inspect
+import io
+import json
+import logging
+import os
+import pickle
+import subprocess
+import sys
+import time
+import types
+
+import pandas as pd
+
+from vitibrasil import crescimento, dados, rastreio, visoes
+
+DIRETORIO = os.path.join(dados.CACHE_PATH, 'pipeline')
+ARQUIVO_ESTADO = 'estado.json'
+# Gráficos por produto de exportação -> anos no recorte
+GRAFICOS_EXPORTACAO = {'top_exportacao': 9, 'tendencia_exportacao': 15}
+ANOS_PRODUCAO_TOP = 10
+ANOS_CRESCIMENTO = 15
+
+
+def hash_bytes(conteudo):
+    return hashlib.sha256(conteudo).hexdigest()
+
+
+def hash_arquivo(caminho, bloco=1 << 20):
+    h = hashlib.sha256()
+    with open(caminho, 'rb') as f:
+        while parte := f.read(bloco):
+            h.update(parte)
+    return h.hexdigest()
+
+
+class Etapa:
+    """Uma etapa do grafo: `funcao(entradas, **parametros)` -> {saida: objeto}.
+
+    `entradas` são caminhos de arquivos de origem ou nomes de artefatos
+    produzidos por outras etapas; `saidas` são nomes de artefatos (caminhos
+    relativos à pasta do pipeline). Artefatos `.pkl` são gravados com pickle
+    e os demais (ex.: `.png`) recebem os bytes devolvidos pela função.
+    """
+
+    def __init__(self, nome, funcao, entradas, saidas, versao=1, **parametros):
+        self.nome = nome
+        self.funcao = funcao
+        self.entradas = list(entradas)
+        self.saidas = list(saidas)
+        self.versao = versao
+        self.parametros = parametros
+
+    def __repr__(self):
+        return f"Etapa({self.nome!r}, {self.entradas} -> {self.saidas})"
+
+    def assinatura_codigo(self):
+        """Hash do código da função e dos parâmetros (mudou o código, a etapa roda de novo)."""
+        try:
+            codigo = inspect.getsource(self.funcao)
+        except (OSError, TypeError):
+            codigo = f'{self.funcao.__module__}.{self.funcao.__qualname__}'
+        parametros = json.dumps(self.parametros, sort_keys=True, default=str)
+        return hash_bytes(f'{codigo}\n{self.versao}\n{parametros}'.encode('utf-8'))
+
+
+def carregar_artefato(caminho):
+    """Objeto de um artefato `.pkl`; para os demais arquivos, o próprio caminho."""
+    if caminho.endswith('.pkl'):
+        with open(caminho, 'rb') as f:
+            return pickle.load(f)
+    return caminho
+
+
+def gravar_artefato(caminho, objeto):
+    """Grava o artefato de forma atômica e retorna o hash do conteúdo."""
+    conteudo = objeto if isinstance(objeto, bytes) else pickle.dumps(objeto, protocol=pickle.HIGHEST_PROTOCOL)
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    temporario = f'{caminho}.{os.getpid()}.tmp'
+    with open(temporario, 'wb') as f:
+        f.write(conteudo)
+    os.replace(temporario, caminho)
+    return hash_bytes(conteudo)
+
+
+def executar_etapa(etapa, diretorio):
+    """Roda uma etapa (no processo atual ou em um processo do pool) e grava as saídas."""
+    inicio = time.perf_counter()
+    entradas = {nome: carregar_artefato(os.path.join(diretorio, nome)) if not os.path.isabs(nome) else nome
+                for nome in etapa.entradas}
+    with rastreio.etapa('pipeline', etapa=etapa.nome):
+        resultado = etapa.funcao(entradas, **etapa.parametros)
+    faltando = set(etapa.saidas) - set(resultado)
+    if faltando:
+        raise RuntimeError(f"Etapa {etapa.nome} não produziu: {', '.join(sorted(faltando))}")
+    saidas = {nome: gravar_artefato(os.path.join(diretorio, nome), resultado[nome]) for nome in etapa.saidas}
+    return {'saidas': saidas, 'duracao_s': time.perf_counter() - inicio}
+
+
+def _executar_local(etapa, diretorio):
+    """Mesmo contrato do pool (um Future), mas rodando já no processo atual."""
+    futuro = concurrent.futures.Future()
+    try:
+        futuro.set_result(executar_etapa(etapa, diretorio))
+    except Exception as erro:
+        futuro.set_exception(erro)
+    return futuro
+
+
+class Pipeline:
+    """Grafo de etapas com estado persistido (hashes de entradas e saídas) em `estado.json`."""
+
+    def __init__(self, etapas, diretorio=DIRETORIO):
+        self.etapas = {etapa.nome: etapa for etapa in etapas}
+        self.diretorio = diretorio
+        self.produtor = {}
+        for etapa in etapas:
+            for saida in etapa.saidas:
+                if saida in self.produtor:
+                    raise ValueError(f"Artefato {saida} produzido por {self.produtor[saida]} e {etapa.nome}")
+                self.produtor[saida] = etapa.nome
+        self.dependencias = {etapa.nome: {self.produtor[e] for e in etapa.entradas if e in self.produtor}
+                             for etapa in etapas}
+        self.estado = self._ler_estado()
+
+    # --- Estado ---
+
+    def _ler_estado(self):
+        caminho = os.path.join(self.diretorio, ARQUIVO_ESTADO)
+        if not os.path.exists(caminho):
+            return {'fontes': {}, 'etapas': {}}
+        with open(caminho, encoding='utf-8') as f:
+            return json.load(f)
+
+    def _gravar_estado(self):
+        os.makedirs(self.diretorio, exist_ok=True)
+        caminho = os.path.join(self.diretorio, ARQUIVO_ESTADO)
+        temporario = f'{caminho}.tmp'
+        with open(temporario, 'w', encoding='utf-8') as f:
+            json.dump(self.estado, f, ensure_ascii=False, indent=1, sort_keys=True)
+        os.replace(temporario, caminho)
+
+    def hash_fonte(self, caminho):
+        """Hash de um arquivo de origem, relido só se o mtime ou o tamanho mudou."""
+        info = os.stat(caminho)
+        registro = self.estado['fontes'].get(caminho)
+        if registro and registro[:2] == [info.st_mtime_ns, info.st_size]:
+            return registro[2]
+        valor = hash_arquivo(caminho)
+        self.estado['fontes'][caminho] = [info.st_mtime_ns, info.st_size, valor]
+        return valor
+
+    # --- Grafo ---
+
+    def selecionar(self, alvos=None):
+        """Etapas cujo nome casa com algum padrão de `alvos`, mais todas as que elas precisam."""
+        if not alvos:
+            return set(self.etapas)
+        pendentes = [nome for nome in self.etapas if any(fnmatch.fnmatchcase(nome, alvo) for alvo in alvos)]
+        selecionadas = set()
+        while pendentes:
+            nome = pendentes.pop()
+            if nome not in selecionadas:
+                selecionadas.add(nome)
+                pendentes.extend(self.dependencias[nome])
+        return selecionadas
+
+    def afetadas(self, arquivos):
+        """Etapas que leem algum dos arquivos de origem e todas as que dependem delas."""
+        arquivos = {os.path.abspath(caminho) for caminho in arquivos}
+        dependentes = {nome: set() for nome in self.etapas}
+        for nome, dependencias in self.dependencias.items():
+            for dependencia in dependencias:
+                dependentes[dependencia].add(nome)
+        pendentes = [nome for nome, etapa in self.etapas.items() if arquivos & set(etapa.entradas)]
+        afetadas = set()
+        while pendentes:
+            nome = pendentes.pop()
+            if nome not in afetadas:
+                afetadas.add(nome)
+                pendentes.extend(dependentes[nome])
+        return afetadas
+
+    def ordem(self, nomes=None):
+        """Ordem topológica (estável pelo nome) das etapas."""
+        nomes = set(self.etapas) if nomes is None else set(nomes)
+        feitas, resultado = set(), []
+        while len(resultado) < len(nomes):
+            prontas = sorted(n for n in nomes - feitas if self.dependencias[n] & nomes <= feitas)
+            if not prontas:
+                raise ValueError(f"Ciclo no grafo entre: {', '.join(sorted(nomes - feitas))}")
+            resultado.extend(prontas)
+            feitas.update(prontas)
+        return resultado
+
+    def chave(self, etapa, hashes):
+        """Chave de cache da etapa: código, parâmetros e hash de cada entrada."""
+        partes = [etapa.assinatura_codigo()]
+        for entrada in etapa.entradas:
+            valor = hashes[entrada] if entrada in self.produtor else self.hash_fonte(entrada)
+            partes.append(f'{entrada}={valor}')
+        return hash_bytes('\n'.join(partes).encode('utf-8'))
+
+    def atualizada(self, etapa, chave):
+        registro = self.estado['etapas'].get(etapa.nome)
+        return (registro is not None and registro['chave'] == chave
+                and set(registro['saidas']) == set(etapa.saidas)
+                and all(os.path.exists(os.path.join(self.diretorio, s)) for s in etapa.saidas))
+
+    # --- Execução ---
+
+    def executar(self, alvos=None, processos=1, forcar=False):
+        """Roda as etapas necessárias; retorna {etapa: (situação, duração em s)}.
+
+        Situações: 'executada', 'sem mudança' (rodou e gerou as mesmas saídas),
+        'atual' (não precisou rodar), 'falhou' e 'bloqueada' (uma dependência falhou).
+        """
+        selecionadas = self.selecionar(alvos)
+        pendentes = set(selecionadas)
+        hashes, relatorio, em_andamento = {}, {}, {}
+        ok = set()
+
+        pool = concurrent.futures.ProcessPoolExecutor(processos) if processos > 1 else None
+        try:
+            while pendentes or em_andamento:
+                for nome in self.ordem(pendentes):
+                    dependencias = self.dependencias[nome] & selecionadas
+                    if any(relatorio.get(d, ('',))[0] in ('falhou', 'bloqueada') for d in dependencias):
+                        pendentes.discard(nome)
+                        relatorio[nome] = ('bloqueada', 0.0)
+                        continue
+                    if not dependencias <= ok:
+                        continue
+                    pendentes.discard(nome)
+                    etapa = self.etapas[nome]
+                    try:
+                        chave = self.chave(etapa, hashes)
+                    except OSError as erro:
+                        logging.error(f"{nome}: entrada indisponível ({erro})")
+                        relatorio[nome] = ('falhou', 0.0)
+                        continue
+                    if not forcar and self.atualizada(etapa, chave):
+                        hashes.update(self.estado['etapas'][nome]['saidas'])
+                        relatorio[nome] = ('atual', 0.0)
+                        ok.add(nome)
+                        continue
+                    futuro = (pool.submit(executar_etapa, etapa, self.diretorio) if pool
+                              else _executar_local(etapa, self.diretorio))
+                    em_andamento[futuro] = (nome, chave)
+                    if pool is None:
+                        break
+
+                if not em_andamento:
+                    continue
+                prontos, _ = concurrent.futures.wait(em_andamento, return_when=concurrent.futures.FIRST_COMPLETED)
+                for futuro in prontos:
+                    nome, chave = em_andamento.pop(futuro)
+                    try:
+                        resultado = futuro.result()
+                    except Exception:
+                        logging.exception(f"Etapa {nome} falhou")
+                        relatorio[nome] = ('falhou', 0.0)
+                        continue
+                    anteriores = self.estado['etapas'].get(nome, {}).get('saidas')
+                    situacao = 'sem mudança' if anteriores == resultado['saidas'] else 'executada'
+                    relatorio[nome] = (situacao, resultado['duracao_s'])
+                    hashes.update(resultado['saidas'])
+                    self.estado['etapas'][nome] = {'chave': chave, 'saidas': resultado['saidas']}
+                    ok.add(nome)
+                    self._gravar_estado()
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+            self._gravar_estado()
+        return relatorio
+
+
+# --- Funções das etapas ---
+
+def ler_exportacao(entradas, produto, base_path=None):
+    _, plano, anos, valores, df = dados.ler_periodo(produto, base_path)
+    paises = df[plano.posicao('País')].str.strip().to_numpy()
+    return {f'parse/{produto}.pkl': {'anos': anos, 'paises': paises, 'valores': valores}}
+
+
+def normalizar_exportacao(entradas, produto):
+    lido = entradas[f'parse/{produto}.pkl']
+    longo = dados.normalizar_exportacao(produto, lido['paises'], lido['anos'], lido['valores'])
+    return {f'longo/{produto}.pkl': longo}
+
+
+def montar_cubo(entradas, produto):
+    return {f'cubo/{produto}.pkl': dados.cubo_exportacao(entradas[f'longo/{produto}.pkl'])}
+
+
+def agregar_exportacao(entradas, produto):
+    """Totais anuais, preço médio por país, crescimento recente e rankings de todas as janelas."""
+    from vitibrasil.preco import CuboPreco
+    cubo = entradas[f'cubo/{produto}.pkl']
+    anos = cubo['valor'].columns.to_numpy(dtype='int64')
+    fim = int(anos[-1])
+    inicio = max(int(anos[0]), fim - ANOS_CRESCIMENTO + 1)
+    paises = cubo['valor'].index.get_level_values('pais').to_numpy()
+    matrizes = {metrica: cubo[metrica].fillna(0).to_numpy(dtype='float64') for metrica in visoes.METRICAS}
+    return {f'agregados/{produto}.pkl': {
+        'totais': pd.DataFrame({metrica: cubo[metrica].sum(axis=0) for metrica in visoes.METRICAS}),
+        'preco': CuboPreco.de_cubo(cubo).agregar(por='pais'),
+        'crescimento': crescimento.metricas_crescimento(cubo['volume'], cubo['valor'], inicio, fim),
+        'rankings': visoes.calcular_rankings(produto, paises, anos, matrizes,
+                                             {janela: anos for janela in visoes.JANELAS}),
+    }}
+
+
+def correlacionar(entradas):
+    """Correlação entre os faturamentos anuais dos produtos (como o combined_df do juan.py)."""
+    from vitibrasil.correlacao import CorrelacaoIncremental
+    totais = pd.DataFrame({os.path.splitext(os.path.basename(nome))[0]: agregados['totais']['valor']
+                           for nome, agregados in entradas.items()})
+    return {'agregados/correlacao.pkl': CorrelacaoIncremental.de_dataframe(totais).matriz()}
+
+
+def recortar_cubo(entradas, produto, grafico, anos):
+    """Só os últimos `anos` do cubo: o gráfico não muda se a correção foi em anos anteriores."""
+    cubo = entradas[f'cubo/{produto}.pkl']
+    fim = int(cubo['valor'].columns[-1])
+    inicio = fim - anos + 1
+    return {f'recortes/{grafico}-{produto}.pkl': {
+        'parametros': {'produto': produto, 'inicio': inicio, 'fim': fim},
+        'cubo': {metrica: m.loc[:, inicio:fim] for metrica, m in cubo.items()},
+    }}
+
+
+def ler_producao(entradas, base_path=None):
+    _, plano, anos, valores, df = dados.ler_periodo('producao', base_path)
+    return {'parse/producao.pkl': {'anos': anos, 'valores': valores,
+                                   'control': df[plano.posicao('control')].to_numpy(),
+                                   'nomes': df[plano.posicao('produto')].str.strip().to_numpy()}}
+
+
+def normalizar_producao(entradas):
+    lido = entradas['parse/producao.pkl']
+    longo = dados.normalizar_producao(lido['control'], lido['nomes'], lido['anos'], lido['valores']['volume'])
+    return {'longo/producao.pkl': longo}
+
+
+def agregar_producao(entradas):
+    producao = entradas['longo/producao.pkl']
+    return {'agregados/producao.pkl': {
+        'categorias': producao.pivot_table(index='ano', columns='categoria', values='volume', aggfunc='sum'),
+        'produtos': producao.groupby(['categoria', 'produto'])['volume'].sum().sort_values(ascending=False),
+    }}
+
+
+def recortar_producao(entradas, anos):
+    producao = entradas['longo/producao.pkl']
+    fim = int(producao['ano'].max())
+    inicio = fim - anos + 1
+    return {'recortes/producao_top.pkl': {
+        'parametros': {'inicio': inicio, 'fim': fim},
+        'producao': producao[producao['ano'] >= inicio].reset_index(drop=True),
+    }}
+
+
+def normalizar_raspagem(entradas):
+    diretorios = sorted({os.path.dirname(caminho) for caminho in entradas})
+    return {'longo/raspagem.pkl': dados.carregar_raspagem(diretorios)}
+
+
+def desenhar(entradas, grafico, saida, recorte=None):
+    """Desenha um gráfico do `renderizador` a partir do recorte e devolve os bytes do PNG."""
+    os.environ.setdefault('MPLBACKEND', 'Agg')
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    from vitibrasil import renderizador
+
+    dados_grafico = entradas[recorte] if recorte else {}
+    estado = types.SimpleNamespace(plt=plt, cubo=dados_grafico.get('cubo'),
+                                   producao=dados_grafico.get('producao'), geometria=None)
+    if grafico == 'mapa_producao':
+        import geopandas as gpd
+        estado.geometria = gpd.read_file(renderizador.GEOJSON)
+    figura = renderizador.GRAFICOS[grafico](estado, **dados_grafico.get('parametros', {}))
+    buffer = io.BytesIO()
+    # Sem metadados de versão: o mesmo gráfico gera os mesmos bytes
+    figura.savefig(buffer, format='png', dpi=renderizador.DPI_PADRAO, bbox_inches='tight', metadata={'Software': None})
+    plt.close(figura)
+    return {saida: buffer.getvalue()}
+
+
+def etapas_padrao(base_path=None):
+    """Monta o grafo padrão a partir dos arquivos de origem existentes."""
+    from importlib.util import find_spec
+    from vitibrasil import renderizador
+
+    base_path = os.path.abspath(base_path or dados.BASE_PATH)
+    etapas = []
+    agregados = []
+    for produto in dados.produtos_exportacao():
+        fonte = dados.caminho_arquivo(produto, base_path)
+        if not os.path.exists(fonte):
+            logging.warning(f"{fonte} não encontrado; etapas de {produto} fora do grafo")
+            continue
+        parse, longo, cubo = f'parse/{produto}.pkl', f'longo/{produto}.pkl', f'cubo/{produto}.pkl'
+        etapas += [
+            Etapa(f'parse:{produto}', ler_exportacao, [fonte], [parse], produto=produto, base_path=base_path),
+            Etapa(f'normaliza:{produto}', normalizar_exportacao, [parse], [longo], produto=produto),
+            Etapa(f'cubo:{produto}', montar_cubo, [longo], [cubo], produto=produto),
+            Etapa(f'agregados:{produto}', agregar_exportacao, [cubo], [f'agregados/{produto}.pkl'], produto=produto),
+        ]
+        agregados.append(f'agregados/{produto}.pkl')
+        for grafico, anos in GRAFICOS_EXPORTACAO.items():
+            recorte, png = f'recortes/{grafico}-{produto}.pkl', f'graficos/{grafico}-{produto}.png'
+            etapas += [
+                Etapa(f'recorte:{grafico}:{produto}', recortar_cubo, [cubo], [recorte],
+                      produto=produto, grafico=grafico, anos=anos),
+                Etapa(f'grafico:{grafico}:{produto}', desenhar, [recorte], [png],
+                      grafico=grafico, saida=png, recorte=recorte),
+            ]
+    if agregados:
+        etapas.append(Etapa('agregados:correlacao', correlacionar, agregados, ['agregados/correlacao.pkl']))
+
+    fonte = dados.caminho_arquivo('producao', base_path)
+    if os.path.exists(fonte):
+        etapas += [
+            Etapa('parse:producao', ler_producao, [fonte], ['parse/producao.pkl'], base_path=base_path),
+            Etapa('normaliza:producao', normalizar_producao, ['parse/producao.pkl'], ['longo/producao.pkl']),
+            Etapa('agregados:producao', agregar_producao, ['longo/producao.pkl'], ['agregados/producao.pkl']),
+            Etapa('recorte:producao_top', recortar_producao, ['longo/producao.pkl'], ['recortes/producao_top.pkl'],
+                  anos=ANOS_PRODUCAO_TOP),
+            Etapa('grafico:producao_top', desenhar, ['recortes/producao_top.pkl'], ['graficos/producao_top.png'],
+                  grafico='producao_top', saida='graficos/producao_top.png', recorte='recortes/producao_top.pkl'),
+        ]
+    if os.path.exists(renderizador.GEOJSON) and find_spec('geopandas') is not None:
+        etapas.append(Etapa('grafico:mapa_producao', desenhar, [renderizador.GEOJSON],
+                            ['graficos/mapa_producao.png'], grafico='mapa_producao',
+                            saida='graficos/mapa_producao.png'))
+
+    raspagem = sorted(os.path.abspath(caminho) for _, caminho in dados.arquivos_raspagem([dados.RAIZ, base_path]))
+    if raspagem:
+        etapas.append(Etapa('normaliza:raspagem', normalizar_raspagem, raspagem, ['longo/raspagem.pkl']))
+    return etapas
+
+
+def buscar():
+    """Roda a raspagem (vinicolas2.py) na raiz do repositório; os CSVs gerados viram fontes do grafo."""
+    logging.info("Raspando o site da Embrapa (vinicolas2.py)...")
+    subprocess.run([sys.executable, os.path.join(dados.RAIZ, 'vinicolas2.py')], cwd=dados.RAIZ, check=True)
+
+
+def imprimir(relatorio, pipeline):
+    for nome in pipeline.ordem(relatorio):
+        situacao, duracao = relatorio[nome]
+        print(f"{nome:<44}{situacao:<14}{duracao * 1000:>10.1f} ms")
+    contagem = pd.Series([situacao for situacao, _ in relatorio.values()]).value_counts()
+    print(', '.join(f'{quantidade} {situacao}' for situacao, quantidade in contagem.items()))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Pipeline incremental dos dados e gráficos da Vitibrasil.')
+    parser.add_argument('--alvos', nargs='+', metavar='PADRAO',
+                        help="Etapas a atualizar (padrões fnmatch, ex.: 'grafico:*'); as dependências entram junto")
+    parser.add_argument('--processos', type=int, default=os.cpu_count() or 1,
+                        help='Processos para as etapas independentes (1 = sequencial)')
+    parser.add_argument('--forcar', action='store_true', help='Roda todas as etapas selecionadas')
+    parser.add_argument('--buscar', action='store_true', help='Roda a raspagem antes do grafo')
+    parser.add_argument('--base', default=None, help='Pasta com os arquivos de origem')
+    parser.add_argument('--saida', default=DIRETORIO, help='Pasta dos artefatos')
+    parser.add_argument('--listar', action='store_true', help='Mostra o grafo (entradas e saídas) e sai')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    if args.buscar:
+        buscar()
+    pipeline = Pipeline(etapas_padrao(args.base), args.saida)
+    if args.listar:
+        for nome in pipeline.ordem(pipeline.selecionar(args.alvos)):
+            etapa = pipeline.etapas[nome]
+            entradas = [os.path.basename(e) if os.path.isabs(e) else e for e in etapa.entradas]
+            print(f"{nome:<44}{', '.join(entradas)} -> {', '.join(etapa.saidas)}")
+        return 0
+
+    relatorio = pipeline.executar(args.alvos, args.processos, args.forcar)
+    imprimir(relatorio, pipeline)
+    return 1 if any(situacao in ('falhou', 'bloqueada') for situacao, _ in relatorio.values()) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+"""Camada derivada de preço por unidade (US$/L ou US$/kg) do cubo de exportação.
+
+O preço é calculado uma única vez, com divisão mascarada (sem `inf` e sem
+`fillna(0)` escondendo divisões por zero), junto com uma máscara de
+validade por célula (produto, país, ano):
+
+    VOLUME_ZERO  volume igual a zero (preço indefinido)
+    VALOR_ZERO   valor igual a zero com volume positivo
+    AUSENTE      volume ou valor ausente (NaN)
+    OUTLIER      preço muito distante dos demais preços do mesmo produto
+
+Como o cubo guarda as somas de volume e valor, o preço de qualquer nível de
+agregação (produto, país, período) sai das somas, sem reler os arquivos.
+"""
+
+import numpy as np
+import pandas as pd
+
+VOLUME_ZERO = 1
+VALOR_ZERO = 2
+AUSENTE = 4
+OUTLIER = 8
+
+# Limite do z-score robusto (mediana/MAD do log do preço) para marcar outliers
+LIMITE_OUTLIER = 3.5
+
+
+def divisao_segura(valor, volume, padrao=np.nan):
+    """Divide valor por volume elemento a elemento, usando `padrao` onde o volume não é positivo."""
+    valor = np.asarray(valor, dtype='float64')
+    volume = np.asarray(volume, dtype='float64')
+    resultado = np.full(np.broadcast(valor, volume).shape, padrao, dtype='float64')
+    np.divide(valor, volume, out=resultado, where=(volume > 0) & ~np.isnan(valor))
+    return resultado
+
+
+def mascara_validade(volume, valor):
+    """Máscara (uint8, bits combináveis) de zeros e ausências por célula."""
+    volume = np.asarray(volume, dtype='float64')
+    valor = np.asarray(valor, dtype='float64')
+    mascara = np.zeros(np.broadcast(volume, valor).shape, dtype='uint8')
+    mascara |= np.where(np.isnan(volume) | np.isnan(valor), AUSENTE, 0).astype('uint8')
+    mascara |= np.where(volume == 0, VOLUME_ZERO, 0).astype('uint8')
+    mascara |= np.where((valor == 0) & (volume > 0), VALOR_ZERO, 0).astype('uint8')
+    return mascara
+
+
+def mascara_outliers(preco, grupos, limite=LIMITE_OUTLIER):
+    """Marca preços cujo z-score robusto do log, dentro do grupo (linha -> grupo), passa do limite."""
+    log_preco = np.log(np.where(preco > 0, preco, np.nan))
+    outliers = np.zeros(preco.shape, dtype=bool)
+    for grupo in np.unique(grupos):
+        linhas = grupos == grupo
+        amostra = log_preco[linhas]
+        if np.isnan(amostra).all():
+            continue
+        mediana = np.nanmedian(amostra)
+        mad = np.nanmedian(np.abs(amostra - mediana)) * 1.4826
+        if not mad > 0:
+            continue
+        with np.errstate(invalid='ignore'):
+            outliers[linhas] = np.abs(amostra - mediana) / mad > limite
+    return outliers
+
+
+class CuboPreco:
+    """Preço por unidade de cada (produto, país, ano), com máscara de validade."""
+
+    def __init__(self, volume, valor, limite_outlier=LIMITE_OUTLIER):
+        valor = valor.reindex(index=volume.index, columns=volume.columns)
+        self.index = volume.index
+        self.anos = volume.columns
+        self.volume = volume.to_numpy(dtype='float64')
+        self.valor = valor.to_numpy(dtype='float64')
+        self.preco = divisao_segura(self.valor, self.volume)
+        self.mascara = mascara_validade(self.volume, self.valor)
+
+        # Outliers comparados dentro de cada produto (primeiro nível do índice)
+        grupos = self.index.get_level_values(0).to_numpy() if isinstance(self.index, pd.MultiIndex) \
+            else np.zeros(len(self.index))
+        self.mascara |= np.where(mascara_outliers(self.preco, grupos, limite_outlier), OUTLIER, 0).astype('uint8')
+
+    @classmethod
+    def de_cubo(cls, cubo, limite_outlier=LIMITE_OUTLIER):
+        """Cria a camada de preço a partir do dicionário de `dados.cubo_exportacao`."""
+        return cls(cubo['volume'], cubo['valor'], limite_outlier)
+
+    def precos(self, excluir=OUTLIER):
+        """Matriz de preços (DataFrame), com NaN nas células marcadas pelos bits em `excluir`."""
+        preco = np.where(self.mascara & excluir, np.nan, self.preco)
+        return pd.DataFrame(preco, index=self.index, columns=self.anos)
+
+    def mascaras(self):
+        """Máscara de validade como DataFrame (mesmo formato de `precos`)."""
+        return pd.DataFrame(self.mascara, index=self.index, columns=self.anos)
+
+    def agregar(self, por=None, inicio=None, fim=None, excluir=0):
+        """Preço médio ponderado (soma do valor / soma do volume) no nível pedido.
+
+        `por` é um nível (ou lista de níveis) do índice, ex.: 'produto'; com
+        `por=None` agrega cada série no período. `inicio`/`fim` limitam os
+        anos somados. Células marcadas pelos bits em `excluir` ficam fora das somas.
+        """
+        colunas = np.ones(len(self.anos), dtype=bool)
+        if inicio is not None:
+            colunas &= np.asarray(self.anos) >= inicio
+        if fim is not None:
+            colunas &= np.asarray(self.anos) <= fim
+        manter = (self.mascara[:, colunas] & excluir) == 0
+        volume = np.where(manter, self.volume[:, colunas], 0.0)
+        valor = np.where(manter, self.valor[:, colunas], 0.0)
+        somas = pd.DataFrame({
+            'volume': np.nansum(volume, axis=1),
+            'valor': np.nansum(valor, axis=1),
+        }, index=self.index)
+        if por is not None:
+            somas = somas.groupby(level=por).sum()
+        somas['preco_medio'] = divisao_segura(somas['valor'], somas['volume'])
+        return somas
+
+    def agregar_por_ano(self, por='produto', excluir=0):
+        """Preço médio ponderado por ano no nível pedido (ex.: total anual por produto)."""
+        manter = (self.mascara & excluir) == 0
+        volume = pd.DataFrame(np.where(manter, self.volume, 0.0), index=self.index, columns=self.anos)
+        valor = pd.DataFrame(np.where(manter, self.valor, 0.0), index=self.index, columns=self.anos)
+        volume, valor = volume.groupby(level=por).sum(), valor.groupby(level=por).sum()
+        return pd.DataFrame(divisao_segura(valor, volume), index=volume.index, columns=self.anos)
+
+    def cobertura(self):
+        """Contagem de células por tipo de marcação na máscara, por produto."""
+        grupos = self.index.get_level_values(0) if isinstance(self.index, pd.MultiIndex) else None
+        contagens = pd.DataFrame({
+            nome: (self.mascara & bit != 0).sum(axis=1)
+            for nome, bit in (('volume_zero', VOLUME_ZERO), ('valor_zero', VALOR_ZERO),
+                              ('ausente', AUSENTE), ('outlier', OUTLIER))
+        }, index=self.index)
+        contagens['valido'] = (self.mascara == 0).sum(axis=1)
+        return contagens.groupby(level=0).sum() if grupos is not None else contagens.sum()
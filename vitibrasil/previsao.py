@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+"""Ajuste de tendências e previsões de curto prazo em lote.
+
+Em vez de um `np.polyfit(anos, serie, 1)` por lista, todas as séries (linhas
+de uma matriz série x ano) são ajustadas de uma vez:
+
+- mínimos quadrados polinomiais: um único `lstsq` quando não há valores
+  ausentes; com ausentes, as equações normais de cada série são montadas com
+  `einsum` e resolvidas em lote por `np.linalg.solve`;
+- suavização exponencial simples: o laço é só sobre os anos, vetorizado
+  sobre séries e sobre a grade de valores de alfa.
+
+Os coeficientes polinomiais seguem a ordem do `np.polyfit` (maior grau
+primeiro), mas na variável centrada `x = ano - ano_referencia` para manter o
+sistema bem condicionado.
+"""
+
+import numpy as np
+import pandas as pd
+
+ALFAS_PADRAO = np.linspace(0.05, 0.95, 19)
+
+
+def _vandermonde(x, grau):
+    """Matriz de Vandermonde (colunas do maior para o menor grau, como o polyfit)."""
+    return np.vander(np.asarray(x, dtype='float64'), grau + 1)
+
+
+def ajustar_polinomios(anos, valores, grau=1, horizonte=0):
+    """Ajusta um polinômio de grau `grau` a cada linha de `valores` (séries x anos).
+
+    Retorna um dicionário com:
+        coeficientes  (séries, grau + 1), maior grau primeiro, em x = ano - ano_referencia
+        ano_referencia
+        ajustados     (séries, anos)
+        previsoes     (séries, horizonte), para os anos seguintes ao último
+        anos_previsao
+        n, rmse, r2   estatísticas dos resíduos por série (NaN se n <= grau)
+    """
+    anos = np.asarray(anos, dtype='float64')
+    y = np.atleast_2d(np.asarray(valores, dtype='float64'))
+    referencia = anos.mean()
+    v = _vandermonde(anos - referencia, grau)
+    presente = ~np.isnan(y)
+    n = presente.sum(axis=1)
+
+    if presente.all():
+        # Todas as séries com os mesmos anos: um único sistema com várias colunas
+        coeficientes = np.linalg.lstsq(v, y.T, rcond=None)[0].T
+    else:
+        # Equações normais por série, ponderadas pela máscara de anos presentes
+        w = presente.astype('float64')
+        y0 = np.where(presente, y, 0.0)
+        a = np.einsum('st,ti,tj->sij', w, v, v)
+        b = np.einsum('st,ti->si', y0, v)
+        # Séries com poucos pontos ficam singulares: resolve só as possíveis
+        coeficientes = np.full((len(y), grau + 1), np.nan)
+        resolvivel = n > grau
+        if resolvivel.any():
+            coeficientes[resolvivel] = np.linalg.solve(a[resolvivel], b[resolvivel][..., None])[..., 0]
+
+    ajustados = coeficientes @ v.T
+    residuos = np.where(presente, y - ajustados, np.nan)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        sse = np.nansum(residuos ** 2, axis=1)
+        media = np.where(presente, y, 0.0).sum(axis=1) / n
+        sst = np.nansum((np.where(presente, y, np.nan) - media[:, None]) ** 2, axis=1)
+        rmse = np.sqrt(sse / n)
+        r2 = 1.0 - sse / sst
+    rmse[n <= grau] = np.nan
+    r2[(n <= grau) | ~(sst > 0)] = np.nan
+
+    passo = np.median(np.diff(anos)) if len(anos) > 1 else 1.0
+    anos_previsao = anos[-1] + passo * np.arange(1, horizonte + 1)
+    previsoes = coeficientes @ _vandermonde(anos_previsao - referencia, grau).T
+
+    return {
+        'coeficientes': coeficientes,
+        'ano_referencia': referencia,
+        'ajustados': ajustados,
+        'previsoes': previsoes,
+        'anos_previsao': anos_previsao,
+        'n': n,
+        'rmse': rmse,
+        'r2': r2,
+    }
+
+
+def suavizacao_exponencial(valores, alfa=None, horizonte=0):
+    """Suavização exponencial simples de todas as séries (linhas) de uma vez.
+
+    Com `alfa=None`, escolhe por série o alfa da grade `ALFAS_PADRAO` com menor
+    erro quadrático das previsões um passo à frente. Anos ausentes mantêm o
+    nível anterior. A previsão para o horizonte é o último nível (constante).
+    """
+    y = np.atleast_2d(np.asarray(valores, dtype='float64'))
+    alfas = np.atleast_1d(ALFAS_PADRAO if alfa is None else alfa).astype('float64')
+    s, t = y.shape
+
+    # Nível inicial: primeiro valor presente de cada série
+    presente = ~np.isnan(y)
+    primeiro = np.where(presente.any(axis=1), y[np.arange(s), np.argmax(presente, axis=1)], np.nan)
+    nivel = np.broadcast_to(primeiro, (len(alfas), s)).copy()
+    a = alfas[:, None]
+    sse = np.zeros((len(alfas), s))
+    niveis = np.empty((len(alfas), s, t))
+    for j in range(t):
+        atual = y[:, j]
+        tem = ~np.isnan(atual)
+        erro = np.where(tem, atual - nivel, 0.0)
+        sse += erro ** 2
+        nivel = nivel + a * erro
+        niveis[:, :, j] = nivel
+
+    melhor = np.argmin(sse, axis=0)
+    colunas = np.arange(s)
+    ajustados = niveis[melhor, colunas]
+    n = presente.sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        rmse = np.sqrt(sse[melhor, colunas] / n)
+    return {
+        'alfa': alfas[melhor],
+        'ajustados': ajustados,
+        'previsoes': np.repeat(ajustados[:, -1:], horizonte, axis=1),
+        'n': n,
+        'rmse': rmse,
+    }
+
+
+def prever(matriz, horizonte=3, modelo='linear', grau=None):
+    """Ajusta e prevê todas as séries de uma matriz série x ano (DataFrame).
+
+    `modelo` pode ser 'linear', 'polinomial' (use `grau`) ou 'exponencial'.
+    Retorna um DataFrame com as previsões (colunas = anos futuros) e as
+    estatísticas de ajuste de cada série.
+    """
+    anos = np.asarray(matriz.columns, dtype='float64')
+    valores = matriz.to_numpy(dtype='float64')
+    if modelo == 'exponencial':
+        resultado = suavizacao_exponencial(valores, horizonte=horizonte)
+        ultimo = anos[-1] if len(anos) else 0
+        anos_previsao = ultimo + np.arange(1, horizonte + 1)
+        extras = {'alfa': resultado['alfa']}
+    elif modelo in ('linear', 'polinomial'):
+        grau = 1 if modelo == 'linear' else (grau or 2)
+        resultado = ajustar_polinomios(anos, valores, grau, horizonte)
+        anos_previsao = resultado['anos_previsao']
+        extras = {'inclinacao': resultado['coeficientes'][:, -2], 'r2': resultado['r2']}
+    else:
+        raise ValueError(f"Modelo desconhecido: {modelo}")
+
+    previsoes = pd.DataFrame(resultado['previsoes'], index=matriz.index,
+                             columns=anos_previsao.astype('int64'))
+    estatisticas = pd.DataFrame({'n': resultado['n'], 'rmse': resultado['rmse'], **extras}, index=matriz.index)
+    return previsoes.join(estatisticas)
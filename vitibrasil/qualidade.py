@@ -0,0 +1,242 @@
+# -*- coding: utf-8 -*-
+"""Perfil de qualidade dos arquivos de entrada, em uma única passada por arquivo.
+
+Cada arquivo de `dados.file_configs` é lido uma vez (pelo plano de leitura
+em cache e direto para as matrizes compactas, com um código por célula) e
+tudo é calculado sobre esses arrays, sem laços por coluna:
+
+- tipo de cada coluna de ano (inteiro, decimal, com sentinelas);
+- contagem de sentinelas ('nd', '*', '+') e de células vazias;
+- chaves duplicadas (países repetidos, que obrigam o `groupby('País').sum()`);
+- valores negativos e outliers (z-score robusto do log na série de cada linha);
+- cobertura de anos (primeiro/último ano e anos sem nenhum valor);
+- divergência entre linhas de total (categorias do Producao.csv, país
+  'Total') e a soma das linhas filhas.
+
+O relatório é gravado em JSON para ser verificado antes da renderização
+noturna (`--estrito` devolve código de saída 1 se houver problemas).
+"""
+
+import argparse
+import datetime
+import json
+import logging
+import os
+import sys
+
+import numpy as np
+
+from vitibrasil import compacto, dados
+from vitibrasil.preco import LIMITE_OUTLIER
+
+RELATORIO_PADRAO = os.path.join(dados.CACHE_PATH, 'qualidade.json')
+# Diferença relativa tolerada entre um total e a soma dos filhos
+TOLERANCIA_TOTAL = 1e-6
+MAX_EXEMPLOS = 10
+
+
+def _chave(plano):
+    """Coluna que identifica uma linha: 'País' nas exportações, 'control' na produção."""
+    return 'País' if 'País' in plano.id_vars else 'control'
+
+
+def tipos_colunas(matriz):
+    """Tipo de cada coluna de ano: 'inteiro', 'decimal' e o sufixo '+sentinelas' se houver."""
+    valores = np.asarray(matriz.valores, dtype='float64')
+    decimal = (valores != np.round(valores)).any(axis=0)
+    sentinelas = (matriz.codigos >= compacto.ND).any(axis=0)
+    tipos = np.where(decimal, 'decimal', 'inteiro').astype(object)
+    tipos[sentinelas] = tipos[sentinelas] + '+sentinelas'
+    return tipos
+
+
+def contagem_codigos(matriz):
+    """Total de células por código (presente, zero, nd, *, +, ausente)."""
+    contagens = np.bincount(matriz.codigos.ravel(), minlength=len(compacto.NOMES_CODIGOS))
+    return {compacto.NOMES_CODIGOS[c]: int(contagens[c]) for c in sorted(compacto.NOMES_CODIGOS)}
+
+
+def chaves_duplicadas(linhas, chave):
+    """Chaves que aparecem em mais de uma linha, com a quantidade de repetições."""
+    contagem = linhas[chave].value_counts()
+    return {str(k): int(v) for k, v in contagem[contagem > 1].items()}
+
+
+def negativos(matriz, rotulos):
+    """Células com valor negativo: contagem e exemplos (rótulo, ano, valor)."""
+    linhas, colunas = np.nonzero(np.asarray(matriz.valores) < 0)
+    exemplos = [[str(rotulos[i]), int(matriz.anos[j]), float(matriz.valores[i, j])]
+                for i, j in zip(linhas[:MAX_EXEMPLOS], colunas[:MAX_EXEMPLOS])]
+    return {'quantidade': int(len(linhas)), 'exemplos': exemplos}
+
+
+def outliers(matriz, rotulos, limite=LIMITE_OUTLIER):
+    """Picos na série de cada linha: |z| robusto (mediana/MAD do log) acima do limite."""
+    valores = np.asarray(matriz.valores, dtype='float64')
+    log = np.log(np.where((matriz.codigos == compacto.PRESENTE) & (valores > 0), valores, np.nan))
+    com_dados = (~np.isnan(log)).sum(axis=1) >= 3
+    z = np.full(log.shape, np.nan)
+    if com_dados.any():
+        amostra = log[com_dados]
+        mediana = np.nanmedian(amostra, axis=1, keepdims=True)
+        mad = np.nanmedian(np.abs(amostra - mediana), axis=1, keepdims=True) * 1.4826
+        with np.errstate(invalid='ignore', divide='ignore'):
+            z[com_dados] = np.where(mad > 0, (amostra - mediana) / mad, np.nan)
+    with np.errstate(invalid='ignore'):
+        marcados = np.abs(z) > limite
+    linhas, colunas = np.nonzero(marcados)
+    ordem = np.argsort(-np.abs(z[linhas, colunas]))[:MAX_EXEMPLOS]
+    exemplos = [[str(rotulos[linhas[k]]), int(matriz.anos[colunas[k]]), float(valores[linhas[k], colunas[k]]),
+                 round(float(z[linhas[k], colunas[k]]), 2)] for k in ordem]
+    return {'quantidade': int(len(linhas)), 'limite': limite, 'exemplos': exemplos}
+
+
+def cobertura_anos(matriz):
+    """Primeiro e último ano, anos sem nenhum valor positivo e a menor fração informada."""
+    cobertura = matriz.cobertura()
+    vazios = cobertura.index[cobertura['presente'] == 0]
+    return {
+        'primeiro_ano': int(matriz.anos[0]) if len(matriz.anos) else None,
+        'ultimo_ano': int(matriz.anos[-1]) if len(matriz.anos) else None,
+        'anos_sem_valores': [int(ano) for ano in vazios],
+        'menor_fracao_informada': float(cobertura['fracao_informada'].min()) if len(cobertura) else None,
+    }
+
+
+def divergencias_totais(matriz, e_total, grupos, rotulos):
+    """Compara cada linha de total com a soma das linhas do seu grupo, ano a ano.
+
+    `e_total` marca as linhas de total e `grupos` dá o grupo de cada linha
+    (o total e seus filhos compartilham o mesmo grupo).
+    """
+    valores = matriz.para_float()
+    _, grupos = np.unique(grupos, return_inverse=True)
+    somas = np.zeros((grupos.max() + 1 if len(grupos) else 0, valores.shape[1]))
+    np.add.at(somas, grupos[~e_total], valores[~e_total])
+    totais = valores[e_total]
+    esperado = somas[grupos[e_total]]
+    diferenca = np.abs(totais - esperado)
+    divergente = diferenca > TOLERANCIA_TOTAL * np.maximum(np.abs(totais), 1.0)
+    linhas, colunas = np.nonzero(divergente)
+    nomes = np.asarray(rotulos, dtype=object)[e_total]
+    exemplos = [[str(nomes[i]), int(matriz.anos[j]), float(totais[i, j]), float(esperado[i, j])]
+                for i, j in zip(linhas[:MAX_EXEMPLOS], colunas[:MAX_EXEMPLOS])]
+    return {'linhas_total': int(e_total.sum()), 'divergencias': int(len(linhas)), 'exemplos': exemplos}
+
+
+def estrutura_totais(plano, linhas):
+    """Linhas de total e grupo de cada linha, conforme o layout do arquivo (ou None)."""
+    if 'control' in plano.id_vars:
+        # Producao.csv: categorias não têm '_' no `control` e precedem seus produtos
+        e_total = ~linhas['control'].str.contains('_', regex=False).to_numpy()
+        return e_total, np.cumsum(e_total)
+    if 'País' in plano.id_vars:
+        e_total = (linhas['País'] == 'Total').to_numpy()
+        if e_total.any():
+            return e_total, np.zeros(len(linhas), dtype='int64')
+    return None
+
+
+def perfilar(nome, base_path=None):
+    """Perfil de qualidade de um arquivo configurado em `dados.file_configs`."""
+    filepath = dados.caminho_arquivo(nome, base_path)
+    if not os.path.exists(filepath):
+        return {'arquivo': filepath, 'existe': False}
+
+    matrizes = compacto.carregar(nome, base_path)
+    plano = dados.plano_leitura(nome, base_path)
+    linhas = next(iter(matrizes.values())).linhas
+    chave = _chave(plano)
+    rotulos = linhas[chave].to_numpy()
+    totais = estrutura_totais(plano, linhas)
+
+    perfil = {
+        'arquivo': filepath,
+        'existe': True,
+        'layout': {'tipo': plano.tipo, 'sep': plano.sep, 'id_vars': plano.id_vars, 'impressao': plano.impressao},
+        'linhas': int(len(linhas)),
+        'chaves_duplicadas': chaves_duplicadas(linhas, chave),
+        'metricas': {},
+    }
+    for metrica, matriz in matrizes.items():
+        tipos = tipos_colunas(matriz)
+        nao_inteiras = {int(ano): tipo for ano, tipo in zip(matriz.anos, tipos) if tipo != 'inteiro'}
+        perfil['metricas'][metrica] = {
+            'armazenamento': str(matriz.valores.dtype),
+            'colunas_nao_inteiras': nao_inteiras,
+            'codigos': contagem_codigos(matriz),
+            'negativos': negativos(matriz, rotulos),
+            'outliers': outliers(matriz, rotulos),
+            'cobertura': cobertura_anos(matriz),
+        }
+        if totais is not None:
+            perfil['metricas'][metrica]['totais'] = divergencias_totais(matriz, *totais, rotulos)
+    return perfil
+
+
+def problemas(perfil, nome):
+    """Lista legível dos problemas que devem bloquear uma renderização."""
+    if not perfil['existe']:
+        return [f"{nome}: arquivo não encontrado ({perfil['arquivo']})"]
+    encontrados = []
+    if perfil['chaves_duplicadas']:
+        encontrados.append(f"{nome}: {len(perfil['chaves_duplicadas'])} chaves duplicadas")
+    for metrica, info in perfil['metricas'].items():
+        if info['negativos']['quantidade']:
+            encontrados.append(f"{nome}/{metrica}: {info['negativos']['quantidade']} valores negativos")
+        sentinelas = sum(info['codigos'][n] for n in ('nd', '*', '+', 'ausente'))
+        if sentinelas:
+            encontrados.append(f"{nome}/{metrica}: {sentinelas} células com sentinela ou vazias")
+        if info.get('totais', {}).get('divergencias'):
+            encontrados.append(f"{nome}/{metrica}: {info['totais']['divergencias']} totais divergentes dos filhos")
+    return encontrados
+
+
+def relatorio(base_path=None, nomes=None):
+    """Perfil de todos os arquivos configurados, com a lista de problemas."""
+    arquivos = {}
+    lista = []
+    for nome in nomes or list(dados.file_configs):
+        try:
+            arquivos[nome] = perfilar(nome, base_path)
+        except ValueError as e:
+            # Layout inválido (esquema.LayoutInvalido) também é um problema a relatar
+            arquivos[nome] = {'arquivo': dados.caminho_arquivo(nome, base_path), 'existe': True, 'erro': str(e)}
+            lista.append(f"{nome}: {e}")
+            continue
+        lista.extend(problemas(arquivos[nome], nome))
+    return {
+        'gerado_em': datetime.datetime.now().isoformat(timespec='seconds'),
+        'arquivos': arquivos,
+        'problemas': lista,
+    }
+
+
+def salvar(resultado, caminho=None):
+    """Grava o relatório em JSON."""
+    caminho = caminho or RELATORIO_PADRAO
+    os.makedirs(os.path.dirname(caminho) or '.', exist_ok=True)
+    with open(caminho, 'w', encoding='utf-8') as f:
+        json.dump(resultado, f, ensure_ascii=False, indent=2)
+    return caminho
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Perfil de qualidade dos arquivos de entrada da Embrapa.")
+    parser.add_argument('nomes', nargs='*', help="Arquivos de file_configs (padrão: todos)")
+    parser.add_argument('--base', help="Pasta dos CSVs (padrão: Arquivos Bases)")
+    parser.add_argument('--saida', help=f"Arquivo JSON do relatório (padrão: {RELATORIO_PADRAO})")
+    parser.add_argument('--estrito', action='store_true', help="Sai com código 1 se houver problemas")
+    args = parser.parse_args(argv)
+
+    resultado = relatorio(args.base, args.nomes or None)
+    caminho = salvar(resultado, args.saida)
+    for problema in resultado['problemas']:
+        print(problema)
+    print(f"Relatório gravado em {caminho} ({len(resultado['problemas'])} problemas)")
+    return 1 if args.estrito and resultado['problemas'] else 0
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    sys.exit(main())
@@ -0,0 +1,379 @@
+# -*- coding: utf-8 -*-
+"""Rastreio de etapas: tempo de parede, tempo de CPU, pico de memória e linhas/bytes.
+
+Cada etapa do pipeline (leitura, conversão numérica, melt, groupby,
+renderização, savefig, requisição HTTP, parse de HTML) vira um evento com
+início, duração, CPU, pico de memória (opcional, via `tracemalloc`), linhas
+e bytes processados e a etapa-mãe:
+
+    from vitibrasil import rastreio
+    with rastreio.etapa('read', arquivo='ExpVinho.csv') as e:
+        df = pd.read_csv(...)
+        e.registrar(linhas=len(df), bytes=os.path.getsize(...))
+
+Desativado (padrão), `etapa()` devolve um objeto nulo compartilhado e
+nenhum gancho é instalado, então o custo é uma checagem de variável.
+
+Para scripts que não usam o pacote (juan.py, vinicolas2.py, Gráficos/*),
+`instrumentar()` envolve as funções das bibliotecas que correspondem às
+etapas (pandas.read_csv, pandas.read_html, DataFrame.melt, groupby,
+Figure.savefig, requests.Session.request, geopandas.read_file...). O mais
+simples é rodar o script por este módulo:
+
+    python -m vitibrasil.rastreio -o cache/rastreio.json juan.py
+    python -m vitibrasil.rastreio --memoria Gráficos/grafico_mapa_producao.py
+
+Ao final, o rastreio completo vai para um JSON e um resumo por etapa é
+impresso. Os tempos são inclusivos (uma etapa inclui as etapas filhas).
+"""
+
+import argparse
+import atexit
+import functools
+import importlib
+import json
+import os
+import runpy
+import sys
+import threading
+import time
+import tracemalloc
+
+ATIVO = False
+MEMORIA = False
+# Com só ouvintes registrados (ex.: métricas), os eventos não são guardados
+GUARDAR = False
+_eventos = []
+_ouvintes = []
+_local = threading.local()
+_origem = time.perf_counter()
+_ganchos = []
+
+# (módulo, objeto dentro do módulo ou '', atributo, etapa) envolvidos por `instrumentar`
+GANCHOS = [
+    ('pandas', '', 'read_csv', 'read'),
+    ('pandas', '', 'read_excel', 'read'),
+    ('pandas', '', 'read_html', 'html_parse'),
+    ('pandas', '', 'to_numeric', 'coerce'),
+    ('pandas', '', 'melt', 'melt'),
+    ('pandas', 'DataFrame', 'melt', 'melt'),
+    ('pandas', 'DataFrame', 'pivot_table', 'groupby'),
+    ('pandas.core.groupby.groupby', 'GroupBy', 'sum', 'groupby'),
+    ('pandas.core.groupby.groupby', 'GroupBy', 'mean', 'groupby'),
+    ('pandas.core.groupby.generic', 'DataFrameGroupBy', 'agg', 'groupby'),
+    ('pandas.core.groupby.generic', 'SeriesGroupBy', 'agg', 'groupby'),
+    ('matplotlib.backends.backend_agg', 'FigureCanvasAgg', 'draw', 'render'),
+    ('matplotlib.figure', 'Figure', 'savefig', 'savefig'),
+    ('requests', 'Session', 'request', 'http_fetch'),
+    ('geopandas', '', 'read_file', 'read'),
+]
+
+
+def tamanho(objeto):
+    """(linhas, bytes) de um resultado: DataFrame/Series, array, bytes, texto ou resposta HTTP."""
+    if objeto is None:
+        return None, None
+    if hasattr(objeto, 'memory_usage') and hasattr(objeto, '__len__'):
+        uso = objeto.memory_usage(index=True)
+        return len(objeto), int(uso.sum() if hasattr(uso, 'sum') else uso)
+    if hasattr(objeto, 'nbytes') and hasattr(objeto, 'shape'):
+        return (objeto.shape[0] if objeto.shape else 1), int(objeto.nbytes)
+    if isinstance(objeto, (bytes, bytearray, str)):
+        return None, len(objeto)
+    if hasattr(objeto, 'content') and hasattr(objeto, 'status_code'):
+        return None, len(objeto.content)
+    if isinstance(objeto, list) and objeto and all(hasattr(o, 'memory_usage') for o in objeto):
+        medidas = [tamanho(o) for o in objeto]
+        return sum(m[0] for m in medidas), sum(m[1] for m in medidas)
+    return None, None
+
+
+def _pilha():
+    if not hasattr(_local, 'pilha'):
+        _local.pilha = []
+    return _local.pilha
+
+
+class _EtapaNula:
+    """Etapa usada com o rastreio desativado: não mede nada."""
+
+    def registrar(self, objeto=None, linhas=None, bytes=None, **atributos):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULA = _EtapaNula()
+
+
+class Etapa:
+    """Uma etapa medida; use como gerenciador de contexto."""
+
+    def __init__(self, nome, **atributos):
+        self.nome = nome
+        self.atributos = atributos
+        self.linhas = None
+        self.bytes = None
+        self._pico_filhas = 0
+
+    def registrar(self, objeto=None, linhas=None, bytes=None, **atributos):
+        """Anota linhas/bytes (ou os de `objeto`, ver `tamanho`) e atributos extras."""
+        if objeto is not None:
+            linhas_objeto, bytes_objeto = tamanho(objeto)
+            linhas = linhas if linhas is not None else linhas_objeto
+            bytes = bytes if bytes is not None else bytes_objeto
+        if linhas is not None:
+            self.linhas = (self.linhas or 0) + int(linhas)
+        if bytes is not None:
+            self.bytes = (self.bytes or 0) + int(bytes)
+        self.atributos.update(atributos)
+        return self
+
+    def __enter__(self):
+        pilha = _pilha()
+        self.pai = pilha[-1] if pilha else None
+        self.profundidade = len(pilha)
+        if MEMORIA and tracemalloc.is_tracing():
+            atual, pico = tracemalloc.get_traced_memory()
+            if self.pai is not None:
+                # O reset abaixo apagaria o pico da mãe até aqui: guarda-o nela
+                self.pai._pico_filhas = max(self.pai._pico_filhas, pico)
+            tracemalloc.reset_peak()
+            self._memoria_inicial = atual
+        pilha.append(self)
+        self._cpu = time.process_time()
+        self._inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, tipo, erro, tb):
+        fim = time.perf_counter()
+        cpu = time.process_time() - self._cpu
+        pilha = _pilha()
+        if pilha and pilha[-1] is self:
+            pilha.pop()
+        pico = None
+        if MEMORIA and tracemalloc.is_tracing() and hasattr(self, '_memoria_inicial'):
+            _, pico_atual = tracemalloc.get_traced_memory()
+            pico_absoluto = max(pico_atual, self._pico_filhas)
+            pico = max(pico_absoluto - self._memoria_inicial, 0)
+            if self.pai is not None:
+                self.pai._pico_filhas = max(self.pai._pico_filhas, pico_absoluto)
+        evento = {
+            'etapa': self.nome,
+            'pai': self.pai.nome if self.pai is not None else None,
+            'profundidade': self.profundidade,
+            'thread': threading.current_thread().name,
+            'inicio_ms': round((self._inicio - _origem) * 1000, 3),
+            'parede_ms': round((fim - self._inicio) * 1000, 3),
+            'cpu_ms': round(cpu * 1000, 3),
+            'pico_memoria_bytes': pico,
+            'linhas': self.linhas,
+            'bytes': self.bytes,
+            'erro': f'{tipo.__name__}: {erro}' if tipo is not None else None,
+            'atributos': {k: str(v) for k, v in self.atributos.items()},
+        }
+        if GUARDAR:
+            _eventos.append(evento)
+        for ouvinte in _ouvintes:
+            ouvinte(evento)
+        return False
+
+
+def etapa(nome, **atributos):
+    """Etapa medida (ou a etapa nula, se o rastreio estiver desativado)."""
+    if not ATIVO:
+        return NULA
+    return Etapa(nome, **atributos)
+
+
+def medido(nome=None):
+    """Decorador: cada chamada da função vira uma etapa (nome padrão: o da função)."""
+    def decorador(funcao):
+        rotulo = nome or funcao.__name__
+
+        @functools.wraps(funcao)
+        def envolvida(*args, **kwargs):
+            if not ATIVO:
+                return funcao(*args, **kwargs)
+            with Etapa(rotulo) as e:
+                resultado = funcao(*args, **kwargs)
+                e.registrar(resultado)
+                return resultado
+        return envolvida
+    return decorador
+
+
+def _gancho(original, nome):
+    @functools.wraps(original)
+    def envolvida(*args, **kwargs):
+        pilha = _pilha()
+        # Chamadas internas da mesma etapa (ex.: read_csv dentro de uma etapa 'read') não contam duas vezes
+        if not ATIVO or (pilha and pilha[-1].nome == nome):
+            return original(*args, **kwargs)
+        with Etapa(nome, funcao=getattr(original, '__qualname__', nome)) as e:
+            resultado = original(*args, **kwargs)
+            if nome == 'savefig' and args[1:] and isinstance(args[1], (str, os.PathLike)) \
+                    and os.path.exists(args[1]):
+                e.registrar(bytes=os.path.getsize(args[1]), arquivo=os.path.basename(args[1]))
+            else:
+                e.registrar(resultado)
+            return resultado
+    envolvida.__rastreio_original__ = original
+    return envolvida
+
+
+def instrumentar(ganchos=GANCHOS):
+    """Envolve as funções de bibliotecas listadas em `ganchos` (as não instaladas são ignoradas)."""
+    for modulo, objeto, atributo, nome in ganchos:
+        try:
+            alvo = importlib.import_module(modulo)
+        except ImportError:
+            continue
+        if objeto:
+            alvo = getattr(alvo, objeto, None)
+        original = getattr(alvo, atributo, None) if alvo is not None else None
+        if original is None or hasattr(original, '__rastreio_original__'):
+            continue
+        setattr(alvo, atributo, _gancho(original, nome))
+        _ganchos.append((alvo, atributo, original))
+
+
+def desinstrumentar():
+    """Restaura as funções originais envolvidas por `instrumentar`."""
+    while _ganchos:
+        alvo, atributo, original = _ganchos.pop()
+        setattr(alvo, atributo, original)
+
+
+def ouvir(funcao):
+    """Chama `funcao(evento)` ao fim de cada etapa (liga a medição, sem guardar os eventos)."""
+    global ATIVO
+    if funcao not in _ouvintes:
+        _ouvintes.append(funcao)
+    ATIVO = True
+
+
+def ativar(memoria=False, bibliotecas=False):
+    """Liga o rastreio; `memoria` liga o tracemalloc (mais lento) e `bibliotecas` instala os ganchos."""
+    global ATIVO, MEMORIA, GUARDAR
+    ATIVO = GUARDAR = True
+    MEMORIA = memoria
+    if memoria and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    if bibliotecas:
+        instrumentar()
+
+
+def desativar():
+    global ATIVO, MEMORIA, GUARDAR
+    GUARDAR = False
+    ATIVO = bool(_ouvintes)
+    desinstrumentar()
+    if MEMORIA and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    MEMORIA = False
+
+
+def limpar():
+    _eventos.clear()
+
+
+def eventos():
+    return list(_eventos)
+
+
+def resumo(lista=None):
+    """Totais por etapa: chamadas, parede e CPU (ms), maior pico de memória, linhas e bytes."""
+    totais = {}
+    for evento in _eventos if lista is None else lista:
+        t = totais.setdefault(evento['etapa'], {'chamadas': 0, 'parede_ms': 0.0, 'cpu_ms': 0.0,
+                                                'pico_memoria_bytes': None, 'linhas': 0, 'bytes': 0, 'erros': 0})
+        t['chamadas'] += 1
+        t['parede_ms'] += evento['parede_ms']
+        t['cpu_ms'] += evento['cpu_ms']
+        if evento['pico_memoria_bytes'] is not None:
+            t['pico_memoria_bytes'] = max(t['pico_memoria_bytes'] or 0, evento['pico_memoria_bytes'])
+        t['linhas'] += evento['linhas'] or 0
+        t['bytes'] += evento['bytes'] or 0
+        t['erros'] += evento['erro'] is not None
+    return dict(sorted(totais.items(), key=lambda item: -item[1]['parede_ms']))
+
+
+def _memoria_processo():
+    """Pico de memória residente do processo em bytes (None fora do Unix)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico if sys.platform == 'darwin' else pico * 1024
+
+
+def salvar(caminho):
+    """Grava o rastreio (eventos e resumo) em JSON."""
+    os.makedirs(os.path.dirname(caminho) or '.', exist_ok=True)
+    with open(caminho, 'w', encoding='utf-8') as f:
+        json.dump({
+            'duracao_ms': round((time.perf_counter() - _origem) * 1000, 3),
+            'pico_rss_bytes': _memoria_processo(),
+            'memoria_rastreada': MEMORIA,
+            'resumo': resumo(),
+            'eventos': _eventos,
+        }, f, ensure_ascii=False, indent=2)
+    return caminho
+
+
+def _mb(valor):
+    return '-' if valor is None else f'{valor / 1_048_576:.1f}'
+
+
+def imprimir_tabela(arquivo=None):
+    """Resumo por etapa em forma de tabela (tempos inclusivos)."""
+    arquivo = arquivo or sys.stderr
+    print(f"\n{'etapa':<16}{'chamadas':>9}{'parede ms':>12}{'cpu ms':>11}{'pico MB':>9}{'linhas':>11}{'MB':>9}",
+          file=arquivo)
+    for nome, t in resumo().items():
+        print(f"{nome:<16}{t['chamadas']:>9}{t['parede_ms']:>12.1f}{t['cpu_ms']:>11.1f}"
+              f"{_mb(t['pico_memoria_bytes']):>9}{t['linhas'] or '-':>11}{_mb(t['bytes'] or None):>9}", file=arquivo)
+    print(f"pico RSS do processo: {_mb(_memoria_processo())} MB", file=arquivo)
+
+
+def finalizar(caminho):
+    """Grava o rastreio e imprime o resumo (se alguma etapa foi medida)."""
+    if _eventos:
+        print(f"\nRastreio gravado em {salvar(caminho)}", file=sys.stderr)
+        imprimir_tabela()
+
+
+# VITIBRASIL_RASTREIO=arquivo.json liga o rastreio (com ganchos) na importação (dados.py importa este módulo)
+if os.environ.get('VITIBRASIL_RASTREIO'):
+    ativar(memoria=os.environ.get('VITIBRASIL_RASTREIO_MEMORIA') == '1', bibliotecas=True)
+    atexit.register(finalizar, os.environ['VITIBRASIL_RASTREIO'])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Roda um script Python com o rastreio de etapas ligado.')
+    parser.add_argument('-o', '--saida', default=os.path.join('cache', 'rastreio.json'), help='Arquivo JSON do rastreio')
+    parser.add_argument('--memoria', action='store_true', help='Mede o pico de memória por etapa (tracemalloc)')
+    parser.add_argument('script', help='Script a executar (ex.: juan.py)')
+    parser.add_argument('argumentos', nargs=argparse.REMAINDER, help='Argumentos do script')
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault('MPLBACKEND', 'Agg')
+    ativar(memoria=args.memoria, bibliotecas=True)
+    sys.argv = [args.script] + args.argumentos
+    sys.path.insert(0, os.path.dirname(os.path.abspath(args.script)))
+    try:
+        with etapa('script', arquivo=os.path.basename(args.script)):
+            runpy.run_path(args.script, run_name='__main__')
+    finally:
+        finalizar(args.saida)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+"""Significância de todas as correlações entre séries, com testes de permutação.
+
+Com ~15 pontos anuais o p-valor assintótico do `pearsonr` é pouco
+confiável. Aqui as correlações de Pearson ou Spearman de todos os pares
+saem de um único produto de matrizes das séries padronizadas, e o p-valor de
+permutação de todos os pares é obtido permutando os anos da matriz inteira:
+
+    R_b = Z[perm_b]^T Z / T
+
+Cada R_b dá, de uma vez, uma correlação sob a hipótese nula para cada par.
+As permutações são processadas em lotes (memória limitada) e os lotes são
+distribuídos entre processos. O gerador é semeado por lote
+(`SeedSequence.spawn`), então o resultado não depende do número de processos.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+# Quantidade aproximada de números float64 por lote de permutações (~64 MB)
+ELEMENTOS_POR_LOTE = 8_000_000
+
+
+def padronizar(x):
+    """Centraliza e normaliza cada coluna para que Z^T Z / T seja a correlação."""
+    x = np.asarray(x, dtype='float64')
+    centrado = x - x.mean(axis=0)
+    desvio = np.sqrt((centrado ** 2).mean(axis=0))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        z = centrado / desvio
+    # Séries constantes não têm correlação definida
+    z[:, ~(desvio > 0)] = 0.0
+    return z, desvio > 0
+
+
+def preparar(dados, metodo='pearson'):
+    """Remove anos incompletos e, para Spearman, troca os valores pelos postos."""
+    dados = dados.dropna(axis=0, how='any')
+    x = dados.to_numpy(dtype='float64')
+    if metodo == 'spearman':
+        x = stats.rankdata(x, axis=0)
+    elif metodo != 'pearson':
+        raise ValueError(f"Método desconhecido: {metodo}")
+    return x, list(dados.columns)
+
+
+def _contar_lote(z, r_abs, semente, n_permutacoes):
+    """Conta, por par, quantas correlações permutadas têm módulo >= o observado."""
+    rng = np.random.default_rng(semente)
+    t = z.shape[0]
+    contagem = np.zeros(r_abs.shape, dtype='int64')
+    # Pequena folga numérica para empates exatos (ex.: a permutação identidade)
+    limite = r_abs - 1e-12
+    perms = rng.permuted(np.broadcast_to(np.arange(t), (n_permutacoes, t)), axis=1)
+    # Empilha as séries permutadas lado a lado: um único produto (T x k)^T (T x k*m)
+    # por grupo de m permutações, pequeno o bastante para caber no cache
+    m = max(1, min(len(perms), 4096 // max(z.shape[1], 1)))
+    limite_t = limite * t
+    for inicio in range(0, len(perms), m):
+        grupo = perms[inicio:inicio + m]
+        empilhado = z[grupo].transpose(1, 0, 2).reshape(t, -1)
+        r_b = (z.T @ empilhado).reshape(z.shape[1], len(grupo), z.shape[1])
+        contagem += (np.abs(r_b) >= limite_t[:, None, :]).sum(axis=1)
+    return contagem
+
+
+def permutacoes(z, r, n_permutacoes=10000, semente=0, processos=None):
+    """p-valores bilaterais de permutação para todos os pares ((contagem + 1) / (B + 1))."""
+    k = z.shape[1]
+    por_lote = max(1, min(n_permutacoes, ELEMENTOS_POR_LOTE // max(k * k, 1)))
+    tamanhos = [por_lote] * (n_permutacoes // por_lote)
+    if n_permutacoes % por_lote:
+        tamanhos.append(n_permutacoes % por_lote)
+    sementes = np.random.SeedSequence(semente).spawn(len(tamanhos))
+    r_abs = np.abs(np.nan_to_num(r))
+
+    processos = processos or os.cpu_count() or 1
+    if processos == 1 or len(tamanhos) == 1:
+        contagens = [_contar_lote(z, r_abs, s, n) for s, n in zip(sementes, tamanhos)]
+    else:
+        with ProcessPoolExecutor(max_workers=min(processos, len(tamanhos))) as executor:
+            contagens = list(executor.map(_contar_lote, [z] * len(tamanhos), [r_abs] * len(tamanhos),
+                                          sementes, tamanhos))
+    contagem = np.sum(contagens, axis=0)
+    return (contagem + 1) / (n_permutacoes + 1)
+
+
+def p_assintotico(r, n):
+    """p-valor bilateral pela distribuição t (o mesmo do `scipy.stats.pearsonr`)."""
+    gl = n - 2
+    with np.errstate(invalid='ignore', divide='ignore'):
+        t = r * np.sqrt(gl / np.clip(1.0 - r ** 2, 1e-300, None))
+    return 2 * stats.t.sf(np.abs(t), gl)
+
+
+def testar_correlacoes(dados, metodo='pearson', n_permutacoes=10000, semente=0, processos=None):
+    """Correlação e significância de todos os pares de séries (colunas de `dados`).
+
+    `dados` é um DataFrame ano x série (como o `combined_df`). Retorna um
+    DataFrame com um par por linha: serie_a, serie_b, n, r, p_permutacao e
+    p_assintotico, ordenado pelo p-valor de permutação.
+    """
+    x, nomes = preparar(dados, metodo)
+    n = x.shape[0]
+    z, variavel = padronizar(x)
+    r = z.T @ z / n
+    r[~variavel, :] = np.nan
+    r[:, ~variavel] = np.nan
+    p_perm = permutacoes(z, r, n_permutacoes, semente, processos) if n_permutacoes else np.full(r.shape, np.nan)
+    p_perm[np.isnan(r)] = np.nan
+
+    a, b = np.triu_indices(len(nomes), k=1)
+    resultado = pd.DataFrame({
+        'serie_a': np.asarray(nomes, dtype=object)[a],
+        'serie_b': np.asarray(nomes, dtype=object)[b],
+        'n': n,
+        'r': r[a, b],
+        'p_permutacao': p_perm[a, b],
+        'p_assintotico': p_assintotico(r[a, b], n),
+    })
+    return resultado.sort_values('p_permutacao', kind='stable').reset_index(drop=True)
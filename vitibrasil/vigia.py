@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+"""Modo vigia: reprocessa e redesenha só o que depende dos arquivos alterados.
+
+Acompanha os CSVs da pasta de origem (`Arquivos Bases`), os CSVs da
+raspagem e a geometria (`brazil_states.geojson`). A cada mudança, monta o
+grafo do `vitibrasil.pipeline`, seleciona as etapas que leem os arquivos
+alterados (e as que dependem delas) e roda só essas. Como o pipeline compara
+o conteúdo, salvar um arquivo sem mudar nada não refaz nenhum gráfico.
+
+Rajadas de escrita (um editor salvando em partes, um `cp` de vários
+arquivos) são agrupadas: depois da primeira mudança, espera `--espera`
+segundos sem novas mudanças (até no máximo `--espera-maxima`) antes de rodar.
+
+A detecção é por varredura (`os.stat` a cada `--intervalo` segundos), que
+funciona igual no Linux, no Windows e em pastas montadas do Colab/Drive.
+
+    python -m vitibrasil vigiar
+    python -m vitibrasil vigiar --base /content --processos 4 --espera 2
+"""
+
+import argparse
+import glob
+import logging
+import os
+import sys
+import time
+
+from vitibrasil import dados, pipeline
+
+INTERVALO = 0.5
+ESPERA = 1.0
+ESPERA_MAXIMA = 10.0
+
+
+def arquivos_vigiados(base_path=None):
+    """Caminhos acompanhados: CSVs de origem, CSVs da raspagem e a geometria."""
+    from vitibrasil import renderizador
+    base_path = os.path.abspath(base_path or dados.BASE_PATH)
+    caminhos = set(glob.glob(os.path.join(base_path, '*.csv')))
+    caminhos.update(caminho for _, caminho in dados.arquivos_raspagem([dados.RAIZ, base_path]))
+    caminhos.add(renderizador.GEOJSON)
+    return {os.path.abspath(caminho) for caminho in caminhos}
+
+
+def fotografia(caminhos):
+    """(mtime, tamanho) de cada arquivo existente."""
+    resultado = {}
+    for caminho in caminhos:
+        try:
+            info = os.stat(caminho)
+        except FileNotFoundError:
+            continue
+        resultado[caminho] = (info.st_mtime_ns, info.st_size)
+    return resultado
+
+
+def alterados(antes, depois):
+    """Arquivos criados, removidos ou modificados entre duas fotografias."""
+    return {caminho for caminho in antes.keys() | depois.keys() if antes.get(caminho) != depois.get(caminho)}
+
+
+class Vigia:
+    """Laço de varredura + debounce que dispara o pipeline só nas etapas afetadas."""
+
+    def __init__(self, base_path=None, diretorio=pipeline.DIRETORIO, processos=1,
+                 intervalo=INTERVALO, espera=ESPERA, espera_maxima=ESPERA_MAXIMA):
+        self.base_path = base_path
+        self.diretorio = diretorio
+        self.processos = processos
+        self.intervalo = intervalo
+        self.espera = espera
+        self.espera_maxima = espera_maxima
+        self.estado = fotografia(arquivos_vigiados(base_path))
+
+    def _varrer(self):
+        atual = fotografia(arquivos_vigiados(self.base_path))
+        mudancas = alterados(self.estado, atual)
+        self.estado = atual
+        return mudancas
+
+    def aguardar_mudancas(self):
+        """Bloqueia até haver mudanças e a rajada de escritas terminar; retorna os arquivos alterados."""
+        mudancas = set()
+        while not mudancas:
+            time.sleep(self.intervalo)
+            mudancas = self._varrer()
+        primeira = ultima = time.monotonic()
+        while time.monotonic() - ultima < self.espera and time.monotonic() - primeira < self.espera_maxima:
+            time.sleep(self.intervalo)
+            novas = self._varrer()
+            if novas:
+                mudancas |= novas
+                ultima = time.monotonic()
+        return mudancas
+
+    def atualizar(self, arquivos=None):
+        """Roda as etapas afetadas pelos arquivos (todas, se `arquivos` for None)."""
+        grafo = pipeline.Pipeline(pipeline.etapas_padrao(self.base_path), self.diretorio)
+        if arquivos is None:
+            alvos = None
+        else:
+            alvos = sorted(grafo.afetadas(arquivos))
+            if not alvos:
+                logging.info("Nenhuma etapa depende dos arquivos alterados.")
+                return {}
+        inicio = time.perf_counter()
+        relatorio = grafo.executar(alvos, self.processos)
+        refeitas = {nome: situacao for nome, (situacao, _) in relatorio.items() if situacao != 'atual'}
+        for nome in grafo.ordem(refeitas):
+            logging.info(f"  {nome}: {refeitas[nome]}")
+        graficos = [nome for nome, situacao in refeitas.items()
+                    if nome.startswith('grafico:') and situacao == 'executada']
+        logging.info(f"{len(refeitas)} etapa(s) refeita(s), {len(graficos)} gráfico(s) atualizado(s) "
+                     f"em {time.perf_counter() - inicio:.2f} s")
+        return relatorio
+
+    def rodar(self, ciclos=None):
+        """Atualiza tudo uma vez e depois reage às mudanças (`ciclos` limita as rodadas)."""
+        self.atualizar()
+        rodadas = 0
+        while ciclos is None or rodadas < ciclos:
+            arquivos = self.aguardar_mudancas()
+            logging.info(f"Alterado(s): {', '.join(sorted(os.path.basename(a) for a in arquivos))}")
+            self.atualizar(arquivos)
+            rodadas += 1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Reprocessa os dados e gráficos afetados quando um arquivo muda.')
+    parser.add_argument('--base', default=None, help='Pasta com os arquivos de origem')
+    parser.add_argument('--saida', default=pipeline.DIRETORIO, help='Pasta dos artefatos do pipeline')
+    parser.add_argument('--processos', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--intervalo', type=float, default=INTERVALO, help='Segundos entre varreduras')
+    parser.add_argument('--espera', type=float, default=ESPERA,
+                        help='Segundos sem novas escritas antes de reprocessar')
+    parser.add_argument('--espera-maxima', type=float, default=ESPERA_MAXIMA,
+                        help='Limite de espera durante uma sequência longa de escritas')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    vigia = Vigia(args.base, args.saida, args.processos, args.intervalo, args.espera, args.espera_maxima)
+    logging.info(f"Vigiando {len(vigia.estado)} arquivo(s); Ctrl+C para sair.")
+    try:
+        vigia.rodar()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,260 @@
+# -*- coding: utf-8 -*-
+"""Visões materializadas dos rankings de exportação.
+
+As visões ficam no mesmo banco SQLite da `vitibrasil.consulta`:
+    mv_ranking(produto, janela, ano_fim, metrica, posicao, pais, volume, valor, preco_medio)
+        Top N países por volume e por valor para cada (produto, ano final) e
+        janela de anos (1, 5, 10, 15 e 0 = todo o histórico até o ano final).
+    mv_tendencia(produto, pais, ano, volume, valor, preco_medio, volume_acumulado, valor_acumulado)
+        Série anual de cada país com as somas acumuladas, usadas para obter o
+        total de qualquer janela sem somar a série inteira.
+    mv_particoes(produto, ano, hash)
+        Hash dos dados de entrada de cada partição (produto, ano). Apenas as
+        partições cujo hash mudou são recalculadas em `atualizar_visoes`.
+
+Uso pela linha de comando:
+    python -m vitibrasil.visoes            # atualiza incrementalmente
+    python -m vitibrasil.visoes --forcar   # recalcula tudo
+"""
+
+import argparse
+import logging
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+from vitibrasil import consulta
+from vitibrasil.preco import divisao_segura
+
+# Janelas padrão (em anos); 0 significa todo o histórico até o ano final
+JANELAS = [1, 5, 10, 15, 0]
+METRICAS = ['volume', 'valor']
+# Quantidade de posições guardadas por ranking (consultas pedem até N)
+N_RANKING = 20
+
+COLUNAS_RANKING = ['produto', 'janela', 'ano_fim', 'metrica', 'posicao', 'pais', 'volume', 'valor', 'preco_medio']
+COLUNAS_TENDENCIA = ['produto', 'pais', 'ano', 'volume', 'valor', 'preco_medio', 'volume_acumulado', 'valor_acumulado']
+
+INDICES = [
+    'CREATE INDEX IF NOT EXISTS idx_mv_ranking ON mv_ranking (produto, janela, ano_fim, metrica, posicao)',
+    'CREATE INDEX IF NOT EXISTS idx_mv_tendencia ON mv_tendencia (produto, pais, ano)',
+]
+
+
+def hash_particoes(exportacao):
+    """Calcula um hash (independente da ordem das linhas) por (produto, ano)."""
+    if exportacao.empty:
+        return pd.DataFrame(columns=['produto', 'ano', 'hash'])
+    linhas = pd.util.hash_pandas_object(exportacao[['pais', 'volume', 'valor']], index=False)
+    hashes = (exportacao[['produto', 'ano']]
+              .assign(hash=linhas.to_numpy())
+              .groupby(['produto', 'ano'], as_index=False)['hash'].sum())
+    # SQLite guarda inteiros com sinal de 64 bits
+    hashes['hash'] = hashes['hash'].to_numpy(dtype='uint64').view('int64')
+    return hashes
+
+
+def matrizes_produto(exportacao_produto):
+    """Monta as matrizes país x ano de volume e valor (anos contínuos)."""
+    df = exportacao_produto[exportacao_produto['pais'] != 'Total']
+    anos = np.arange(df['ano'].min(), df['ano'].max() + 1)
+    matrizes = {}
+    for metrica in METRICAS:
+        matrizes[metrica] = (df.pivot_table(index='pais', columns='ano', values=metrica, aggfunc='sum')
+                             .reindex(columns=anos, fill_value=0)
+                             .fillna(0))
+    paises = matrizes['volume'].index.to_numpy()
+    return paises, anos, {metrica: m.to_numpy(dtype='float64') for metrica, m in matrizes.items()}
+
+
+def calcular_rankings(produto, paises, anos, matrizes, anos_fim_por_janela, n=N_RANKING):
+    """Calcula os rankings de cada janela para os anos finais pedidos (vetorizado por ano)."""
+    # Somas acumuladas com uma coluna de zeros à esquerda: soma(a..b) = cs[b+1] - cs[a]
+    acumulados = {metrica: np.concatenate([np.zeros((len(paises), 1)), np.cumsum(m, axis=1)], axis=1)
+                  for metrica, m in matrizes.items()}
+    n = min(n, len(paises))
+    partes = []
+    for janela, anos_fim in anos_fim_por_janela.items():
+        anos_fim = np.asarray(sorted(anos_fim), dtype='int64')
+        if len(anos_fim) == 0 or n == 0:
+            continue
+        fim = anos_fim - anos[0] + 1
+        inicio = np.zeros_like(fim) if janela == 0 else np.maximum(fim - janela, 0)
+        somas = {metrica: cs[:, fim] - cs[:, inicio] for metrica, cs in acumulados.items()}
+        partes.append(rankings_janela(produto, janela, anos_fim, paises, somas, n))
+    if not partes:
+        return pd.DataFrame(columns=COLUNAS_RANKING)
+    return pd.concat(partes, ignore_index=True)[COLUNAS_RANKING]
+
+
+def rankings_janela(produto, janela, anos_fim, paises, somas, n=N_RANKING):
+    """Top N de cada métrica a partir das somas (países x anos finais) de uma janela."""
+    n = min(n, len(paises))
+    partes = []
+    for metrica in METRICAS:
+        # Ordena os países de cada coluna (ano final) pela métrica, do maior para o menor
+        ordem = np.argsort(-somas[metrica], axis=0, kind='stable')[:n]
+        colunas = np.broadcast_to(np.arange(len(anos_fim)), ordem.shape)
+        volume = somas['volume'][ordem, colunas]
+        valor = somas['valor'][ordem, colunas]
+        ranking = pd.DataFrame({
+            'produto': produto,
+            'janela': janela,
+            'ano_fim': np.broadcast_to(anos_fim, ordem.shape).ravel(order='F'),
+            'metrica': metrica,
+            'posicao': np.broadcast_to(np.arange(1, n + 1)[:, None], ordem.shape).ravel(order='F'),
+            'pais': paises[ordem].ravel(order='F'),
+            'volume': volume.ravel(order='F'),
+            'valor': valor.ravel(order='F'),
+            'preco_medio': divisao_segura(valor, volume, padrao=0.0).ravel(order='F'),
+        })
+        # Países sem exportação no período não entram no ranking
+        partes.append(ranking[ranking[metrica] > 0])
+    return pd.concat(partes, ignore_index=True)
+
+
+def calcular_tendencia(produto, paises, anos, matrizes, ano_inicial):
+    """Série anual por país, com somas acumuladas, a partir de `ano_inicial`."""
+    volume, valor = matrizes['volume'], matrizes['valor']
+    volume_acumulado = np.cumsum(volume, axis=1)
+    valor_acumulado = np.cumsum(valor, axis=1)
+    selecao = anos >= ano_inicial
+    # Só guarda (país, ano) a partir do primeiro ano com exportação do país
+    ativo = (volume_acumulado + valor_acumulado > 0)[:, selecao]
+    linhas, colunas = np.nonzero(ativo)
+    colunas = np.flatnonzero(selecao)[colunas]  # posições na matriz completa
+    return pd.DataFrame({
+        'produto': produto,
+        'pais': paises[linhas],
+        'ano': anos[colunas],
+        'volume': volume[linhas, colunas],
+        'valor': valor[linhas, colunas],
+        'preco_medio': divisao_segura(valor[linhas, colunas], volume[linhas, colunas], padrao=0.0),
+        'volume_acumulado': volume_acumulado[linhas, colunas],
+        'valor_acumulado': valor_acumulado[linhas, colunas],
+    })[COLUNAS_TENDENCIA]
+
+
+def particoes_alteradas(conn, hashes, forcar=False):
+    """Compara os hashes atuais com os guardados e retorna {produto: [anos alterados]}."""
+    try:
+        antigos = pd.read_sql_query('SELECT produto, ano, hash FROM mv_particoes', conn)
+    except (sqlite3.OperationalError, pd.errors.DatabaseError):
+        antigos = pd.DataFrame(columns=['produto', 'ano', 'hash'])
+    if forcar:
+        antigos = antigos.iloc[0:0]
+    comparacao = hashes.merge(antigos, on=['produto', 'ano'], how='outer', suffixes=('', '_antigo'))
+    alteradas = comparacao[comparacao['hash'] != comparacao['hash_antigo']]
+    return {produto: sorted(grupo['ano'].astype('int64')) for produto, grupo in alteradas.groupby('produto')}
+
+
+def anos_fim_afetados(anos_alterados, anos, janelas=JANELAS):
+    """Para cada janela, os anos finais cujo ranking depende de algum ano alterado."""
+    anos_alterados = np.asarray(anos_alterados, dtype='int64')
+    afetados = {}
+    for janela in janelas:
+        if janela == 0:
+            mascara = anos >= anos_alterados.min()
+        else:
+            # Ano final t usa os anos (t - janela, t]
+            distancia = anos[:, None] - anos_alterados[None, :]
+            mascara = ((distancia >= 0) & (distancia < janela)).any(axis=1)
+        afetados[janela] = anos[mascara]
+    return afetados
+
+
+def atualizar_visoes(conn=None, n=N_RANKING, forcar=False):
+    """Atualiza as visões materializadas apenas nas partições alteradas.
+
+    Retorna o número de partições (produto, ano) recalculadas.
+    """
+    conn = conn or consulta.conectar()
+    exportacao = pd.read_sql_query('SELECT produto, pais, ano, volume, valor FROM exportacao', conn)
+    hashes = hash_particoes(exportacao)
+    alteradas = particoes_alteradas(conn, hashes, forcar)
+    if not alteradas:
+        logging.info("Visões materializadas já estão atualizadas.")
+        return 0
+
+    with conn:
+        conn.execute(f"CREATE TABLE IF NOT EXISTS mv_ranking ({', '.join(COLUNAS_RANKING)})")
+        conn.execute(f"CREATE TABLE IF NOT EXISTS mv_tendencia ({', '.join(COLUNAS_TENDENCIA)})")
+        for indice in INDICES:
+            conn.execute(indice)
+
+        for produto, anos_alterados in alteradas.items():
+            exportacao_produto = exportacao[exportacao['produto'] == produto]
+            if exportacao_produto.empty:
+                # Produto removido: apaga as visões dele
+                conn.execute('DELETE FROM mv_ranking WHERE produto = ?', (produto,))
+                conn.execute('DELETE FROM mv_tendencia WHERE produto = ?', (produto,))
+                continue
+
+            paises, anos, matrizes = matrizes_produto(exportacao_produto)
+            afetados = anos_fim_afetados(anos_alterados, anos)
+            for janela, anos_fim in afetados.items():
+                conn.executemany('DELETE FROM mv_ranking WHERE produto = ? AND janela = ? AND ano_fim = ?',
+                                 [(produto, janela, int(ano)) for ano in anos_fim])
+            calcular_rankings(produto, paises, anos, matrizes, afetados, n).to_sql(
+                'mv_ranking', conn, if_exists='append', index=False)
+
+            # As somas acumuladas mudam do primeiro ano alterado em diante
+            ano_inicial = int(min(anos_alterados))
+            conn.execute('DELETE FROM mv_tendencia WHERE produto = ? AND ano >= ?', (produto, ano_inicial))
+            calcular_tendencia(produto, paises, anos, matrizes, ano_inicial).to_sql(
+                'mv_tendencia', conn, if_exists='append', index=False)
+
+        hashes.to_sql('mv_particoes', conn, if_exists='replace', index=False)
+
+    total = sum(len(anos) for anos in alteradas.values())
+    logging.info(f"Visões materializadas atualizadas: {total} partição(ões) em {len(alteradas)} produto(s).")
+    return total
+
+
+def ranking(produto, ano_fim, janela=15, metrica='valor', n=10, caminho=None):
+    """Lê o ranking pronto de um produto para a janela que termina em `ano_fim`."""
+    sql = """
+        SELECT posicao, pais, volume, valor, preco_medio
+        FROM mv_ranking
+        WHERE produto = ? AND janela = ? AND ano_fim = ? AND metrica = ? AND posicao <= ?
+        ORDER BY posicao
+    """
+    return consulta.query(sql, (produto, janela, ano_fim, metrica, n), caminho)
+
+
+def preco_medio_top_mercados(produto, ano_fim, janela=15, n=10, caminho=None):
+    """Preço médio dos países presentes no top N por volume ou por valor."""
+    sql = """
+        SELECT DISTINCT pais, volume, valor, preco_medio
+        FROM mv_ranking
+        WHERE produto = ? AND janela = ? AND ano_fim = ? AND posicao <= ?
+        ORDER BY preco_medio DESC
+    """
+    return consulta.query(sql, (produto, janela, ano_fim, n), caminho)
+
+
+def tendencia(produto, pais, inicio=None, fim=None, caminho=None):
+    """Série anual de exportação de um país (volume, valor e preço médio)."""
+    sql = """
+        SELECT ano, volume, valor, preco_medio
+        FROM mv_tendencia
+        WHERE produto = ? AND pais = ? AND ano BETWEEN ? AND ?
+        ORDER BY ano
+    """
+    return consulta.query(sql, (produto, pais, inicio or 0, fim or 9999), caminho)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Atualiza as visões materializadas de rankings.')
+    parser.add_argument('--banco', default=None, help='Caminho do arquivo SQLite')
+    parser.add_argument('--forcar', action='store_true', help='Recalcula todas as partições')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    total = atualizar_visoes(consulta.conectar(args.banco), forcar=args.forcar)
+    print(f"{total} partição(ões) recalculada(s).")
+
+
+if __name__ == '__main__':
+    main()